@@ -0,0 +1,47 @@
+""" Import time through add_task_to_list versus the bulk add_tasks. """
+import argparse
+import time
+
+from kanbatryoshka.models.nest import Nest
+
+
+def fresh_nest():
+    nest = Nest()
+    board = nest.create_board("Main Board")
+    nest.select_board(board.id)
+    return nest, board.lists[0].id
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=100_000)
+    args = parser.parse_args()
+    items = [(f"Task {i}", f"Imported task {i}") for i in range(args.tasks)]
+
+    nest, list_id = fresh_nest()
+    start = time.perf_counter()
+    for title, description in items:
+        nest.add_task_to_list(list_id, title, description)
+    print(f"add_task_to_list: {time.perf_counter() - start:.2f} s")
+
+    nest, list_id = fresh_nest()
+    start = time.perf_counter()
+    tasks = nest.add_tasks(list_id, items)
+    print(f"add_tasks:        {time.perf_counter() - start:.2f} s")
+
+    target_id = nest.current_board.lists[1].id
+    start = time.perf_counter()
+    nest.move_tasks([t.id for t in tasks], target_id)
+    print(f"move_tasks:       {time.perf_counter() - start:.2f} s")
+
+    start = time.perf_counter()
+    nest.update_tasks({t.id: {'title': t.title.upper()} for t in tasks})
+    print(f"update_tasks:     {time.perf_counter() - start:.2f} s")
+
+    start = time.perf_counter()
+    nest.remove_tasks([t.id for t in tasks])
+    print(f"remove_tasks:     {time.perf_counter() - start:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+""" Size, save and load time of each file format with each compression codec. """
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from bench_load import build_nest
+from kanbatryoshka.models.nest import Nest
+
+CODECS = ("", ".gz", ".bz2", ".xz")
+
+
+def measure(nest, path, repeat):
+    start = time.perf_counter()
+    nest.save_to_file(path)
+    save = time.perf_counter() - start
+
+    load = None
+    for _ in range(repeat):
+        restored = Nest()
+        start = time.perf_counter()
+        assert restored.load_from_file(path)
+        elapsed = time.perf_counter() - start
+        load = elapsed if load is None else min(load, elapsed)
+    return save, load
+
+
+def peak_load_memory(path):
+    # Python allocations while loading, the nest itself included.
+    tracemalloc.start()
+    Nest().load_from_file(path)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=2)
+    parser.add_argument("--memory", action="store_true", help="also trace peak load memory")
+    args = parser.parse_args()
+
+    nest = build_nest(args.tasks)
+    with tempfile.TemporaryDirectory() as directory:
+        for suffix in (".json", ".ktb"):
+            plain = None
+            for codec in CODECS:
+                path = os.path.join(directory, f"nest{suffix}{codec}")
+                save, load = measure(nest, path, args.repeat)
+                size = os.path.getsize(path)
+                plain = plain or size
+                line = (f"{suffix + codec:10} {size / 1e6:8.2f} MB {plain / size:6.1f}x "
+                        f"save {save:6.2f} s load {load:6.2f} s")
+                if args.memory:
+                    line += f" peak {peak_load_memory(path) / 1e6:7.1f} MB"
+                print(line)
+
+
+if __name__ == "__main__":
+    main()
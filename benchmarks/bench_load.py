@@ -0,0 +1,62 @@
+""" Load time against file size: it should grow linearly with the number of tasks. """
+import argparse
+import os
+import tempfile
+import time
+
+from kanbatryoshka.models.nest import Nest
+
+
+def build_nest(task_count, subtasks=9):
+    # Root tasks each with a nested board holding subtasks, like a real nest.
+    nest = Nest()
+    board = nest.create_board("Main Board")
+    nest.select_board(board.id)
+    list_id = board.lists[0].id
+
+    created = 0
+    while created < task_count:
+        task = nest.add_task_to_list(list_id, f"Task {created}", "")
+        nest.navigate_to_task_board(list_id, task.id)
+        nest.add_tasks(nest.current_board.lists[0].id,
+                       [f"Subtask {created + i}" for i in range(1, subtasks + 1)])
+        nest.back_to_parent()
+        created += 1 + subtasks
+    return nest
+
+
+def time_load(path, repeat):
+    best = None
+    for _ in range(repeat):
+        nest = Nest()
+        start = time.perf_counter()
+        assert nest.load_from_file(path)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=20_000)
+    parser.add_argument("--steps", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for suffix in (".json", ".ktb"):
+            per_task = []
+            for step in range(args.steps):
+                count = args.tasks << step
+                path = os.path.join(directory, f"nest{step}{suffix}")
+                build_nest(count).save_to_file(path)
+                elapsed = time_load(path, args.repeat)
+                per_task.append(elapsed / count)
+                print(f"{suffix:5} {count:>9} tasks {os.path.getsize(path) / 1e6:8.1f} MB "
+                      f"{elapsed:7.2f} s {per_task[-1] * 1e6:6.2f} us/task")
+            # Linear loading keeps the time per task flat as the file grows.
+            print(f"{suffix:5} time per task, largest / smallest file: {per_task[-1] / per_task[0]:.2f}")
+
+
+if __name__ == "__main__":
+    main()
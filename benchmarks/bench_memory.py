@@ -0,0 +1,44 @@
+""" Memory and creation time per task on a large nest. """
+import argparse
+import time
+import tracemalloc
+
+from kanbatryoshka.models.nest import Nest
+
+
+def build_nest(task_count, tasks_per_list=1000):
+    nest = Nest()
+    board = nest.create_board("Main Board")
+    nest.select_board(board.id)
+
+    created = 0
+    while created < task_count:
+        list_obj = nest.add_list_to_current_board(f"List {created // tasks_per_list}")
+        for i in range(min(tasks_per_list, task_count - created)):
+            nest.add_task_to_list(list_obj.id, f"Task {created + i}", "")
+        created += tasks_per_list
+    return nest
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    build_nest(args.tasks)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    nest = build_nest(args.tasks)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"tasks:            {args.tasks}")
+    print(f"build time:       {elapsed:.2f} s ({elapsed / args.tasks * 1e6:.2f} us/task)")
+    print(f"memory:           {current / 2**20:.1f} MiB ({current / args.tasks:.0f} B/task)")
+    return nest
+
+
+if __name__ == "__main__":
+    main()
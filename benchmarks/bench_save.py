@@ -0,0 +1,36 @@
+""" Save time after a single edit: only the boards that changed should be encoded again. """
+import argparse
+import os
+import tempfile
+import time
+
+from bench_load import build_nest
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=100_000)
+    parser.add_argument("--edits", type=int, default=3)
+    args = parser.parse_args()
+
+    nest = build_nest(args.tasks)
+    list_id = nest.current_board.lists[0].id
+    with tempfile.TemporaryDirectory() as directory:
+        for suffix in (".ktb", ".json"):
+            path = os.path.join(directory, f"nest{suffix}")
+            start = time.perf_counter()
+            nest.save_to_file(path)
+            full = time.perf_counter() - start
+
+            edited = []
+            for i in range(args.edits):
+                nest.add_task_to_list(list_id, f"Edit {i}")
+                start = time.perf_counter()
+                nest.save_to_file(path)
+                edited.append(time.perf_counter() - start)
+            print(f"{suffix:5} {len(nest.boards):>7} boards {os.path.getsize(path) / 1e6:7.1f} MB "
+                  f"first save {full:6.2f} s, after one edit {min(edited):6.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+""" Build and query times of Nest.search on a large nest. """
+import argparse
+import random
+import time
+
+from kanbatryoshka.models.nest import Nest
+
+WORDS = ("design review deploy release backend frontend database cache index query "
+         "refactor bug feature docs test perf memory login signup billing invoice "
+         "report export import sync mobile desktop api client server queue").split()
+
+
+def build_nest(task_count, tasks_per_list=1000, seed=0):
+    rng = random.Random(seed)
+    nest = Nest()
+    board = nest.create_board("Main Board")
+    nest.select_board(board.id)
+
+    created = 0
+    while created < task_count:
+        list_obj = nest.add_list_to_current_board(f"Sprint {created // tasks_per_list}")
+        count = min(tasks_per_list, task_count - created)
+        nest.add_tasks(list_obj.id, [
+            (f"{rng.choice(WORDS)} {rng.choice(WORDS)} #{created + i}",
+             " ".join(rng.choices(WORDS, k=6)))
+            for i in range(count)
+        ])
+        created += count
+    return nest
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    nest = build_nest(args.tasks)
+
+    start = time.perf_counter()
+    nest.search("warmup")
+    print(f"index build:          {time.perf_counter() - start:.2f} s")
+
+    for query in ("review", "cache query", "billing invoice mobile", "123456", "sprint 42"):
+        start = time.perf_counter()
+        for _ in range(10):
+            hits = nest.search(query, limit=20)
+        elapsed = (time.perf_counter() - start) / 10
+        print(f"{query!r:26} {elapsed * 1000:8.2f} ms  ({len(hits)} hits)")
+
+    list_id = nest.current_board.lists[-1].id
+    start = time.perf_counter()
+    task = nest.add_task_to_list(list_id, "needle in the haystack")
+    nest.update_task(task.id, "needle moved")
+    nest.remove_task_from_list(list_id, task.id)
+    print(f"incremental updates:  {(time.perf_counter() - start) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@ from PySide6.QtWidgets import QApplication
 from PySide6.QtGui import QIcon
 import os
 from .controllers.board_controller import BoardController
+from .controllers.autosave_controller import AutosaveController
 from .models.nest import Nest
 from .views.main_window import MainWindow
 
@@ -17,7 +18,7 @@ class KanbatryoshkaApp:
             default_board = self.nest.create_board("Main Board")
             self.nest.select_board(default_board.id)
         else:
-            self.nest.select_board(self.nest.boards[0].id)
+            self.nest.select_board(next(iter(self.nest.boards)).id)
         
         self.main_window = MainWindow()
         current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -25,6 +26,7 @@ class KanbatryoshkaApp:
         self.main_window.setWindowIcon(QIcon(icon_path))
         
         self.board_controller = BoardController(self.nest, self.main_window)
+        self.autosave_controller = AutosaveController(self.board_controller, self.main_window)
         
     def run(self):
         self.main_window.show()
@@ -0,0 +1,72 @@
+import threading
+from PySide6.QtCore import QObject, QTimer, Signal
+
+AUTOSAVE_INTERVAL_MS = 60_000
+
+
+class AutosaveController(QObject):
+    # Every interval, saves the open file if it changed: the snapshot is taken here, on
+    # the GUI thread, and written on a worker thread (see Nest.begin_save). The worker
+    # reports back through the signals below, which Qt delivers on the GUI thread.
+    progress = Signal(int)
+    finished = Signal(object, bool, str)
+
+    def __init__(self, board_controller, main_window, interval_ms=AUTOSAVE_INTERVAL_MS):
+        super().__init__()
+        self.board_controller = board_controller
+        self.main_window = main_window
+        self.running = None
+
+        self.progress.connect(self.show_progress)
+        self.finished.connect(self.on_finished)
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.autosave)
+        self.set_interval(interval_ms)
+
+    def set_interval(self, interval_ms):
+        # 0 turns autosave off.
+        self.timer.stop()
+        if interval_ms > 0:
+            self.timer.start(interval_ms)
+
+    def autosave(self):
+        # The board controller replaces its nest on new and load: always save the current one.
+        nest = self.board_controller.nest
+        if self.running is not None or not nest.dirty:
+            return
+        job = nest.begin_save()
+        if job is None:
+            return
+        self.running = (nest, job)
+        self.main_window.status_bar.showMessage("Saving... 0%")
+        threading.Thread(target=self.run, args=(job,), daemon=True).start()
+
+    def run(self, job):
+        # Worker thread: only touches the job and emits signals.
+        shown = [0]
+
+        def report(done, total):
+            percent = done * 100 // max(total, 1)
+            if percent != shown[0]:
+                shown[0] = percent
+                self.progress.emit(percent)
+
+        try:
+            job.run(progress=report)
+        except Exception as e:
+            self.finished.emit(job, False, str(e))
+        else:
+            self.finished.emit(job, True, "")
+
+    def show_progress(self, percent):
+        self.main_window.status_bar.showMessage(f"Saving... {percent}%")
+
+    def on_finished(self, job, saved, error):
+        nest, _ = self.running
+        self.running = None
+        if nest.finish_save(job, saved):
+            self.main_window.status_bar.showMessage(f"Autosaved to {job.file_path}", 5000)
+        elif not saved:
+            self.main_window.status_bar.showMessage(f"Autosave failed: {error}")
+        else:
+            self.main_window.status_bar.clearMessage()
@@ -1,5 +1,7 @@
 from PySide6.QtWidgets import QMessageBox
+from PySide6.QtCore import QCoreApplication, QEventLoop
 from ..views.list_widget import ListWidget
+from ..views.search_dialog import SearchDialog
 from ..controllers.list_controller import ListController
 
 class BoardController:
@@ -7,6 +9,7 @@ class BoardController:
         self.nest = nest
         self.main_window = main_window
         self.list_controllers = []
+        self.subscription = None
         self.setup_connections()
         self.initialize_board()
 
@@ -18,6 +21,9 @@ class BoardController:
         self.main_window.new_board_requested.connect(self.create_new_board)
         self.main_window.save_requested.connect(self.save_board)
         self.main_window.load_requested.connect(self.load_board)
+        self.main_window.search_requested.connect(self.search)
+        self.main_window.undo_requested.connect(self.undo)
+        self.main_window.redo_requested.connect(self.redo)
 
         self.update_navigation_path()
 
@@ -30,6 +36,7 @@ class BoardController:
 
     def update_view(self):
         board = self.nest.get_current_board()
+        self.subscribe(board)
         self.main_window.set_board_title(board.title)
         self.main_window.update_navigation_path(self.nest.get_board_path())
 
@@ -37,13 +44,136 @@ class BoardController:
         self.clear_board_layout()
 
         for lst in board.lists:
-            lw = ListWidget(lst.title, lst.id)
-            self.main_window.board_widget.board_layout.insertWidget(
-                self.main_window.board_widget.board_layout.count() - 1, lw
-            )
-            lc = ListController(self.nest, lw, self)
-            self.list_controllers.append(lc)
-        
+            self.insert_list(lst, len(self.list_controllers))
+
+    def insert_list(self, list_obj, index):
+        lw = ListWidget(list_obj.title, list_obj.id, self.nest.external_id(list_obj))
+        self.main_window.board_widget.board_layout.insertWidget(index, lw)
+        lc = ListController(self.nest, lw, self)
+        self.list_controllers.insert(index, lc)
+
+    def subscribe(self, board):
+        if self.subscription is not None:
+            nest, board_id = self.subscription
+            nest.unsubscribe(self.apply_changes, board_id)
+        self.subscription = (self.nest, board.id)
+        self.nest.subscribe(self.apply_changes, board.id)
+
+#region Changes
+
+    # Only the events of the displayed board arrive here, so each one patches the widgets
+    # it names instead of rebuilding the whole board.
+
+    def apply_changes(self, events):
+        board = self.nest.get_current_board()
+        if board is None or board.id != self.subscription[1]:
+            self.update_view()
+            return
+
+        for event in events:
+            handler = getattr(self, f"on_{event.kind}", None)
+            if handler is not None:
+                handler(board, event)
+
+    def get_list_controller(self, list_id):
+        return next((lc for lc in self.list_controllers if lc.list_widget.list_id == list_id), None)
+
+    def on_list_added(self, board, event):
+        self.insert_list(self.nest.get_list_by_id(event.details['list_id']), event.details['index'])
+
+    def on_list_removed(self, board, event):
+        lc = self.get_list_controller(event.details['list_id'])
+        if lc:
+            self.main_window.board_widget.board_layout.removeWidget(lc.list_widget)
+            lc.list_widget.deleteLater()
+            self.list_controllers.remove(lc)
+
+    def on_list_moved(self, board, event):
+        lc = self.get_list_controller(event.details['list_id'])
+        if lc:
+            index = event.details['index']
+            board_layout = self.main_window.board_widget.board_layout
+            board_layout.removeWidget(lc.list_widget)
+            board_layout.insertWidget(index, lc.list_widget)
+            self.list_controllers.remove(lc)
+            self.list_controllers.insert(index, lc)
+
+    def on_list_renamed(self, board, event):
+        lc = self.get_list_controller(event.details['list_id'])
+        if lc:
+            lc.list_widget.update_title(event.details['title'])
+
+    def on_task_added(self, board, event):
+        self.insert_tasks(event.details['list_id'], [event.details['task_id']],
+                          [event.details['index']])
+
+    def on_tasks_added(self, board, event):
+        self.insert_tasks(event.details['list_id'], event.details['task_ids'],
+                          event.details['indexes'])
+
+    def on_task_removed(self, board, event):
+        self.drop_tasks([(event.details['list_id'], event.details['task_id'])])
+
+    def on_tasks_removed(self, board, event):
+        list_id = event.details['list_id']
+        self.drop_tasks([(list_id, task_id) for task_id in event.details['task_ids']])
+
+    def on_task_moved(self, board, event):
+        details = event.details
+        if details['source_list_id'] == details['list_id']:
+            lc = self.get_list_controller(details['list_id'])
+            if lc:
+                lc.place_task(details['task_id'], details['index'])
+            return
+
+        if details['source_board_id'] == board.id:
+            self.drop_tasks([(details['source_list_id'], details['task_id'])])
+        if event.board_id == board.id:
+            self.insert_tasks(details['list_id'], [details['task_id']], [details['index']])
+
+    def on_tasks_moved(self, board, event):
+        details = event.details
+        self.drop_tasks([(list_id, task_id)
+                         for (board_id, list_id, _), task_id in zip(details['sources'],
+                                                                    details['task_ids'])
+                         if board_id == board.id])
+        if event.board_id == board.id:
+            self.insert_tasks(details['list_id'], details['task_ids'], details['indexes'])
+
+    def on_task_updated(self, board, event):
+        lc = self.get_list_controller(event.details['list_id'])
+        tc = lc.get_task_controller(event.details['task_id']) if lc else None
+        if tc:
+            tc.task_widget.update_task(event.details['title'], event.details['description'])
+
+    def on_board_changed(self, board, event):
+        if event.board_id == board.id:
+            self.main_window.set_board_title(event.details['title'])
+            self.update_navigation_path()
+            return
+
+        task_id = event.details['task_id']
+        list_obj = self.nest.get_list_of_task(task_id)
+        lc = self.get_list_controller(list_obj.id) if list_obj else None
+        tc = lc.get_task_controller(task_id) if lc else None
+        if tc:
+            tc.task_widget.set_has_subtasks(event.details['task_count'] > 0)
+
+    def insert_tasks(self, list_id, task_ids, indexes):
+        lc = self.get_list_controller(list_id)
+        if not lc:
+            return
+        for task_id, index in sorted(zip(task_ids, indexes), key=lambda pair: pair[1]):
+            lc.insert_task(self.nest.get_task_by_id(task_id), index)
+
+    def drop_tasks(self, pairs):
+        for list_id, task_id in pairs:
+            lc = self.get_list_controller(list_id)
+            if lc:
+                lc.drop_task(task_id)
+
+#endregion Changes
+
     def clear_board_layout(self):
         board_layout = self.main_window.board_widget.board_layout
         add_button = None
@@ -69,16 +199,10 @@ class BoardController:
                     break
 
     def add_list(self, title):
-        new_list = self.nest.add_list_to_current_board(title)
-        if new_list:
-            self.update_view()
-        return new_list
+        return self.nest.add_list_to_current_board(title)
     
     def remove_list(self, list_id):
-        success = self.nest.remove_list_from_current_board(list_id)
-        if success:
-            self.update_view()
-        return success
+        return self.nest.remove_list_from_current_board(list_id)
     
     def navigate_to_task_board(self, list_id, task_id):
         success = self.nest.navigate_to_task_board(list_id, task_id)
@@ -92,16 +216,37 @@ class BoardController:
             self.update_view()
         return success
     
+    def search(self, query):
+        hits = self.nest.search(query)
+        self.main_window.status_bar.showMessage(f"{len(hits)} result(s) for '{query}'")
+
+        dialog = SearchDialog(query, hits, self.main_window)
+        dialog.board_requested.connect(self.open_board)
+        dialog.exec()
+
+    def open_board(self, board_id):
+        success = self.nest.open_board(board_id)
+        if success:
+            self.update_view()
+        return success
+
+    def undo(self):
+        if not self.nest.undo():
+            self.main_window.status_bar.showMessage("Nothing to undo")
+
+    def redo(self):
+        if not self.nest.redo():
+            self.main_window.status_bar.showMessage("Nothing to redo")
+
     def update_navigation_path(self):
         path = self.nest.get_board_path()
         self.main_window.update_navigation_path(path)
 
     def handle_list_moved(self, list_id, new_position):
-        success = self.nest.move_list_in_current_board(list_id, new_position)
-        if success:
-            self.update_view()
+        self.nest.move_list_in_current_board(self.nest.internal_id(list_id), new_position)
 
     def create_new_board(self):
+        self.nest.close_log()
         self.nest = type(self.nest)()
         default_board = self.nest.create_board("Main Board", "Default Board")
         self.nest.select_board(default_board.id)
@@ -110,7 +255,8 @@ class BoardController:
 
     def save_board(self, file_path):
         try:
-            success = self.nest.save_to_file(file_path)
+            # Saving again to the open file only flushes its log, see Nest.open_log.
+            success = self.nest.save_as(file_path)
             if not success:
                 QMessageBox.warning(self.main_window, "Save Failed", 
                                    "Failed to save the kanban board.")
@@ -120,7 +266,7 @@ class BoardController:
 
     def load_board(self, file_path):
         try:
-            success = self.nest.load_from_file(file_path)
+            success = self.nest.open_log(file_path, progress=self._show_load_progress)
             if success:
                 self.update_view()
             else:
@@ -129,4 +275,8 @@ class BoardController:
         except Exception as e:
             QMessageBox.critical(self.main_window, "Error", 
                                f"An error occurred while loading: {str(e)}")
+
+    def _show_load_progress(self, done, total):
+        self.main_window.status_bar.showMessage(f"Loading... {done * 100 // max(total, 1)}%")
+        QCoreApplication.processEvents(QEventLoop.ExcludeUserInputEvents)
             
\ No newline at end of file
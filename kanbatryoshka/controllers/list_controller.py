@@ -27,54 +27,51 @@ class ListController:
                     task_controller.task_widget.handle_edit_task()
                     break
 
-    def add_task(self, title, description):
-        list_id = self.list_widget.list_id
-        task = self.nest.add_task_to_list(list_id, title, description)
-
-        if task:
-            task_widget = self.list_widget.add_task(task.title, task.description, task.id)
-            task_controller = TaskController(self.nest, task_widget, self, task.id, list_id)
-            self.task_controllers.append(task_controller)
+    # The Nest calls below only change the model; the widgets follow through the change
+    # events BoardController receives (insert_task, drop_task, place_task).
 
-        return task
+    def add_task(self, title, description):
+        return self.nest.add_task_to_list(self.list_widget.list_id, title, description)
     
     def remove_task(self, task_id):
+        return self.nest.remove_task_from_list(self.list_widget.list_id, task_id)
+
+    def insert_task(self, task, index):
         list_id = self.list_widget.list_id
-        success = self.nest.remove_task_from_list(list_id, task_id)
+        task_widget = self.list_widget.add_task(task.title, task.description, task.id, index,
+                                                self.nest.external_id(task))
+        task_controller = TaskController(self.nest, task_widget, self, task.id, list_id)
+        task_widget.set_has_subtasks(task.has_subtasks())
+        self.task_controllers.insert(index, task_controller)
+        self.list_widget.update_delete_button_state()
 
-        if success:
-            self.list_widget.remove_task(task_id)
-            self.task_controllers = [tc for tc in self.task_controllers if tc.task_id != task_id]
+    def drop_task(self, task_id):
+        self.list_widget.remove_task(task_id)
+        self.task_controllers = [tc for tc in self.task_controllers if tc.task_id != task_id]
 
-        return success
+    def get_task_controller(self, task_id):
+        return next((tc for tc in self.task_controllers if tc.task_id == task_id), None)
     
     def load_tasks(self):
         list_id = self.list_widget.list_id
-        current_board = self.nest.get_current_board()
+        list_obj = self.nest.get_list_by_id(list_id)
         
-        if not current_board:
+        if not list_obj:
             return
             
-        for list_obj in current_board.lists:
-            if list_obj.id == list_id:
-                for task in list_obj.tasks:
-                    task_widget = self.list_widget.add_task(task.title, task.description, task.id)
-                    task_controller = TaskController(self.nest, task_widget, self, task.id, list_id)
-
-                    has_subtasks = self.nest.task_has_subtasks(task.id)
-                    task_widget.set_has_subtasks(has_subtasks)
-                    
-                    self.task_controllers.append(task_controller)
-                break
+        for task in list_obj.tasks:
+            task_widget = self.list_widget.add_task(task.title, task.description, task.id,
+                                                    external_id=self.nest.external_id(task))
+            task_controller = TaskController(self.nest, task_widget, self, task.id, list_id)
+
+            task_widget.set_has_subtasks(task.has_subtasks())
+            
+            self.task_controllers.append(task_controller)
 
         self.list_widget.update_delete_button_state()
 
     def handle_rename_list(self, new_title):
-        list_id = self.list_widget.list_id
-        success = self.nest.rename_list(list_id, new_title)
-        
-        if success:
-            self.list_widget.update_title(new_title)
+        self.nest.rename_list(self.list_widget.list_id, new_title)
 
     
     def handle_delete_list(self):
@@ -94,7 +91,12 @@ class ListController:
         success = self.board_controller.remove_list(list_id)
         return success
 
+    # Dropped ids come from the drag payload, they are external ids.
     def handle_task_reordered(self, task_id, new_index):
+        self.nest.reorder_task_in_list(self.list_widget.list_id, self.nest.internal_id(task_id),
+                                       new_index)
+
+    def place_task(self, task_id, new_index):
         old_index = -1
         task_widget = None
         
@@ -106,36 +108,32 @@ class ListController:
         
         if old_index == -1:
             return
+
+        self.list_widget.tasks_layout.removeWidget(task_widget)
         
-        success = self.nest.reorder_task_in_list(self.list_widget.list_id, task_id, new_index)
+        layout_count = self.list_widget.tasks_layout.count()
+        if new_index > layout_count:
+            new_index = layout_count
         
-        if success:
-            self.list_widget.tasks_layout.removeWidget(task_widget)
-            
-            layout_count = self.list_widget.tasks_layout.count()
-            if new_index > layout_count:
-                new_index = layout_count
-            
-            self.list_widget.tasks_layout.insertWidget(new_index, task_widget)
-            
-            controller = self.task_controllers.pop(old_index)
-            
-            controller_count = len(self.task_controllers)
-            if new_index > controller_count:
-                new_index = controller_count
-            
-            self.task_controllers.insert(new_index, controller)
-            
-            task_widget.show()
+        self.list_widget.tasks_layout.insertWidget(new_index, task_widget)
+        
+        controller = self.task_controllers.pop(old_index)
+        
+        controller_count = len(self.task_controllers)
+        if new_index > controller_count:
+            new_index = controller_count
+        
+        self.task_controllers.insert(new_index, controller)
+        
+        task_widget.show()
 
     def handle_task_moved_to_list(self, task_id, source_list_id):
         target_list_id = self.list_widget.list_id
+        source_list_id = self.nest.internal_id(source_list_id)
         
         if source_list_id == target_list_id:
             return
         
-        success = self.nest.move_task_between_lists(task_id, source_list_id, target_list_id)
-        
-        if success:
-            self.board_controller.update_view()
+        self.nest.move_task_between_lists(self.nest.internal_id(task_id), source_list_id,
+                                          target_list_id)
             
\ No newline at end of file
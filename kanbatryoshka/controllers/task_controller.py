@@ -34,19 +34,8 @@ class TaskController:
 
     def handle_edit_task(self, new_title, new_description):
         task_id = self.task_widget.task_id
-        success = self.nest.update_task(task_id, new_title, new_description)
-        
-        if success:
-            self.task_widget.update_task(new_title, new_description)
+        self.nest.update_task(task_id, new_title, new_description)
 
     def update_task(self, title = None, description = None):
-        success = self.nest.update_task(self.task_id, title, description)
-        
-        if success and (title or description):
-            if title:
-                self.task_widget.set_title(title)
-            if description:
-                self.task_widget.set_description(description)
-
-        return success
+        return self.nest.update_task(self.task_id, title, description)
     
@@ -1,30 +1,168 @@
-from datetime import datetime
-import uuid
-from .list import List
+from .ids import new_id
+from . import ordering
+from .list import List, TODO_TITLE, IN_PROGRESS_TITLE, DONE_TITLE
+from .timestamps import now, to_datetime, to_epoch
+from .snapshot import thaw
+
+# The lists every new board starts with.
+DEFAULT_LIST_TITLES = (TODO_TITLE, IN_PROGRESS_TITLE, DONE_TITLE)
 
 class Board:
+    __slots__ = ('id', '_title', '_description', '_created_at', '_updated_at', 'lists',
+                 'parent_board_id', 'parent_task_id', 'task',
+                 'task_count', 'total_task_count', '_path', '_frozen')
+
     def __init__(self, title, description="", create_default_lists=True):
-        self.id = str(uuid.uuid4())
-        self.title = title
-        self.description = description
-        self.created_at = datetime.now()
-        self.updated_at = datetime.now()
+        self.id = new_id()
+        self._title = title
+        self._description = description
+        self._created_at = now()
+        self._updated_at = self._created_at
         self.lists = []
 
         self.parent_board_id = None
         self.parent_task_id  = None
+        self.task = None
+
+        # Tasks directly on this board, and every task in the board's whole subtree.
+        self.task_count = 0
+        self.total_task_count = 0
+        self._path = None
+        self._frozen = None
         
         if create_default_lists:
-            self.add_list(List("To Do"))
-            self.add_list(List("In Progress"))
-            self.add_list(List("Done"))
+            for rank, list_title in enumerate(DEFAULT_LIST_TITLES, 1):
+                list_obj = List(list_title)
+                list_obj.owner = self
+                list_obj.rank = rank * ordering.RANK_STEP
+                self.lists.append(list_obj)
+
+    # A task's nested board stores no title of its own, it is derived from the task.
+    @property
+    def title(self):
+        if self._title is None and self.task is not None:
+            return f"Board: {self.task.title}"
+        return self._title
+
+    @title.setter
+    def title(self, value):
+        self._title = value
+        self.invalidate_path()
+        thaw(self)
+
+    @property
+    def description(self):
+        if self._description is None and self.task is not None:
+            return f"Board for task: {self.task.description}"
+        return self._description
+
+    @description.setter
+    def description(self, value):
+        self._description = value
+        thaw(self)
+
+    @property
+    def created_at(self):
+        return to_datetime(self._created_at)
+
+    @created_at.setter
+    def created_at(self, value):
+        self._created_at = to_epoch(value)
+
+    @property
+    def updated_at(self):
+        return to_datetime(self._updated_at)
+
+    @updated_at.setter
+    def updated_at(self, value):
+        self._updated_at = to_epoch(value)
+
+    @property
+    def has_tasks(self):
+        return self.task_count > 0
+
+    def parent_board(self):
+        if self.task is None or self.task.owner is None:
+            return None
+        return self.task.owner.owner
+
+    def path(self):
+        if self._path is not None:
+            return self._path
+
+        uncached = []
+        board = self
+        while board is not None and board._path is None:
+            uncached.append(board)
+            board = board.parent_board()
+
+        path = board._path if board is not None else ()
+        for board in reversed(uncached):
+            path = path + (board.title,)
+            board._path = path
+        return path
+
+    def invalidate_path(self):
+        # A cached path implies cached ancestors, so an uncached board has no cached descendants.
+        stack = [self]
+        while stack:
+            board = stack.pop()
+            if board._path is None:
+                continue
+            board._path = None
+            for list_obj in board.lists:
+                for task in list_obj.tasks:
+                    if task._board is not None:
+                        stack.append(task._board)
+
+    def count_tasks(self, direct_delta, total_delta):
+        self.task_count += direct_delta
+        board = self
+        while board is not None:
+            board.total_task_count += total_delta
+            board = board.parent_board()
+
+    def attach_task(self, task):
+        self.task = task
+        self.parent_task_id = task.id
+        if self._title == f"Board: {task.title}":
+            self._title = None
+        if self._description == f"Board for task: {task.description}":
+            self._description = None
+        thaw(self)
     
-    def add_list(self, list_obj):
-        self.lists.append(list_obj)
-        self.updated_at = datetime.now()
+    def add_list(self, list_obj, index=None):
+        ordering.insert(self.lists, list_obj, index)
+        list_obj.owner = self
+        thaw(self)
+        if list_obj.tasks:
+            self.count_tasks(len(list_obj.tasks), _list_total(list_obj))
+        self._updated_at = now()
         return list_obj
     
     def remove_list(self, list_id):
-        self.lists = [l for l in self.lists if l.id != list_id]
-        self.updated_at = datetime.now()
-        return True
\ No newline at end of file
+        for list_obj in self.lists:
+            if list_obj.id == list_id:
+                self.detach_list(list_obj)
+                break
+        self._updated_at = now()
+        return True
+
+    def detach_list(self, list_obj):
+        if not ordering.remove(self.lists, list_obj):
+            return False
+
+        list_obj.owner = None
+        thaw(self)
+        if list_obj.tasks:
+            self.count_tasks(-len(list_obj.tasks), -_list_total(list_obj))
+        self._updated_at = now()
+        return True
+
+    def move_list(self, list_obj, new_index):
+        thaw(self)
+        return ordering.move(self.lists, list_obj, new_index)
+
+
+def _list_total(list_obj):
+    return sum(1 + task.subtask_count() for task in list_obj.tasks)
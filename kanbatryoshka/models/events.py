@@ -0,0 +1,101 @@
+from collections import namedtuple
+from contextlib import contextmanager
+
+# board_id is the board the change is visible on. Events for changes that span two boards
+# (moves) also name the other side in details['source_board_id'] or
+# details['source_board_ids'], and are routed to both.
+ChangeEvent = namedtuple('ChangeEvent', ['kind', 'board_id', 'details'])
+
+# Within one batch only the last of these events is kept for the same item.
+COALESCED = {
+    'task_updated': 'task_id',
+    'list_renamed': 'list_id',
+    'board_changed': 'board_id',
+}
+
+
+class EventBus:
+    # Subscribers receive a list of ChangeEvents: a single event for a lone change, the
+    # whole coalesced batch at the end of a batch() block. A subscriber registered with a
+    # board_id only receives the events of that board.
+    def __init__(self):
+        self._subscribers = {}
+        self._batch = None
+        self._depth = 0
+
+    @property
+    def active(self):
+        return bool(self._subscribers)
+
+    def subscribe(self, callback, board_id=None):
+        self._subscribers.setdefault(board_id, []).append(callback)
+
+    def unsubscribe(self, callback, board_id=None):
+        callbacks = self._subscribers.get(board_id)
+        if callbacks and callback in callbacks:
+            callbacks.remove(callback)
+            if not callbacks:
+                del self._subscribers[board_id]
+
+    def publish(self, kind, board_id, **details):
+        if not self._subscribers:
+            return
+        event = ChangeEvent(kind, board_id, details)
+        if self._batch is not None:
+            self._batch.append(event)
+        else:
+            self._deliver([event])
+
+    @contextmanager
+    def batch(self):
+        self._depth += 1
+        if self._depth == 1:
+            self._batch = []
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            if self._depth == 0:
+                events, self._batch = self._batch, None
+                if events:
+                    self._deliver(coalesce(events))
+
+    def _deliver(self, events):
+        for callback in list(self._subscribers.get(None, ())):
+            callback(events)
+
+        by_board = {}
+        for event in events:
+            for board_id in routes(event):
+                if board_id in self._subscribers:
+                    by_board.setdefault(board_id, []).append(event)
+        for board_id, board_events in by_board.items():
+            for callback in list(self._subscribers.get(board_id, ())):
+                callback(board_events)
+
+
+def routes(event):
+    boards = {event.board_id}
+    details = event.details
+    if 'source_board_id' in details:
+        boards.add(details['source_board_id'])
+    boards.update(details.get('source_board_ids', ()))
+    if 'parent_board_id' in details:
+        boards.add(details['parent_board_id'])
+    boards.discard(None)
+    return boards
+
+
+def coalesce(events):
+    last = {}
+    for i, event in enumerate(events):
+        key = COALESCED.get(event.kind)
+        if key is not None:
+            last[(event.kind, event.details.get(key, event.board_id))] = i
+
+    kept = []
+    for i, event in enumerate(events):
+        key = COALESCED.get(event.kind)
+        if key is None or last[(event.kind, event.details.get(key, event.board_id))] == i:
+            kept.append(event)
+    return kept
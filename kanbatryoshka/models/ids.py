@@ -0,0 +1,92 @@
+import itertools
+import uuid
+
+# Boards, lists and tasks are keyed by small integers handed out in creation order.
+# UUIDs only exist at the edges (files, CLI, drag and drop) and go through an IdMap.
+_counter = itertools.count(1)
+
+
+def new_id():
+    return next(_counter)
+
+
+def next_free():
+    # An id that, like every id above it, has not been handed out yet.
+    return next(_counter)
+
+
+def reserve(next_id):
+    # Makes sure ids read back from a file are not handed out again.
+    global _counter
+    _counter = itertools.count(max(next(_counter), next_id))
+
+
+# The last group of a UUID holds 48 bits, as many as any nest will ever allocate.
+NODE_BITS = 48
+NODE_MASK = (1 << NODE_BITS) - 1
+
+
+class IdMap:
+    # External ids of the items created here are the namespace UUID with its last group
+    # replaced by the internal id, so they cost nothing to store and read back to the same
+    # item after a save and a load. UUIDs adopted from elsewhere, such as files written
+    # before integer ids, are the only ones kept in the two dicts.
+    def __init__(self, namespace=None):
+        if namespace is None:
+            namespace = str(uuid.UUID(int=uuid.uuid4().int & ~NODE_MASK))
+        self.namespace = namespace
+        self._prefix = namespace[:-12]
+        self._external = {}
+        self._internal = {}
+
+    def external(self, internal_id):
+        if internal_id is None:
+            return None
+        external_id = self._external.get(internal_id)
+        if external_id is None:
+            external_id = f"{self._prefix}{internal_id:012x}"
+        return external_id
+
+    def internal(self, external_id):
+        if type(external_id) is not str:
+            return None
+        external_id = external_id.strip().lower()
+        internal_id = self._internal.get(external_id)
+        if internal_id is not None:
+            return internal_id
+        if len(external_id) == 36 and external_id.startswith(self._prefix):
+            try:
+                return int(external_id[24:], 16)
+            except ValueError:
+                return None
+        return None
+
+    def adopt(self, external_id):
+        # Internal id for a UUID read from a file, allocating one if it is foreign.
+        if not external_id:
+            return None
+        internal_id = self.internal(external_id)
+        if internal_id is None:
+            internal_id = new_id()
+            self.bind(internal_id, external_id)
+        return internal_id
+
+    def bind(self, internal_id, external_id):
+        external_id = external_id.strip().lower()
+        self._external[internal_id] = external_id
+        self._internal[external_id] = internal_id
+
+    def is_adopted(self, internal_id):
+        return internal_id in self._external
+
+    def adopted(self):
+        # The (internal, external) pairs that cannot be derived from the namespace.
+        return self._external.items()
+
+    def forget(self, internal_id):
+        external_id = self._external.pop(internal_id, None)
+        if external_id is not None:
+            del self._internal[external_id]
+
+    def __len__(self):
+        return len(self._external)
@@ -0,0 +1,105 @@
+from collections import deque
+from contextlib import contextmanager
+
+# Rough footprints used to weigh entries: one (undo, redo) pair of call tuples, and one
+# task kept alive by an entry holding on to a removed subtree (see benchmarks/bench_memory.py).
+OPERATION_BYTES = 256
+TASK_BYTES = 400
+
+
+class Journal:
+    # Undo/redo history. Every entry is a transaction: a list of (undo, redo) pairs where
+    # each side is a (method name, *args) call on the Nest that reverses or replays one
+    # primitive change. History is trimmed from the oldest end once either cap is hit.
+    def __init__(self, max_transactions=500, max_bytes=32 * 2**20):
+        self.max_transactions = max_transactions
+        self.max_bytes = max_bytes
+        self._undo = deque()
+        self._redo = deque()
+        self._bytes = 0
+        self._open = None
+        self._held = 0
+        self._depth = 0
+        self._paused = 0
+
+    def __len__(self):
+        return len(self._undo)
+
+    @property
+    def size(self):
+        return self._bytes
+
+    def can_undo(self):
+        return bool(self._undo)
+
+    def can_redo(self):
+        return bool(self._redo)
+
+    def clear(self):
+        self._undo.clear()
+        self._redo.clear()
+        self._bytes = 0
+
+    @contextmanager
+    def transaction(self):
+        self._depth += 1
+        if self._depth == 1:
+            self._open = []
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            if self._depth == 0:
+                operations, self._open = self._open, None
+                held, self._held = self._held, 0
+                if operations:
+                    self._push(operations, held)
+
+    @contextmanager
+    def paused(self):
+        self._paused += 1
+        try:
+            yield
+        finally:
+            self._paused -= 1
+
+    def record(self, undo, redo, held=0):
+        # held is the number of tasks only this entry keeps alive, i.e. removed ones.
+        if self._paused:
+            return
+        if self._open is not None:
+            self._open.append((undo, redo))
+            self._held += held
+        else:
+            self._push([(undo, redo)], held)
+
+    def _push(self, operations, held):
+        for _, size in self._redo:
+            self._bytes -= size
+        self._redo.clear()
+
+        size = _weigh(operations, held)
+        self._undo.append((operations, size))
+        self._bytes += size
+        while self._undo and (len(self._undo) > self.max_transactions
+                              or self._bytes > self.max_bytes):
+            _, dropped = self._undo.popleft()
+            self._bytes -= dropped
+
+    def pop_undo(self):
+        if not self._undo:
+            return None
+        entry = self._undo.pop()
+        self._redo.append(entry)
+        return entry[0]
+
+    def pop_redo(self):
+        if not self._redo:
+            return None
+        entry = self._redo.pop()
+        self._undo.append(entry)
+        return entry[0]
+
+
+def _weigh(operations, held):
+    return len(operations) * OPERATION_BYTES + held * TASK_BYTES
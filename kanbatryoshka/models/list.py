@@ -1,17 +1,131 @@
-from datetime import datetime
-import uuid
+import sys
+from .ids import new_id
+from itertools import islice
+from . import ordering
+from .timestamps import now, to_datetime, to_epoch, LazyTimestamp
+from .snapshot import thaw
+
+TODO_TITLE = sys.intern("To Do")
+IN_PROGRESS_TITLE = sys.intern("In Progress")
+DONE_TITLE = sys.intern("Done")
 
 class List:
+    __slots__ = ('id', '_title', '_created', 'tasks', 'owner', 'rank', '_frozen')
+
+    # Epoch seconds, or the ISO string of a JSON file until first read.
+    _created_at = LazyTimestamp('_created')
+
     def __init__(self, title):
-        self.id = str(uuid.uuid4())
+        self._frozen = None
+        self.id = new_id()
         self.title = title
-        self.created_at = datetime.now()
+        self._created = now()
         self.tasks = []
+        self.owner = None
+        self.rank = 0
+
+    @property
+    def title(self):
+        return self._title
+
+    @title.setter
+    def title(self, value):
+        # List titles repeat across every nested board, keep a single copy of each.
+        self._title = sys.intern(value) if type(value) is str else value
+        thaw(self)
+
+    @property
+    def created_at(self):
+        return to_datetime(self._created_at)
+
+    @created_at.setter
+    def created_at(self, value):
+        self._created_at = to_epoch(value)
+        thaw(self)
     
-    def add_task(self, task):
-        self.tasks.append(task)
+    def add_task(self, task, index=None):
+        ordering.insert(self.tasks, task, index)
+        task.owner = self
+        thaw(self)
+        if task._board is not None:
+            task._board.invalidate_path()
+        if self.owner is not None:
+            self.owner.count_tasks(1, 1 + task.subtask_count())
         return task
     
     def remove_task(self, task_id):
-        self.tasks = [t for t in self.tasks if t.id != task_id]
-        return True
\ No newline at end of file
+        for task in self.tasks:
+            if task.id == task_id:
+                self.detach_task(task)
+                break
+        return True
+
+    def detach_task(self, task):
+        if not ordering.remove(self.tasks, task):
+            return False
+
+        task.owner = None
+        thaw(self)
+        if task._board is not None:
+            task._board.invalidate_path()
+        if self.owner is not None:
+            self.owner.count_tasks(-1, -1 - task.subtask_count())
+        return True
+
+    def add_tasks(self, tasks):
+        ordering.extend(self.tasks, tasks)
+        thaw(self)
+        subtasks = 0
+        for task in tasks:
+            task.owner = self
+            if task._board is not None:
+                task._board.invalidate_path()
+                subtasks += task.subtask_count()
+        if self.owner is not None and tasks:
+            self.owner.count_tasks(len(tasks), len(tasks) + subtasks)
+        return tasks
+
+    def insert_tasks(self, placed):
+        # placed holds (index, task) pairs sorted by index, each index being the task's
+        # position once every pair is in.
+        merged = []
+        remaining = iter(self.tasks)
+        for index, task in placed:
+            merged.extend(islice(remaining, max(index - len(merged), 0)))
+            merged.append(task)
+        merged.extend(remaining)
+        self.tasks = merged
+        ordering.rebalance(merged)
+        thaw(self)
+
+        tasks = [task for _, task in placed]
+        subtasks = 0
+        for task in tasks:
+            task.owner = self
+            if task._board is not None:
+                task._board.invalidate_path()
+                subtasks += task.subtask_count()
+        if self.owner is not None and tasks:
+            self.owner.count_tasks(len(tasks), len(tasks) + subtasks)
+        return tasks
+
+    def detach_tasks(self, tasks):
+        detached = {id(task): task for task in tasks if task.owner is self}
+        if not detached:
+            return 0
+
+        self.tasks = [t for t in self.tasks if id(t) not in detached]
+        thaw(self)
+        subtasks = 0
+        for task in detached.values():
+            task.owner = None
+            if task._board is not None:
+                task._board.invalidate_path()
+                subtasks += task.subtask_count()
+        if self.owner is not None:
+            self.owner.count_tasks(-len(detached), -len(detached) - subtasks)
+        return len(detached)
+
+    def move_task(self, task, new_index):
+        thaw(self)
+        return ordering.move(self.tasks, task, new_index)
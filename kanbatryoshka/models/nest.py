@@ -1,50 +1,391 @@
-from .board import Board
+from .board import Board, DEFAULT_LIST_TITLES
 from .list import List
 from .task import Task
+from . import ordering
+from .search import SearchIndex, SearchHit
+from .query import All, MaxDepth, Under, QueryResult, INDEX_FACTORIES
+from .journal import Journal
+from .events import EventBus
+from .snapshot import Snapshot, freeze, thaw
+from .ids import IdMap, next_free, reserve
+from ..storage.atomic import atomic_write
+from ..storage.wal import WriteAheadLog, replay_log
+from ..storage.sqlite import SqliteStore, UNLOADED, is_database
+from ..storage.jsonstream import JsonReader, OutOfOrder
+from ..storage.binary import BinaryReader, is_binary
+from ..storage.fragments import FragmentCache, write_snapshot, untouched
+from ..storage.autosave import SaveJob
+from ..storage.compression import compressed, decompressed, strip_suffix, codec_of
+import gc
 import json
-from datetime import datetime
+import os
+import uuid
+from collections import deque
+from contextlib import contextmanager, nullcontext
 
 class Nest:
-    def __init__(self):
-        self.boards = []
+    # Share of indexed tasks no longer reachable from a root board above which
+    # save_to_file compacts first.
+    COMPACT_THRESHOLD = 0.2
+
+    def __init__(self, undo_limit=500, undo_bytes=32 * 2**20):
         self.current_board = None
         self.navigation_stack = []
         self.current_list_id = None
         self.current_task_id = None
 
+        self._boards_by_id = {}
+        self._roots = {}
+        self._lists_by_id = {}
+        self._tasks_by_id = {}
+        self._list_board = {}
+        self._task_list = {}
+
+        self._listeners = []
+
+        # Secondary indexes fed by every mutation: the search index once search() has
+        # been used, and the query indexes requested through create_index().
+        self._indexes = []
+        self._search = None
+        self._query_indexes = {}
+
+        self._journal = Journal(undo_limit, undo_bytes)
+        self._events = EventBus()
+
+        # Internal integer ids <-> the UUIDs shown in files, the CLI and drag and drop.
+        self._ids = IdMap()
+
+        # Write-ahead log of the file being edited, see open_log(), or the database it
+        # lives in, see open_database(). Either one receives every change.
+        self._log = None
+        self._log_base = 0
+        self._store = None
+        # The (file, checkpoint) open_log() loaded, whose log starts with the first change,
+        # and whether that file is JSON, which rewriting it in place keeps.
+        self._pending_log = None
+        self._file_json = None
+
+        # Whether anything changed since the last save, and the save being written in
+        # the background, see begin_save().
+        self._dirty = False
+        self._saving = None
+        # The boards encoded by the last save, reused by the next one while unchanged.
+        self._fragments = FragmentCache()
+
+        # Untouched nested boards a file left out, by board id and by task id, until
+        # something reaches them, see _rebuild_board().
+        self._sparse_boards = {}
+        self._sparse_tasks = {}
+
     def create_board(self, title, description="", parent_board_id=None, parent_task_id=None):
         board = Board(title, description)
         board.parent_board_id = parent_board_id
         board.parent_task_id  = parent_task_id
-        self.boards.append(board)
+        return self.add_board(board)
+
+    def add_board(self, board):
+        self._attach_board(board)
+        self._notify("board_created", board_id=board.id)
         return board
 
-    
+    @property
+    def boards(self):
+        # A live view of the board index, in creation order: reading it costs nothing,
+        # but it cannot be indexed nor kept across changes to the nest.
+        return self._boards_by_id.values()
+
+#region Listeners
+
+    def add_listener(self, callback):
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _notify(self, kind, **details):
+        for callback in list(self._listeners):
+            callback(kind, details)
+
+    # add_listener() gets one coarse notification per public call. subscribe() gets the
+    # ChangeEvents published by every primitive change, with ids and positions, including
+    # those replayed by undo() and redo(); see models/events.py.
+
+    def subscribe(self, callback, board_id=None):
+        self._events.subscribe(callback, board_id)
+
+    def unsubscribe(self, callback, board_id=None):
+        self._events.unsubscribe(callback, board_id)
+
+    def _publish_board_changed(self, board):
+        # Task counts and derived titles of a nested board also show on its owner task, so
+        # the event is routed to the parent board too.
+        if board.task is None or not self._events.active:
+            return
+        parent = board.parent_board()
+        self._events.publish('board_changed', board.id, title=board.title,
+                             task_count=board.task_count, task_id=board.task.id,
+                             parent_board_id=parent.id if parent else None)
+
+    def _publish_boards(self, kind, tasks):
+        if not self._events.active:
+            return
+        for task in tasks:
+            nested = task.get_nested_board(create=False)
+            if nested is None:
+                continue
+            for item in self._iter_subtree(nested):
+                if isinstance(item, Board):
+                    self._events.publish(kind, item.id)
+
+#endregion Listeners
+
+#region Index
+
+    def _index_board(self, board):
+        self._boards_by_id[board.id] = board
+        if board.task is None:
+            self._roots[board.id] = board
+        for index in self._indexes:
+            index.add_board(board)
+        for list_obj in board.lists:
+            self._index_list(list_obj, board)
+
+    def _index_list(self, list_obj, board):
+        self._lists_by_id[list_obj.id] = list_obj
+        self._list_board[list_obj.id] = board
+        for index in self._indexes:
+            index.add_list(list_obj)
+        for task in list_obj.tasks:
+            self._index_task(task, list_obj)
+
+    def _index_task(self, task, list_obj):
+        self._tasks_by_id[task.id] = task
+        self._task_list[task.id] = list_obj
+        for index in self._indexes:
+            index.add_task(task)
+
+    def _index_nested(self, tasks):
+        for task in tasks:
+            nested = task.get_nested_board(create=False)
+            if nested is not None:
+                self._index_subtree(nested)
+
+    def _index_subtree(self, board):
+        for item in self._iter_subtree(board):
+            if isinstance(item, Board):
+                self._boards_by_id[item.id] = item
+                if item.task is None:
+                    self._roots[item.id] = item
+                for index in self._indexes:
+                    index.add_board(item)
+            elif isinstance(item, List):
+                self._lists_by_id[item.id] = item
+                self._list_board[item.id] = item.owner
+                for index in self._indexes:
+                    index.add_list(item)
+            else:
+                self._index_task(item, item.owner)
+
+    def _unindex_list(self, list_obj):
+        self._lists_by_id.pop(list_obj.id, None)
+        self._list_board.pop(list_obj.id, None)
+        for index in self._indexes:
+            index.remove(list_obj)
+        for task in list_obj.tasks:
+            self._unindex_task(task)
+
+    def _unindex_task(self, task):
+        self._tasks_by_id.pop(task.id, None)
+        self._task_list.pop(task.id, None)
+        for index in self._indexes:
+            index.remove(task)
+
+        # Whatever hangs below the task goes with it.
+        nested = task.get_nested_board(create=False)
+        if nested is not None:
+            self._unindex_subtree(nested)
+
+    def _unindex_subtree(self, board):
+        removed = []
+        for item in self._iter_subtree(board):
+            if isinstance(item, Board):
+                self._boards_by_id.pop(item.id, None)
+                self._roots.pop(item.id, None)
+            elif isinstance(item, List):
+                self._lists_by_id.pop(item.id, None)
+                self._list_board.pop(item.id, None)
+            else:
+                self._tasks_by_id.pop(item.id, None)
+                self._task_list.pop(item.id, None)
+            removed.append(item)
+
+        for index in self._indexes:
+            for item in removed:
+                index.remove(item)
+        return removed
+
+    def _reindex(self, item):
+        for index in self._indexes:
+            index.update(item)
+
+    def _clear_index(self):
+        self._boards_by_id.clear()
+        self._roots.clear()
+        self._lists_by_id.clear()
+        self._tasks_by_id.clear()
+        self._list_board.clear()
+        self._task_list.clear()
+        self._indexes = []
+        self._search = None
+        self._query_indexes = {}
+
+    def _get_current_list(self, list_id):
+        if not self.current_board:
+            return None
+        if self._list_board.get(list_id) is not self.current_board:
+            return None
+        return self._lists_by_id[list_id]
+
+    def _get_task_in_list(self, list_obj, task_id):
+        if self._task_list.get(task_id) is list_obj:
+            return self._tasks_by_id[task_id]
+
+        # Tasks appended straight onto a List bypass the Nest, index them on first sight.
+        for task in list_obj.tasks:
+            if task.id == task_id:
+                self._index_task(task, list_obj)
+                return task
+        return None
+
+    def _get_current_task(self, task_id):
+        if not self.current_board:
+            return None
+
+        list_obj = self._task_list.get(task_id)
+        if list_obj is not None:
+            if self._list_board.get(list_obj.id) is not self.current_board:
+                return None
+            return self._tasks_by_id[task_id]
+
+        for list_obj in self.current_board.lists:
+            task = self._get_task_in_list(list_obj, task_id)
+            if task:
+                return task
+        return None
+
+    def _ensure_task_board(self, task):
+        if task._board is None and task.id in self._sparse_tasks:
+            self._rebuild_board(task)
+        board = task.board
+        if board.id not in self._boards_by_id:
+            self._index_board(board)
+            self._log_task_board(task, board)
+        return self._reach(board)
+
+    def _log_task_board(self, task, board):
+        # Not a change to undo, but the log must know the ids of the new board.
+        log = self._active_log()
+        if log is not None:
+            log.append(('_attach_task_board', task, board))
+
+    def _attach_task_board(self, task, board):
+        board_id = self._sparse_tasks.pop(task.id, None)
+        if board_id is not None:
+            del self._sparse_boards[board_id]
+        task.board = board
+        self._index_board(board)
+
+    def _get_item(self, item_id):
+        for items in (self._boards_by_id, self._lists_by_id, self._tasks_by_id):
+            item = items.get(item_id)
+            if item is not None:
+                return item
+        if self._rebuild_holding(item_id):
+            return self._get_item(item_id)
+        return None
+
+    def _rebuild_board(self, task):
+        # Files leave out nested boards that still are as Task.board made them (see
+        # storage/fragments.py), keeping only their id: the board is built again with
+        # that id and the ids that followed it for its lists.
+        board_id = self._sparse_tasks.pop(task.id)
+        del self._sparse_boards[board_id]
+        board = Board(None, None)
+        board.id = board_id
+        for i, list_obj in enumerate(board.lists, 1):
+            list_obj.id = board_id + i
+        board.parent_board_id = task.parent_board_id
+        task.board = board
+        self._index_board(board)
+        self._log_task_board(task, board)
+        return board
+
+    def _rebuild_holding(self, item_id):
+        # Rebuilds the left out board with id item_id, or holding the list with that id.
+        if not self._sparse_boards or type(item_id) is not int:
+            return False
+        for board_id in range(item_id, item_id - len(DEFAULT_LIST_TITLES) - 1, -1):
+            task = self._tasks_by_id.get(self._sparse_boards.get(board_id))
+            if task is not None:
+                self._rebuild_board(task)
+                return True
+        return False
+
+    def get_board_by_id(self, board_id):
+        board = self._boards_by_id.get(board_id)
+        if board is None and self._rebuild_holding(board_id):
+            board = self._boards_by_id.get(board_id)
+        return board
+
+    def get_list_by_id(self, list_id):
+        return self._lists_by_id.get(list_id)
+
+    def get_board_of_list(self, list_id):
+        return self._list_board.get(list_id)
+
+    def get_list_of_task(self, task_id):
+        return self._task_list.get(task_id)
+
+#endregion Index
+
+#region Ids
+
+    def external_id(self, item):
+        # item is a Board, List or Task, or its internal id.
+        return self._ids.external(getattr(item, 'id', item))
+
+    def internal_id(self, external_id):
+        return self._ids.internal(external_id)
+
+#endregion Ids
+
     def select_board(self, board_id):
-        b = next((b for b in self.boards if b.id == board_id), None)
+        b = self._boards_by_id.get(board_id)
         if not b: return False
-        self.current_board = b
+        self.current_board = self._reach(b)
         return True
     
     def get_current_board(self):
         return self.current_board
     
     def navigate_to_task_board(self, list_id, task_id):
-        if not self.current_board:
+        list_obj = self._get_current_list(list_id)
+        if not list_obj:
             return False
 
-        for l in self.current_board.lists:
-            if l.id == list_id:
-                for t in l.tasks:
-                    if t.id == task_id:
-                        self.navigation_stack.append(
-                            (self.current_board.id, list_id, task_id)
-                        )
-                        self.current_board = t.board
-                        self.current_list_id = None
-                        self.current_task_id = None
-                        return True
-        return False
+        task = self._get_task_in_list(list_obj, task_id)
+        if not task:
+            return False
+
+        nested = self._ensure_task_board(task)
+        self.navigation_stack.append(
+            (self.current_board.id, list_id, task_id)
+        )
+        self.current_board = nested
+        self.current_list_id = None
+        self.current_task_id = None
+        return True
     
     def back_to_parent(self):
         if not self.navigation_stack:
@@ -52,9 +393,7 @@ class Nest:
 
         parent_board_id, list_id, task_id = self.navigation_stack.pop()
 
-        self.current_board = next(
-            (b for b in self.boards if b.id == parent_board_id), None
-        )
+        self.current_board = self._reach(self._boards_by_id.get(parent_board_id))
 
         self.current_list_id = list_id
         self.current_task_id = task_id
@@ -66,252 +405,1207 @@ class Nest:
             return None
         
         list_obj = List(title)
-        self.current_board.add_list(list_obj)
+        self._attach_list(list_obj, self.current_board)
+        self._notify("list_added", board_id=self.current_board.id, list_id=list_obj.id)
         return list_obj
     
     def remove_list_from_current_board(self, list_id):
-        if not self.current_board:
+        list_obj = self._get_current_list(list_id)
+        if not list_obj:
             return False
         
-        return self.current_board.remove_list(list_id)
+        with self.transaction():
+            self._detach_list(list_obj)
+        self._notify("list_removed", board_id=self.current_board.id, list_id=list_id)
+        return True
     
     def add_task_to_list(self, list_id, title, description=""):
-        if not self.current_board:
+        list_obj = self._get_current_list(list_id)
+        if not list_obj:
             return None
 
-        for list_obj in self.current_board.lists:
-            if list_obj.id == list_id:
-                task = Task(title, description, parent_board_id=self.current_board.id)
-                nested = self.create_board(f"Board: {title}",
-                                        f"Board pour la tâche: {description}",
-                                        parent_board_id=self.current_board.id,
-                                        parent_task_id=task.id)
-                task.board = nested
-
-                list_obj.add_task(task)
-                return task
-        return None
-        
-    def move_task_between_lists(self, task_id, source_list_id, target_list_id):
-        if not self.current_board:
-            return False
+        task = Task(title, description, parent_board_id=self.current_board.id)
+        self._attach_task(task, list_obj)
+        self._notify("task_added", list_id=list_id, task_id=task.id)
+        return task
         
-        source_list = None
-        target_list = None
-
-        for list_obj in self.current_board.lists:
-            if list_obj.id == source_list_id:
-                source_list = list_obj
-            elif list_obj.id == target_list_id:
-                target_list = list_obj
+    def move_task_between_lists(self, task_id, source_list_id, target_list_id, new_index=None):
+        source_list = self._get_current_list(source_list_id)
+        target_list = self._get_current_list(target_list_id)
 
-        if not source_list or not target_list:
+        if not source_list or not target_list or source_list is target_list:
             return False
         
-        task_to_move = None
-        for task in source_list.tasks:
-            if task.id == task_id:
-                task_to_move = task
-                break
-
+        task_to_move = self._get_task_in_list(source_list, task_id)
         if not task_to_move:
             return False
         
-        source_list.remove_task(task_id)
-        target_list.add_task(task_to_move)
+        with self.transaction():
+            self._place_task(task_to_move, target_list, new_index)
+        self._notify("task_moved", task_id=task_id, source_list_id=source_list_id,
+                     target_list_id=target_list_id)
 
         return True
     
     def get_task_by_id(self, task_id):
+        task = self._tasks_by_id.get(task_id)
+        if task:
+            return task
+
         task = self._find_task_in_board(self.current_board, task_id)
         if task:
             return task
         
-        for board in self.boards.values():
-            task = self._find_task_in_board(board, task_id)
-            if task:
-                return task
-                
-        return None
+        return next((t for _, _, _, t in self.walk() if t.id == task_id), None)
 
     def _find_task_in_board(self, board, task_id):
         if not board:
             return None
-            
-        for list_obj in board.lists:
-            for task in list_obj.tasks:
-                if task.id == task_id:
-                    return task
-                    
-                if hasattr(task, 'board') and task.board:
-                    nested_task = self._find_task_in_board(task.board, task_id)
-                    if nested_task:
-                        return nested_task
-                        
-        return None
+
+        return next((t for _, _, _, t in self.walk(board) if t.id == task_id), None)
+
+#region Walk
+
+    def root_boards(self):
+        return [b for b in self._roots.values() if b.task is None]
+
+    def walk(self, start_board=None, order="dfs", max_depth=None, prune=None):
+        # Yields (depth, board, list, task) for every task under start_board, or under
+        # every root board when start_board is None. prune(depth, board, list, task)
+        # returning True skips that task's nested board.
+        if order not in ("dfs", "bfs"):
+            raise ValueError(f"Unknown walk order: {order}")
+
+        roots = [start_board] if start_board is not None else self.root_boards()
+        if order == "dfs":
+            return self._walk_dfs(roots, max_depth, prune)
+        return self._walk_bfs(roots, max_depth, prune)
+
+    def _walk_dfs(self, roots, max_depth, prune):
+        stack = [(0, board, _board_tasks(board)) for board in reversed(roots)]
+        while stack:
+            depth, board, tasks = stack[-1]
+            entry = next(tasks, None)
+            if entry is None:
+                stack.pop()
+                continue
+
+            list_obj, task = entry
+            yield depth, board, list_obj, task
+
+            nested = task.get_nested_board(create=False)
+            if nested is None or not nested.lists:
+                continue
+            if max_depth is not None and depth >= max_depth:
+                continue
+            if prune is not None and prune(depth, board, list_obj, task):
+                continue
+            stack.append((depth + 1, nested, _board_tasks(nested)))
+
+    def _walk_bfs(self, roots, max_depth, prune):
+        queue = deque((0, board) for board in roots)
+        while queue:
+            depth, board = queue.popleft()
+            for list_obj, task in _board_tasks(board):
+                yield depth, board, list_obj, task
+
+                nested = task.get_nested_board(create=False)
+                if nested is None or not nested.lists:
+                    continue
+                if max_depth is not None and depth >= max_depth:
+                    continue
+                if prune is not None and prune(depth, board, list_obj, task):
+                    continue
+                queue.append((depth + 1, nested))
+
+    def _iter_subtree(self, board):
+        stack = [board]
+        while stack:
+            board = stack.pop()
+            yield board
+            for list_obj in board.lists:
+                yield list_obj
+                for task in list_obj.tasks:
+                    yield task
+                    nested = task.get_nested_board(create=False)
+                    if nested is not None:
+                        stack.append(nested)
+
+#endregion Walk
+
+#region Search
+
+    def search(self, query, limit=20):
+        if self._search is None:
+            self._build_search_index()
+
+        hits = []
+        for score, item in self._search.search(query, limit):
+            if isinstance(item, Board):
+                kind, board = "board", item
+            elif isinstance(item, List):
+                kind, board = "list", item.owner
+            else:
+                kind, board = "task", item.owner.owner
+            hits.append(SearchHit(kind, item, board, score, board.path()))
+        return hits
+
+    def _build_search_index(self):
+        self._search = self._attach_index(SearchIndex())
+
+    def _attach_index(self, index):
+        for root in self.root_boards():
+            for item in self._iter_subtree(root):
+                if isinstance(item, Board):
+                    index.add_board(item)
+                elif isinstance(item, List):
+                    index.add_list(item)
+                else:
+                    index.add_task(item)
+        self._indexes.append(index)
+        return index
+
+    def open_board(self, board_id):
+        board = self.get_board_by_id(board_id)
+        if not board:
+            return False
+        self._reach(board)
+
+        stack = []
+        child = board
+        parent = child.parent_board()
+        while parent is not None:
+            stack.append((parent.id, child.task.owner.id, child.task.id))
+            child = parent
+            parent = child.parent_board()
+        stack.reverse()
+
+        self.navigation_stack = stack
+        self.current_board = board
+        self.current_list_id = None
+        self.current_task_id = None
+        return True
+
+#endregion Search
+
+#region Query
+
+    def create_index(self, name):
+        if name not in INDEX_FACTORIES:
+            raise ValueError(f"Unknown index: {name}")
+        if name not in self._query_indexes:
+            self._query_indexes[name] = self._attach_index(INDEX_FACTORIES[name]())
+        return True
+
+    def drop_index(self, name):
+        index = self._query_indexes.pop(name, None)
+        if index is None:
+            return False
+        self._indexes.remove(index)
+        return True
+
+    def query(self, *predicates):
+        predicate = All(*predicates)
+
+        start = None
+        for p in predicate.predicates:
+            if isinstance(p, Under):
+                start = self._boards_by_id.get(p.board_id)
+                if start is None:
+                    return QueryResult([], f"unknown board {p.board_id}")
+                break
+
+        base_depth = len(start.path()) - 1 if start else 0
+        max_depth = min((p.depth for p in predicate.predicates if isinstance(p, MaxDepth)),
+                        default=None)
+        if max_depth is not None and max_depth < base_depth:
+            return QueryResult([], f"empty: {predicate!r}")
+
+        # The board counters tell how many tasks a walk would visit; an index is only
+        # used when it offers fewer candidates than that.
+        roots = [start] if start else self.root_boards()
+        walk_cost = sum(root.total_task_count for root in roots)
+
+        chosen = None
+        for p in predicate.predicates:
+            candidates = p.candidates(self._query_indexes)
+            if candidates is None:
+                continue
+            size = len(candidates)
+            if size <= walk_cost and (chosen is None or size < chosen[2]):
+                chosen = (p, candidates, size)
+
+        tasks = []
+        if chosen is not None:
+            p, candidates, size = chosen
+            for task in candidates:
+                list_obj = task.owner
+                board = list_obj.owner
+                if predicate.matches(len(board.path()) - 1, board, list_obj, task):
+                    tasks.append(task)
+            plan = f"index {p.index_name} [{p!r}] ({size} candidates), filter: {predicate!r}"
+        else:
+            walk_depth = None if max_depth is None else max_depth - base_depth
+            for depth, board, list_obj, task in self.walk(start, max_depth=walk_depth):
+                if predicate.matches(depth + base_depth, board, list_obj, task):
+                    tasks.append(task)
+            origin = f"board {start.id}" if start else "root boards"
+            limit = "" if walk_depth is None else f", max depth {max_depth}"
+            plan = f"walk from {origin} (~{walk_cost} tasks{limit}), filter: {predicate!r}"
+
+        return QueryResult(tasks, plan)
+
+#endregion Query
 
     def task_has_subtasks(self, task_id):
         task = self.get_task_by_id(task_id)
-        if not task or not hasattr(task, 'board') or not task.board:
+        if not task:
             return False
         
-        for list_obj in task.board.lists:
-            if list_obj.tasks and len(list_obj.tasks) > 0:
-                return True
-        
-        return False
+        return task.has_subtasks()
+
+    def subtask_count(self, task_id):
+        task = self.get_task_by_id(task_id)
+        if not task:
+            return 0
+
+        return task.subtask_count()
         
     def get_board_path(self):
-        path = []
-        cur  = self.current_board
-        while cur:
-            path.insert(0, cur.title)
-            pid = getattr(cur, "parent_board_id", None)
-            cur = next((b for b in self.boards if b.id == pid), None)
-        return path
+        if not self.current_board:
+            return []
+        return list(self.current_board.path())
     
     def remove_task_from_list(self, list_id, task_id):
-        if not self.current_board:
+        list_obj = self._get_current_list(list_id)
+        if not list_obj:
             return False
         
-        for list_obj in self.current_board.lists:
-            if list_obj.id == list_id:
-                return list_obj.remove_task(task_id)
-            
-        return False
+        task = self._get_task_in_list(list_obj, task_id)
+        if task:
+            with self.transaction():
+                self._detach_task(task)
+            self._notify("task_removed", list_id=list_id, task_id=task_id)
+        return True
     
     def update_task(self, task_id, title = None, description = None):
-        if not self.current_board:
+        task = self._get_current_task(task_id)
+        if not task:
             return False
-    
-        for list_obj in self.current_board.lists:
-            for task in list_obj.tasks:
-                if task.id == task_id:
-                    task.update(title, description)
-                    return True
-        
-        return False
+
+        self._update_task(task, title, description)
+        self._notify("task_updated", task_id=task_id)
+        return True
     
     def rename_list(self, list_id, new_title):
-        if not self.current_board:
+        list_obj = self._get_current_list(list_id)
+        if not list_obj:
             return False
             
-        for list_obj in self.current_board.lists:
-            if list_obj.id == list_id:
-                list_obj.title = new_title
-                return True
-                
-        return False
+        self._rename_list(list_obj, new_title)
+        self._notify("list_renamed", list_id=list_id)
+        return True
 
     def reorder_task_in_list(self, list_id, task_id, new_index):
-        if not self.current_board:
-            return False
-        
-        target_list = None
-        for list_obj in self.current_board.lists:
-            if list_obj.id == list_id:
-                target_list = list_obj
-                break
-        
+        target_list = self._get_current_list(list_id)
         if not target_list:
             return False
         
-        task_to_move = None
-        task_index = -1
-        for i, task in enumerate(target_list.tasks):
-            if task.id == task_id:
-                task_to_move = task
-                task_index = i
-                break
-        
-        if task_index == -1 or not task_to_move:
+        task_to_move = self._get_task_in_list(target_list, task_id)
+        if not task_to_move:
             return False
         
-        if task_index == new_index:
-            return True
-        
-        target_list.tasks.pop(task_index)
-        
-        if new_index >= len(target_list.tasks):
-            target_list.tasks.append(task_to_move)
-        else:
-            target_list.tasks.insert(new_index, task_to_move)
-        
+        self._place_task(task_to_move, target_list, new_index)
+        self._notify("task_reordered", list_id=list_id, task_id=task_id)
         return True
 
     def move_list_in_current_board(self, list_id, new_position):
-        board = self.get_current_board()
-        if not board:
+        list_obj = self._get_current_list(list_id)
+        if not list_obj:
             return False
             
-        list_indices = {lst.id: i for i, lst in enumerate(board.lists)}
-        if list_id not in list_indices:
+        self._place_list(list_obj, new_position)
+        self._notify("list_moved", board_id=self.current_board.id, list_id=list_id)
+        return True
+
+#region Bulk
+
+    # The bulk operations accept any list or task known to the Nest, not only those of
+    # the current board. Every id is checked before anything is touched, the mutation is
+    # applied in one pass per list and a single notification is sent.
+
+    def add_tasks(self, list_id, items):
+        list_obj = self._lists_by_id.get(list_id)
+        if not list_obj:
+            return None
+
+        board = self._list_board[list_id]
+        tasks = []
+        for item in items:
+            if isinstance(item, str):
+                tasks.append(Task(item, parent_board_id=board.id))
+            else:
+                tasks.append(Task(*item, parent_board_id=board.id))
+
+        with self.transaction():
+            self._add_tasks(tasks, list_obj)
+        self._notify("tasks_added", list_id=list_id, task_ids=[t.id for t in tasks])
+        return tasks
+
+    def move_tasks(self, task_ids, target_list_id):
+        target_list = self._lists_by_id.get(target_list_id)
+        tasks = self._get_tasks(task_ids)
+        if not target_list or tasks is None:
             return False
-            
-        current_position = list_indices[list_id]
-        
-        if current_position == new_position:
+
+        target_board = self._list_board[target_list_id]
+        moving = {id(t) for t in tasks}
+        if any(id(t) in moving for t in _ancestor_tasks(target_board)):
+            return False
+
+        with self.transaction():
+            self._move_tasks(tasks, target_list)
+        self._notify("tasks_moved", task_ids=[t.id for t in tasks], target_list_id=target_list_id)
+        return True
+
+    def remove_tasks(self, task_ids):
+        tasks = self._get_tasks(task_ids)
+        if tasks is None:
+            return False
+
+        # Tasks below another removed task go with its subtree.
+        removing = {id(t) for t in tasks}
+        outermost = []
+        for task in tasks:
+            board = self._list_board[self._task_list[task.id].id]
+            if not any(id(a) in removing for a in _ancestor_tasks(board)):
+                outermost.append(task)
+        with self.transaction():
+            self._remove_tasks(outermost)
+            self._leave_removed_boards()
+        self._notify("tasks_removed", task_ids=[t.id for t in tasks])
+        return True
+
+    def update_tasks(self, changes):
+        tasks = self._get_tasks(changes)
+        if tasks is None:
+            return False
+
+        with self.transaction():
+            for task in tasks:
+                fields = changes[task.id]
+                self._update_task(task, fields.get('title'), fields.get('description'))
+        self._notify("tasks_updated", task_ids=[t.id for t in tasks])
+        return True
+
+    def _get_tasks(self, task_ids):
+        tasks = []
+        seen = set()
+        for task_id in task_ids:
+            task = self._tasks_by_id.get(task_id)
+            if task is None:
+                return None
+            if task_id not in seen:
+                seen.add(task_id)
+                tasks.append(task)
+        return tasks
+
+    def _detach_grouped(self, tasks):
+        # Returns where every task stood, as _insert_grouped expects it. Detaching already
+        # rebuilds each list, so reading the positions in the same pass costs nothing more.
+        by_list = {}
+        for task in tasks:
+            list_obj = self._task_list[task.id]
+            entry = by_list.get(id(list_obj))
+            if entry is None:
+                entry = by_list[id(list_obj)] = (list_obj, set())
+            entry[1].add(id(task))
+
+        groups = []
+        for list_obj, wanted in by_list.values():
+            placed = [(i, task) for i, task in enumerate(list_obj.tasks) if id(task) in wanted]
+            list_obj.detach_tasks([task for _, task in placed])
+            groups.append((list_obj, placed))
+        return groups
+
+    def _insert_grouped(self, groups):
+        for list_obj, placed in groups:
+            list_obj.insert_tasks(placed)
+            board = self._list_board[list_obj.id]
+            for _, task in placed:
+                _set_parent_board(task, board)
+                self._task_list[task.id] = list_obj
+
+#endregion Bulk
+
+#region Subtrees
+
+    # Whole-subtree operations on any task known to the Nest. They run iteratively, in
+    # time linear in the size of the subtree plus O(depth) to fix the counters above it.
+
+    def move_task(self, task_id, target_list_id, new_index=None):
+        task = self._tasks_by_id.get(task_id)
+        target_list = self._lists_by_id.get(target_list_id)
+        if not task or not target_list:
+            return False
+
+        target_board = self._list_board[target_list_id]
+        if any(t is task for t in _ancestor_tasks(target_board)):
+            return False
+
+        source_list = self._task_list[task_id]
+        with self.transaction():
+            self._place_task(task, target_list, new_index)
+        self._notify("task_moved", task_id=task_id, source_list_id=source_list.id,
+                     target_list_id=target_list_id)
+        return True
+
+    def clone_task(self, task_id, target_list_id=None, new_index=None):
+        task = self._tasks_by_id.get(task_id)
+        if not task:
+            return None
+
+        if target_list_id is None:
+            target_list = self._task_list[task_id]
+            if new_index is None:
+                new_index = ordering.index_of(target_list.tasks, task) + 1
+        else:
+            target_list = self._lists_by_id.get(target_list_id)
+            if not target_list:
+                return None
+
+        clone = _clone_subtree(task)
+        with self.transaction():
+            self._attach_task(clone, target_list, new_index)
+        self._notify("task_added", list_id=target_list.id, task_id=clone.id)
+        return clone
+
+    def delete_task(self, task_id):
+        task = self._tasks_by_id.get(task_id)
+        if not task:
+            return False
+
+        list_obj = self._task_list[task_id]
+        with self.transaction():
+            self._detach_task(task)
+            self._leave_removed_boards()
+        self._notify("task_removed", list_id=list_obj.id, task_id=task_id)
+        return True
+
+    def _leave_removed_boards(self):
+        if self.current_board is None or self.current_board.id in self._boards_by_id:
+            return
+
+        self.current_board = None
+        while self.current_board is None and self.navigation_stack:
+            board_id, list_id, task_id = self.navigation_stack.pop()
+            self.current_board = self._boards_by_id.get(board_id)
+            self.current_list_id = list_id
+            self.current_task_id = task_id
+
+#endregion Subtrees
+
+#region Journal
+
+    # Every mutator above goes through the primitives below. Each primitive records the
+    # call that reverts it next to the call that replays it, so undo() and redo() cost as
+    # much as the change itself. A public mutator is one transaction; transaction() groups
+    # several of them into one undo step.
+
+    @contextmanager
+    def transaction(self):
+        log = self._active_log()
+        log = log.transaction() if log is not None else nullcontext()
+        with self._journal.transaction(), self._events.batch(), log:
+            yield
+
+    def can_undo(self):
+        return self._journal.can_undo()
+
+    def can_redo(self):
+        return self._journal.can_redo()
+
+    def undo(self):
+        operations = self._journal.pop_undo()
+        if operations is None:
+            return False
+        self._replay(undo for undo, _ in reversed(operations))
+        self._notify("undone", steps=len(operations))
+        return True
+
+    def redo(self):
+        operations = self._journal.pop_redo()
+        if operations is None:
+            return False
+        self._replay(redo for _, redo in operations)
+        self._notify("redone", steps=len(operations))
+        return True
+
+    def _replay(self, calls):
+        with self._journal.paused(), self.transaction():
+            for name, *args in calls:
+                getattr(self, name)(*args)
+            self._leave_removed_boards()
+
+    def _rerank(self, items, ranks):
+        # Gives items the ranks a log recorded, see storage/wal.py. Not a change of its own.
+        for item, rank in zip(items, ranks):
+            item.rank = rank
+            thaw(item.owner)
+
+    def _record(self, undo, redo, held=0):
+        self._journal.record(undo, redo, held)
+        self._dirty = True
+        log = self._active_log()
+        if log is not None:
+            log.append(redo)
+
+    def _attach_board(self, board):
+        self._index_subtree(board)
+        self._record(('_detach_board', board), ('_attach_board', board))
+        self._events.publish('board_added', board.id)
+
+    def _detach_board(self, board):
+        removed = self._unindex_subtree(board)
+        self._record(('_attach_board', board), ('_detach_board', board),
+                     board.total_task_count)
+        for item in removed:
+            if isinstance(item, Board):
+                self._events.publish('board_removed', item.id)
+
+    def _attach_list(self, list_obj, board, index=None):
+        board.add_list(list_obj, index)
+        self._index_list(list_obj, board)
+        self._index_nested(list_obj.tasks)
+        index = ordering.inserted_at(board.lists, index)
+        self._record(('_detach_list', list_obj), ('_attach_list', list_obj, board, index))
+        self._events.publish('list_added', board.id, list_id=list_obj.id, index=index)
+        self._publish_boards('board_added', list_obj.tasks)
+        if list_obj.tasks:
+            self._publish_board_changed(board)
+
+    def _detach_list(self, list_obj):
+        board = self._list_board[list_obj.id]
+        index = ordering.index_of(board.lists, list_obj)
+        self._unindex_list(list_obj)
+        board.detach_list(list_obj)
+        self._record(('_attach_list', list_obj, board, index), ('_detach_list', list_obj),
+                     sum(1 + task.subtask_count() for task in list_obj.tasks))
+        self._events.publish('list_removed', board.id, list_id=list_obj.id, index=index)
+        self._publish_boards('board_removed', list_obj.tasks)
+        if list_obj.tasks:
+            self._publish_board_changed(board)
+
+    def _place_list(self, list_obj, index):
+        board = self._list_board[list_obj.id]
+        old_index = ordering.index_of(board.lists, list_obj)
+        board.move_list(list_obj, index)
+        index = ordering.index_of(board.lists, list_obj)
+        self._record(('_place_list', list_obj, old_index), ('_place_list', list_obj, index))
+        self._events.publish('list_moved', board.id, list_id=list_obj.id, old_index=old_index,
+                             index=index)
+
+    def _rename_list(self, list_obj, title):
+        old_title = list_obj.title
+        list_obj.title = title
+        self._reindex(list_obj)
+        self._record(('_rename_list', list_obj, old_title),
+                     ('_rename_list', list_obj, title))
+        self._events.publish('list_renamed', self._list_board[list_obj.id].id,
+                             list_id=list_obj.id, title=list_obj.title)
+
+    def _attach_task(self, task, list_obj, index=None):
+        board = self._list_board[list_obj.id]
+        list_obj.add_task(task, index)
+        _set_parent_board(task, board)
+        self._index_task(task, list_obj)
+        self._index_nested((task,))
+        index = ordering.inserted_at(list_obj.tasks, index)
+        self._record(('_detach_task', task), ('_attach_task', task, list_obj, index))
+        self._events.publish('task_added', board.id, list_id=list_obj.id, task_id=task.id,
+                             index=index)
+        self._publish_boards('board_added', (task,))
+        self._publish_board_changed(board)
+
+    def _detach_task(self, task):
+        list_obj = self._task_list[task.id]
+        board = self._list_board[list_obj.id]
+        index = ordering.index_of(list_obj.tasks, task)
+        self._publish_boards('board_removed', (task,))
+        list_obj.detach_task(task)
+        self._unindex_task(task)
+        self._record(('_attach_task', task, list_obj, index), ('_detach_task', task),
+                     1 + task.subtask_count())
+        self._events.publish('task_removed', board.id, list_id=list_obj.id, task_id=task.id,
+                             index=index)
+        self._publish_board_changed(board)
+
+    def _place_task(self, task, list_obj, index=None):
+        source = self._task_list[task.id]
+        source_board = self._list_board[source.id]
+        board = self._list_board[list_obj.id]
+        old_index = ordering.index_of(source.tasks, task)
+        if source is list_obj:
+            list_obj.move_task(task, index)
+        else:
+            source.detach_task(task)
+            list_obj.add_task(task, index)
+            _set_parent_board(task, board)
+            self._task_list[task.id] = list_obj
+        index = ordering.index_of(list_obj.tasks, task)
+        self._record(('_place_task', task, source, old_index),
+                     ('_place_task', task, list_obj, index))
+        self._events.publish('task_moved', board.id, list_id=list_obj.id, task_id=task.id,
+                             index=index, source_board_id=source_board.id,
+                             source_list_id=source.id, old_index=old_index)
+        if source_board is not board:
+            self._publish_board_changed(source_board)
+            self._publish_board_changed(board)
+
+    def _update_task(self, task, title, description, updated_at=None):
+        before = (task.title, task.description, task._updated_at)
+        task.update(title, description)
+        if updated_at is not None:
+            task._updated_at = updated_at
+        self._reindex(task)
+        self._record(('_update_task', task, *before),
+                     ('_update_task', task, task.title, task.description,
+                      task._updated_at))
+        if self._events.active:
+            list_obj = self._task_list[task.id]
+            self._events.publish('task_updated', self._list_board[list_obj.id].id,
+                                 list_id=list_obj.id, task_id=task.id, title=task.title,
+                                 description=task.description)
+            nested = task.get_nested_board(create=False)
+            if nested is not None and nested._title is None:
+                self._publish_board_changed(nested)
+
+    # Bulk primitives keep a whole batch in a single record: the tasks and, when they
+    # leave lists, the (list, [(index, task), ...]) groups telling where they stood.
+
+    def _add_tasks(self, tasks, list_obj):
+        start = len(list_obj.tasks)
+        list_obj.add_tasks(tasks)
+        for task in tasks:
+            self._index_task(task, list_obj)
+        self._index_nested(tasks)
+        self._record(('_remove_tasks', tasks), ('_add_tasks', tasks, list_obj))
+        if self._events.active:
+            board = self._list_board[list_obj.id]
+            self._events.publish('tasks_added', board.id, list_id=list_obj.id,
+                                 task_ids=[t.id for t in tasks],
+                                 indexes=list(range(start, start + len(tasks))))
+            self._publish_board_changed(board)
+
+    def _remove_tasks(self, tasks):
+        self._publish_boards('board_removed', tasks)
+        groups = self._detach_grouped(tasks)
+        for task in tasks:
+            self._unindex_task(task)
+        self._record(('_insert_tasks', tasks, groups), ('_remove_tasks', tasks),
+                     sum(1 + task.subtask_count() for task in tasks))
+        self._publish_groups('tasks_removed', groups)
+
+    def _insert_tasks(self, tasks, groups):
+        self._insert_grouped(groups)
+        for list_obj, placed in groups:
+            for _, task in placed:
+                self._index_task(task, list_obj)
+        self._index_nested(tasks)
+        self._record(('_remove_tasks', tasks), ('_insert_tasks', tasks, groups))
+        self._publish_groups('tasks_added', groups)
+        self._publish_boards('board_added', tasks)
+
+    def _move_tasks(self, tasks, list_obj):
+        groups = self._detach_grouped(tasks)
+        start = len(list_obj.tasks)
+        list_obj.add_tasks(tasks)
+        board = self._list_board[list_obj.id]
+        for task in tasks:
+            _set_parent_board(task, board)
+            self._task_list[task.id] = list_obj
+        self._record(('_place_tasks', tasks, groups), ('_move_tasks', tasks, list_obj))
+        self._publish_moves(groups, [(list_obj, list(enumerate(tasks, start)))])
+
+    def _place_tasks(self, tasks, groups):
+        old_groups = self._detach_grouped(tasks)
+        self._insert_grouped(groups)
+        self._record(('_place_tasks', tasks, old_groups), ('_place_tasks', tasks, groups))
+        self._publish_moves(old_groups, groups)
+
+    def _publish_groups(self, kind, groups):
+        if not self._events.active:
+            return
+        boards = []
+        for list_obj, placed in groups:
+            board = self._list_board[list_obj.id]
+            self._events.publish(kind, board.id, list_id=list_obj.id,
+                                 task_ids=[task.id for _, task in placed],
+                                 indexes=[index for index, _ in placed])
+            if board not in boards:
+                boards.append(board)
+        for board in boards:
+            self._publish_board_changed(board)
+
+    def _publish_moves(self, sources, targets):
+        # One tasks_moved per target list. sources[i] tells where task_ids[i] came from as
+        # a (board_id, list_id, index) triple.
+        if not self._events.active:
+            return
+        origin = {}
+        for list_obj, placed in sources:
+            board_id = self._list_board[list_obj.id].id
+            for index, task in placed:
+                origin[task.id] = (board_id, list_obj.id, index)
+
+        boards = {}
+        for list_obj, placed in targets:
+            board = self._list_board[list_obj.id]
+            task_ids = [task.id for _, task in placed]
+            origins = [origin[task_id] for task_id in task_ids]
+            self._events.publish('tasks_moved', board.id, list_id=list_obj.id, task_ids=task_ids,
+                                 indexes=[index for index, _ in placed], sources=origins,
+                                 source_board_ids=sorted({o[0] for o in origins} - {board.id}))
+            boards[board.id] = board
+        for list_obj, _ in sources:
+            board = self._list_board[list_obj.id]
+            boards[board.id] = board
+        if len(boards) > 1:
+            for board in boards.values():
+                self._publish_board_changed(board)
+
+#endregion Journal
+
+#region Snapshot
+
+    # snapshot() returns the root boards as immutable FrozenBoard trees (models/snapshot.py).
+    # Only nodes changed since the previous snapshot are rebuilt, everything else is shared
+    # with it, and a snapshot of an unchanged Nest costs one lookup per root board. Take
+    # snapshots on the thread that edits the Nest; the result can then be read from any
+    # thread while editing goes on.
+
+    def snapshot(self):
+        return Snapshot(tuple(freeze(board) for board in self.root_boards()))
+
+#endregion Snapshot
+
+#region Compaction
+
+    # Lists and tasks removed straight through the models (List.remove_task,
+    # Board.remove_list) stay in the Nest indexes together with every board below them.
+    # compact() marks everything reachable from the root boards and sweeps the rest.
+
+    def orphan_ratio(self):
+        indexed = len(self._tasks_by_id)
+        if not indexed:
+            return 0.0
+        reachable = sum(root.total_task_count for root in self.root_boards())
+        return max(indexed - reachable, 0) / indexed
+
+    def compact(self):
+        marked = set()
+        for root in self.root_boards():
+            for item in self._iter_subtree(root):
+                marked.add(id(item))
+
+        reclaimed = []
+        report = {}
+        for name, items, back_refs in (("boards", self._boards_by_id, (self._roots,)),
+                                       ("lists", self._lists_by_id, (self._list_board,)),
+                                       ("tasks", self._tasks_by_id, (self._task_list,))):
+            dead = [key for key, item in items.items() if id(item) not in marked]
+            for key in dead:
+                reclaimed.append(items.pop(key))
+                for back_ref in back_refs:
+                    back_ref.pop(key, None)
+                self._ids.forget(key)
+            report[name] = len(dead)
+
+        for index in self._indexes:
+            for item in reclaimed:
+                index.remove(item)
+
+        for task_id in [t for t in self._sparse_tasks if t not in self._tasks_by_id]:
+            del self._sparse_boards[self._sparse_tasks.pop(task_id)]
+
+        self._leave_removed_boards()
+        if reclaimed:
+            self._notify("compacted", **report)
+        return report
+
+    def compact_if_needed(self):
+        if self.orphan_ratio() > self.COMPACT_THRESHOLD:
+            return self.compact()
+        return None
+
+#endregion Compaction
+
+#region Log
+
+    # With a log open on a file, every change is appended to <file>.wal (storage/wal.py)
+    # as it is made, and save_to_file() on that file only makes the log durable. The file
+    # itself is rewritten at checkpoints, once the log outgrows CHECKPOINT_RATIO of it.
+    CHECKPOINT_RATIO = 0.5
+    CHECKPOINT_MIN_BYTES = 1 << 20
+
+    @property
+    def log_path(self):
+        if self._log is not None:
+            return self._log.file_path
+        return self._pending_log[0] if self._pending_log is not None else None
+
+    def open_log(self, file_path, progress=None):
+        # Loads file_path if it exists, replays what its log holds past the last
+        # checkpoint, then keeps logging to it. progress is as for load_from_file().
+        # Opening leaves the file as it is: the log only starts with the first change,
+        # and files written before logs get a checkpoint when next saved.
+        if is_database(file_path):
+            return self.open_database(file_path)
+        if not os.path.exists(file_path):
+            return self.checkpoint(file_path)
+
+        try:
+            data = self._load_file(file_path, progress)
+            if data is None:
+                return False
+            checkpoint = data.get('checkpoint')
+            replayed = replay_log(self, file_path, checkpoint)
+            self._pending_log = (file_path, checkpoint)
+            self._log_base = os.path.getsize(file_path)
+            if replayed:
+                # What was recovered goes into the file before the log starts over.
+                return self.checkpoint()
             return True
+        except Exception as e:
+            print(f"Error loading file: {e}")
+            return False
 
-        list_to_move = board.lists.pop(current_position)
-        board.lists.insert(new_position, list_to_move)
-        
+    def checkpoint(self, file_path=None):
+        # Rewrites the whole file and starts an empty log next to it. The new log names
+        # the new checkpoint, so if we stop in between the old log is ignored, not replayed.
+        # Without file_path, the file being edited is rewritten in the format it has.
+        as_json = self._file_json if file_path is None else self._is_json(file_path)
+        file_path = file_path or self.log_path
+        self.compact_if_needed()
+        checkpoint = uuid.uuid4().hex
+
+        try:
+            with atomic_write(file_path, 'wb') as raw, compressed(raw, file_path, as_json) as f:
+                self._dump(f, as_json, checkpoint, self._cache_for(file_path, as_json))
+            self.close_log()
+            self._log = WriteAheadLog(self, file_path, checkpoint)
+            self._log_base = os.path.getsize(file_path)
+            self._file_json = as_json
+            self._dirty = False
+            return True
+        except Exception as e:
+            print(f"Error saving file: {e}")
+            return False
+
+    def close_log(self):
+        # A save still running in the background is dropped along with the log.
+        self._saving = None
+        self._pending_log = None
+        if self._log is not None:
+            if self._store is not None:
+                self._store.save_state(self._navigation_state())
+            self._log.close()
+            self._log = None
+            self._store = None
+
+    def _active_log(self):
+        # The log, started on the first change to a file open_log() left as it was.
+        if self._log is None and self._pending_log is not None:
+            self._log = WriteAheadLog(self, *self._pending_log)
+            self._pending_log = None
+        return self._log
+
+    def _sync_log(self):
+        try:
+            if self._store is not None:
+                self._store.save_state(self._navigation_state())
+            self._log.sync()
+        except Exception as e:
+            print(f"Error saving file: {e}")
+            return False
+        self._dirty = False
+        limit = max(self.CHECKPOINT_MIN_BYTES, self.CHECKPOINT_RATIO * self._log_base)
+        if self._saving is None and self._log.size > limit:
+            return self.checkpoint()
         return True
-    
+
+    def save_as(self, file_path):
+        # Writes everything to file_path and goes on editing that file: a database for
+        # DATABASE_SUFFIX, otherwise a .ktb with its log.
+        if file_path == self.log_path:
+            return self.save_to_file(file_path)
+        if file_path.endswith(self.DATABASE_SUFFIX):
+            return self.create_database(file_path)
+        return self.checkpoint(file_path)
+
+#endregion Log
+
+#region Autosave
+
+    # A save can be written on a worker thread (storage/autosave.py) while editing goes
+    # on: begin_save() takes a snapshot and starts the log of the changes made after it,
+    # the job writes the snapshot to a temporary file, and finish_save() puts that file in
+    # place. Saving to the file being edited marks the log instead of starting a new one,
+    # and cuts the log down to what follows the mark once the file is in place.
+
+    @property
+    def dirty(self):
+        # Whether anything changed since the last save or load. A database never is.
+        return self._dirty and self._store is None
+
+    def begin_save(self, file_path=None):
+        # Call on the thread editing the nest, between transactions. Returns a SaveJob,
+        # or None while another one runs or when there is nowhere to save to.
+        file_path = file_path or self.log_path
+        if file_path is None or self._saving is not None or self._store is not None:
+            return None
+
+        in_place = file_path == self.log_path
+        as_json = self._file_json if in_place else self._is_json(file_path)
+        self.compact_if_needed()
+        checkpoint = uuid.uuid4().hex
+        if in_place and self._log is not None:
+            self._log.mark(checkpoint)
+        else:
+            self.close_log()
+            self._log = WriteAheadLog(self, file_path, checkpoint)
+
+        self._saving = SaveJob(file_path, self.snapshot(), self._save_header(checkpoint),
+                               as_json, self._cache_for(file_path, as_json),
+                               dict(self._sparse_tasks))
+        self._dirty = False
+        return self._saving
+
+    def finish_save(self, job, saved):
+        # Call on the thread editing the nest once job.run() is over, saved telling whether
+        # it succeeded. Returns whether the file was replaced.
+        if job is not self._saving:
+            # Another save or a load came in between.
+            job.discard()
+            return False
+        self._saving = None
+
+        if saved:
+            try:
+                job.commit()
+            except Exception as e:
+                print(f"Error saving file: {e}")
+                saved = False
+        if not saved:
+            job.discard()
+            self._dirty = True
+            if self._log.checkpoint == job.checkpoint:
+                # The log was started for a file that never got written.
+                self._log.discard()
+                self.close_log()
+            return False
+
+        try:
+            self._log.rotate(job.checkpoint)
+        except Exception as e:
+            print(f"Error saving file: {e}")
+        self._log_base = os.path.getsize(job.file_path)
+        self._file_json = job.as_json
+        return True
+
+#endregion Autosave
+
+#region Database
+
+    # open_database() edits a SQLite file (storage/sqlite.py) in place. Boards are read
+    # when select_board(), navigate_to_task_board() or open_board() reach them: until then
+    # they are stubs whose lists are UNLOADED, which walks, searches and snapshots see as
+    # empty boards. At most DATABASE_CACHE_BOARDS loaded boards are kept besides the current
+    # one and its ancestors; unloading more forgets the undo history, which may refer to
+    # them. Every transaction is committed as it ends.
+    DATABASE_SUFFIX = '.ktdb'
+    DATABASE_CACHE_BOARDS = 256
+
+    def open_database(self, file_path, cache_boards=None):
+        try:
+            store = SqliteStore(file_path, cache_boards or self.DATABASE_CACHE_BOARDS)
+            ids = store.open_ids()
+        except Exception as e:
+            print(f"Error loading file: {e}")
+            return False
+
+        self.deserialize({})
+        self._ids = ids
+        for board in store.root_boards():
+            self._index_board(board)
+        self._log = self._store = store
+        self._restore_state(store.state())
+        return True
+
+    def _restore_state(self, state):
+        # Reaches down the navigation stack a database saved to its current board, or
+        # falls back on the first root board.
+        board_id, navigation_stack, list_id, task_id = state
+        for stacked_id, _, _ in navigation_stack:
+            if self._reach(self._boards_by_id.get(stacked_id)) is None:
+                break
+        else:
+            board = self._reach(self._boards_by_id.get(board_id))
+            if board is not None:
+                self.current_board = board
+                self.navigation_stack = list(navigation_stack)
+                self.current_list_id, self.current_task_id = list_id, task_id
+                return
+        roots = self.root_boards()
+        if roots:
+            self.select_board(roots[0].id)
+
+    def create_database(self, file_path, cache_boards=None):
+        self._load_everything()
+        try:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+            store = SqliteStore(file_path, cache_boards or self.DATABASE_CACHE_BOARDS)
+            store.export(self._ids, self.root_boards(), self._navigation_state())
+        except Exception as e:
+            print(f"Error saving file: {e}")
+            return False
+
+        self.close_log()
+        self._log = self._store = store
+        return True
+
+    def _reach(self, board):
+        if self._store is None or board is None:
+            return board
+
+        if self._store.fill(board):
+            for list_obj in board.lists:
+                self._index_list(list_obj, board)
+                self._index_nested(list_obj.tasks)
+
+        evicted = self._store.touch(board, self._pinned(board))
+        for old in evicted:
+            for list_obj in old.lists:
+                self._unindex_list(list_obj)
+            old.lists = UNLOADED
+            thaw(old)
+        if evicted:
+            self._store.forget(self._boards_by_id)
+            self._journal.clear()
+        return board
+
+    def _pinned(self, board):
+        pinned = set()
+        for b in [board, self.current_board] + [self._boards_by_id.get(entry[0])
+                                                 for entry in self.navigation_stack]:
+            while b is not None and b.id not in pinned:
+                pinned.add(b.id)
+                b = b.parent_board()
+        return pinned
+
+    def _load_everything(self):
+        if self._store is None:
+            return
+        stubs = [board for board in self._boards_by_id.values() if board.lists is UNLOADED]
+        while stubs:
+            board = stubs.pop()
+            self._store.fill(board)
+            for list_obj in board.lists:
+                self._index_list(list_obj, board)
+                self._index_nested(list_obj.tasks)
+                for task in list_obj.tasks:
+                    if task._board is not None and task._board.lists is UNLOADED:
+                        stubs.append(task._board)
+
+#endregion Database
+
 #region Save
 
+    # Files are written in the binary format (storage/binary.py) unless their name ends
+    # with JSON_SUFFIX, before a compression suffix if any (storage/compression.py).
+    # Loading tells them all apart from the first bytes.
+    JSON_SUFFIX = '.json'
+
     def save_to_file(self, file_path):
-        data = self.serialize()
+        if file_path is not None and file_path == self.log_path:
+            if self._store is not None:
+                return self._sync_log()
+            checkpoint = self._log.checkpoint if self._log is not None else self._pending_log[1]
+            if checkpoint is None or self._file_json != self._is_json(file_path):
+                # Files written before logs, or opened in the format their name does not
+                # say, are rewritten on save.
+                return self.checkpoint(file_path)
+            if self._log is None:
+                return True
+            return self._sync_log()
+
+        self.compact_if_needed()
+        as_json = self._is_json(file_path)
         
         try:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            with atomic_write(file_path, 'wb') as raw, compressed(raw, file_path, as_json) as f:
+                self._dump(f, as_json, cache=self._cache_for(file_path, as_json))
+            self._dirty = False
             return True
         except Exception as e:
             print(f"Error saving file: {e}")
             return False
         
-    def load_from_file(self, file_path):
+    def load_from_file(self, file_path, progress=None):
+        # progress(bytes_read, file_size) is called as the file is read.
+        if is_database(file_path):
+            return self.open_database(file_path)
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            success = self.deserialize(data)
-            return success
+            return self._load_file(file_path, progress) is not None
         except Exception as e:
             print(f"Error loading file: {e}")
             return False
         
     def serialize(self):
+        # Files only ever hold external ids, see IdMap. Untouched nested boards are left
+        # out as in files, see storage/fragments.py.
+        self._load_everything()
+        ext = self._ids.external
+        adopted = {internal_id for internal_id, _ in self._ids.adopted()}
         boards_data = []
         
         for board in self.boards:
+            if board.task is not None and not board.task_count and \
+                    untouched(freeze(board), adopted):
+                continue
             board_data = {
-                'id': board.id,
+                'id': ext(board.id),
                 'title': board.title,
                 'description': board.description,
-                'parent_board_id': getattr(board, 'parent_board_id', None),
-                'parent_task_id': getattr(board, 'parent_task_id', None),
+                'parent_board_id': ext(getattr(board, 'parent_board_id', None)),
+                'parent_task_id': ext(getattr(board, 'parent_task_id', None)),
                 'lists': []
             }
             
             for list_obj in board.lists:
                 list_data = {
-                    'id': list_obj.id,
+                    'id': ext(list_obj.id),
                     'title': list_obj.title,
+                    'rank': list_obj.rank,
                     'created_at': list_obj.created_at.isoformat(),
                     'tasks': []
                 }
                 
                 for task in list_obj.tasks:
+                    nested_board = task.get_nested_board(create=False)
+                    if nested_board and nested_board.id not in self._boards_by_id:
+                        nested_board = None
+                    board_id = nested_board.id if nested_board else self._sparse_tasks.get(task.id)
                     task_data = {
-                        'id': task.id,
+                        'id': ext(task.id),
                         'title': task.title,
                         'description': task.description,
+                        'rank': task.rank,
                         'created_at': task.created_at.isoformat(),
                         'updated_at': task.updated_at.isoformat(),
-                        'parent_board_id': task.parent_board_id,
-                        'board_id': task.board.id if task.board else None
+                        'parent_board_id': ext(task.parent_board_id),
+                        'board_id': ext(board_id)
                     }
                     list_data['tasks'].append(task_data)
                 
@@ -324,81 +1618,300 @@ class Nest:
         serialized_stack = []
         for item in self.navigation_stack:
             board_id, list_id, task_id = item
-            serialized_stack.append([board_id, list_id, task_id])
+            serialized_stack.append([ext(board_id), ext(list_id), ext(task_id)])
         
         data = {
+            'namespace': self._ids.namespace,
+            'next_id': next_free(),
             'boards': boards_data,
-            'current_board_id': current_board_id,
+            'current_board_id': ext(current_board_id),
             'navigation_stack': serialized_stack,
-            'current_list_id': self.current_list_id,
-            'current_task_id': self.current_task_id
+            'current_list_id': ext(self.current_list_id),
+            'current_task_id': ext(self.current_task_id)
         }
         
         return data
     
     def deserialize(self, data):
         try:
-            self.boards = []
-            self.current_board = None
-            self.navigation_stack = []
-            self.current_list_id = None
-            self.current_task_id = None
-            board_lookup = {}
-            
-            for board_data in data.get('boards', []):
-                board = Board(board_data['title'], board_data['description'], create_default_lists=False)
-                board.id = board_data['id']
-                board.parent_board_id = board_data.get('parent_board_id')
-                board.parent_task_id = board_data.get('parent_task_id')
-                self.boards.append(board)
-                board_lookup[board.id] = board
-            
-            task_board_mapping = {}
-            
+            ids = self._begin_load(data)
+            adopt = ids.adopt
+            boards, nested = [], []
+
             for board_data in data.get('boards', []):
-                board = board_lookup[board_data['id']]
-                
+                board = _board_from(board_data, adopt)
                 for list_data in board_data.get('lists', []):
-                    list_obj = List(list_data['title'])
-                    list_obj.id = list_data['id']
-                    list_obj.created_at = datetime.fromisoformat(list_data['created_at'])
-                    
-                    for task_data in list_data.get('tasks', []):
-                        task = Task(task_data['title'], task_data['description'], 
-                                   task_data.get('parent_board_id'))
-                        task.id = task_data['id']
-                        task.created_at = datetime.fromisoformat(task_data['created_at'])
-                        task.updated_at = datetime.fromisoformat(task_data['updated_at'])
-                        
-                        if task_data.get('board_id'):
-                            task_board_mapping[task.id] = task_data['board_id']
-                        
-                        list_obj.tasks.append(task)
-                    
-                    board.lists.append(list_obj)
-            
-            for task_id, board_id in task_board_mapping.items():
-                for board in self.boards:
-                    for list_obj in board.lists:
-                        for task in list_obj.tasks:
-                            if task.id == task_id and board_id in board_lookup:
-                                task.board = board_lookup[board_id]
-            
-            current_board_id = data.get('current_board_id')
-            if current_board_id and current_board_id in board_lookup:
-                self.current_board = board_lookup[current_board_id]
-            
-            for stack_item in data.get('navigation_stack', []):
-                board_id, list_id, task_id = stack_item
-                self.navigation_stack.append((board_id, list_id, task_id))
-            
-            self.current_list_id = data.get('current_list_id')
-            self.current_task_id = data.get('current_task_id')
-            
+                    list_obj = _list_from(list_data, adopt)
+                    list_obj.add_tasks([_task_from(task_data, adopt, nested)
+                                        for task_data in list_data.get('tasks', [])])
+                    ordering.restore(list_obj.tasks,
+                                     [t.get('rank') for t in list_data.get('tasks', [])])
+                    board.add_list(list_obj)
+
+                ordering.restore(board.lists, [l.get('rank') for l in board_data.get('lists', [])])
+                boards.append(board)
+
+            self._end_load(ids, boards, nested, self._adopt_state(data, ids))
             return True
         
         except Exception as e:
             print(f"Error deserializing data: {e}")
             return False
+
+    def _is_json(self, file_path):
+        return strip_suffix(os.fspath(file_path)).lower().endswith(self.JSON_SUFFIX)
+
+    def _dump(self, f, as_json, checkpoint=None, cache=None):
+        self._load_everything()
+        write_snapshot(f, self._save_header(checkpoint), self.snapshot(), as_json,
+                       cache, self._sparse_tasks)
+
+    def _cache_for(self, file_path, as_json):
+        # Compressed JSON streams through its codec: cached fragments would hold the
+        # whole uncompressed text.
+        if as_json and codec_of(file_path) is not None:
+            return None
+        return self._fragments
+
+    def _save_header(self, checkpoint):
+        # What a file holds besides the boards, copied so that it can be written from
+        # another thread.
+        return {
+            'namespace': self._ids.namespace,
+            'next_id': next_free(),
+            'checkpoint': checkpoint,
+            'state': self._navigation_state(),
+            'adopted': list(self._ids.adopted()),
+        }
+
+    def _navigation_state(self):
+        return (self.current_board.id if self.current_board else None,
+                list(self.navigation_stack), self.current_list_id, self.current_task_id)
+
+    def _load_file(self, file_path, progress=None):
+        # Builds the boards as the file is read and returns the file's other top-level
+        # values, or None if it cannot be loaded.
+        with open(file_path, 'rb') as raw, decompressed(raw) as f, _collection_paused():
+            if f is not raw and progress is not None:
+                # Decompressed bytes come in faster than the file is read.
+                size, report = os.fstat(raw.fileno()).st_size, progress
+                progress = lambda done, total: report(raw.tell(), size)
+            if is_binary(f):
+                data = self._read_binary(BinaryReader(f, progress))
+                self._file_json = False
+                return data
+            try:
+                data = self._read_stream(JsonReader(f, progress))
+            except OutOfOrder:
+                f.seek(0)
+                data = json.load(f)
+                if not self.deserialize(data):
+                    return None
+        self._file_json = True
+        return data
+
+    def _read_binary(self, reader):
+        data = reader.header
+        ids = self._begin_load(data)
+        for internal_id, external_id in data['adopted']:
+            ids.bind(internal_id, external_id)
+        boards, nested = reader.boards()
+        self._end_load(ids, boards, nested, data['state'])
+        return data
+
+    def _read_stream(self, reader):
+        # Expects the layout serialize() writes: ids need the namespace and next_id
+        # before the boards, and items are built from the keys before their children.
+        data = {}
+        boards, nested = [], []
+        loading = None
+        for key in reader.keys():
+            if key != 'boards':
+                if loading is not None and key in ('namespace', 'next_id'):
+                    raise OutOfOrder(key)
+                data[key] = reader.value()
+                continue
+            loading = loading or self._begin_load(data)
+            for _ in reader.items():
+                boards.append(_read_board(reader, loading.adopt, nested))
+
+        loading = loading or self._begin_load(data)
+        self._end_load(loading, boards, nested, self._adopt_state(data, loading))
+        return data
+
+    def _begin_load(self, data):
+        # The id map of the nest being loaded. The current nest is only forgotten once
+        # the new one is built, so a file that cannot be read leaves it as it was.
+        # Files written before integer ids carry no namespace: every UUID in them is
+        # adopted into the map. Otherwise ids of the file's own namespace read back
+        # to the same integers, which must not be handed out again.
+        ids = IdMap(data.get('namespace'))
+        reserve(data.get('next_id', 0))
+        return ids
+
+    def _forget_nest(self):
+        # Returns the query indexes to rebuild once the next nest is loaded.
+        self.close_log()
+        self.current_board = None
+        self.navigation_stack = []
+        self.current_list_id = None
+        self.current_task_id = None
+        query_indexes = list(self._query_indexes)
+        self._clear_index()
+        self._journal.clear()
+        self._dirty = False
+        self._fragments = FragmentCache()
+        self._sparse_boards = {}
+        self._sparse_tasks = {}
+        return query_indexes
+
+    def _adopt_state(self, data, ids):
+        # The current board, navigation stack, current list and current task of a JSON file.
+        adopt = ids.adopt
+        return (adopt(data.get('current_board_id')),
+                [tuple(adopt(i) for i in item) for item in data.get('navigation_stack', [])],
+                adopt(data.get('current_list_id')), adopt(data.get('current_task_id')))
+
+    def _end_load(self, ids, boards, nested, state):
+        # nested holds (task, board id) for every task with a nested board.
+        query_indexes = self._forget_nest()
+        self._ids = ids
+        board_lookup = {board.id: board for board in boards}
+        for task, board_id in nested:
+            if board_id in board_lookup:
+                task.board = board_lookup[board_id]
+            elif not self._ids.is_adopted(board_id):
+                self._sparse_boards[board_id] = task.id
+                self._sparse_tasks[task.id] = board_id
+
+        current_board_id, navigation_stack, self.current_list_id, self.current_task_id = state
+        if current_board_id and current_board_id in board_lookup:
+            self.current_board = board_lookup[current_board_id]
+        self.navigation_stack = list(navigation_stack)
+
+        for board in boards:
+            self._index_board(board)
+        if self.current_board is None and self.get_board_by_id(current_board_id):
+            self.current_board = self._boards_by_id[current_board_id]
+        for name in query_indexes:
+            self.create_index(name)
         
-#endregion Save
\ No newline at end of file
+#endregion Save
+
+
+@contextmanager
+def _collection_paused():
+    # Loading allocates millions of objects and frees none: the cyclic garbage collector
+    # would only rescan them over and over.
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+def _board_from(data, adopt):
+    board = Board(data['title'], data['description'], create_default_lists=False)
+    board.id = adopt(data['id'])
+    board.parent_board_id = adopt(data.get('parent_board_id'))
+    board.parent_task_id = adopt(data.get('parent_task_id'))
+    return board
+
+def _list_from(data, adopt):
+    list_obj = List(data['title'])
+    list_obj.id = adopt(data['id'])
+    list_obj._created_at = data['created_at']
+    return list_obj
+
+def _task_from(data, adopt, nested):
+    task = Task.restore(adopt(data['id']), data['title'], data['description'],
+                        data['created_at'], data['updated_at'],
+                        adopt(data.get('parent_board_id')))
+    if data.get('board_id'):
+        nested.append((task, adopt(data['board_id'])))
+    return task
+
+def _read_board(reader, adopt, nested):
+    # The board's own keys come before its lists, which are built one at a time.
+    head, board = {}, None
+    for key in reader.keys():
+        if board is not None:
+            raise OutOfOrder(key)
+        if key != 'lists':
+            head[key] = reader.value()
+            continue
+        board = _board_from(head, adopt)
+        ranks = []
+        for _ in reader.items():
+            list_obj, rank = _read_list(reader, adopt, nested)
+            board.add_list(list_obj)
+            ranks.append(rank)
+        ordering.restore(board.lists, ranks)
+    return board if board is not None else _board_from(head, adopt)
+
+def _read_list(reader, adopt, nested):
+    head, list_obj = {}, None
+    for key in reader.keys():
+        if list_obj is not None:
+            raise OutOfOrder(key)
+        if key != 'tasks':
+            head[key] = reader.value()
+            continue
+        list_obj = _list_from(head, adopt)
+        tasks, ranks = [], []
+        for _ in reader.items():
+            task_data = reader.value()
+            tasks.append(_task_from(task_data, adopt, nested))
+            ranks.append(task_data.get('rank'))
+        list_obj.add_tasks(tasks)
+        ordering.restore(list_obj.tasks, ranks)
+    return (list_obj if list_obj is not None else _list_from(head, adopt)), head.get('rank')
+
+def _board_tasks(board):
+    for list_obj in board.lists:
+        for task in list_obj.tasks:
+            yield list_obj, task
+
+
+def _ancestor_tasks(board):
+    while board is not None and board.task is not None:
+        yield board.task
+        board = board.parent_board()
+
+
+def _set_parent_board(task, board):
+    task.parent_board_id = board.id
+    if task._board is not None:
+        task._board.parent_board_id = board.id
+
+
+def _clone_subtree(task):
+    # Pre-order collection, then boards are rebuilt children first: every nested board
+    # is complete before it is attached, so no counter update climbs past it.
+    order = []
+    stack = [task]
+    while stack:
+        source = stack.pop()
+        order.append(source)
+        nested = source.get_nested_board(create=False)
+        if nested is not None:
+            for list_obj in nested.lists:
+                stack.extend(list_obj.tasks)
+
+    clones = {id(source): Task(source.title, source.description) for source in order}
+    for source in reversed(order):
+        nested = source.get_nested_board(create=False)
+        if nested is None:
+            continue
+
+        board = Board(nested._title, nested._description, create_default_lists=False)
+        for list_obj in nested.lists:
+            list_clone = List(list_obj.title)
+            list_clone.add_tasks([clones[id(t)] for t in list_obj.tasks])
+            for child in list_clone.tasks:
+                _set_parent_board(child, board)
+            board.add_list(list_clone)
+        clones[id(source)].board = board
+
+    return clones[id(task)]
@@ -0,0 +1,94 @@
+from bisect import bisect_left
+
+# Items in List.tasks and Board.lists carry an integer rank and each sequence stays
+# sorted by it. A move only rewrites the moved item's rank; the whole sequence is
+# respaced only when two neighbours have no room left between them.
+RANK_STEP = 1 << 16
+
+# Bumped by every rebalance, so storage can tell a whole sequence got new ranks.
+rebalances = 0
+
+
+def _rank_of(item):
+    return item.rank
+
+
+def index_of(seq, item):
+    i = bisect_left(seq, item.rank, key=_rank_of)
+    if i < len(seq) and seq[i] is item:
+        return i
+    return -1
+
+
+def rebalance(seq):
+    global rebalances
+    rebalances += 1
+    for i, item in enumerate(seq, 1):
+        item.rank = i * RANK_STEP
+
+
+def insert(seq, item, index=None):
+    if index is None or index >= len(seq):
+        item.rank = seq[-1].rank + RANK_STEP if seq else RANK_STEP
+        seq.append(item)
+        return len(seq) - 1
+
+    index = max(index, 0)
+    after = seq[index].rank
+    if index == 0:
+        item.rank = after - RANK_STEP
+        seq.insert(0, item)
+        return 0
+
+    before = seq[index - 1].rank
+    seq.insert(index, item)
+    if after - before > 1:
+        item.rank = (before + after) // 2
+    else:
+        rebalance(seq)
+    return index
+
+
+def inserted_at(seq, index):
+    # Where insert(seq, item, index) put item, read back without a search.
+    last = len(seq) - 1
+    if index is None or index >= last:
+        return last
+    return max(index, 0)
+
+
+def extend(seq, items):
+    rank = seq[-1].rank if seq else 0
+    for item in items:
+        rank += RANK_STEP
+        item.rank = rank
+    seq.extend(items)
+
+
+def remove(seq, item):
+    i = index_of(seq, item)
+    if i == -1:
+        return False
+    del seq[i]
+    return True
+
+
+def move(seq, item, new_index):
+    i = index_of(seq, item)
+    if i == -1:
+        return False
+    if i == new_index:
+        return True
+    del seq[i]
+    insert(seq, item, new_index)
+    return True
+
+
+def restore(seq, ranks):
+    # Ranks read back from a file are trusted only if they are still strictly increasing.
+    previous = None
+    for item, rank in zip(seq, ranks):
+        if rank is None or (previous is not None and rank <= previous):
+            rebalance(seq)
+            return
+        item.rank = previous = rank
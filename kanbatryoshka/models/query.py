@@ -0,0 +1,276 @@
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+from datetime import datetime
+
+from .timestamps import to_epoch
+
+QueryResult = namedtuple("QueryResult", ["tasks", "plan"])
+
+#region Predicates
+
+# A query is a conjunction of predicates. Every predicate can test a single task with
+# matches(depth, board, list, task); the ones backed by a secondary index can also hand
+# the planner a candidate set through candidates(indexes).
+
+class Predicate:
+    index_name = None
+
+    def matches(self, depth, board, list_obj, task):
+        raise NotImplementedError
+
+    def candidates(self, indexes):
+        return None
+
+    def __and__(self, other):
+        return All(self, other)
+
+
+class All(Predicate):
+    def __init__(self, *predicates):
+        self.predicates = []
+        for predicate in predicates:
+            if isinstance(predicate, All):
+                self.predicates.extend(predicate.predicates)
+            else:
+                self.predicates.append(predicate)
+
+    def matches(self, depth, board, list_obj, task):
+        return all(p.matches(depth, board, list_obj, task) for p in self.predicates)
+
+    def __repr__(self):
+        return " and ".join(repr(p) for p in self.predicates)
+
+
+class ListTitle(Predicate):
+    index_name = "list_title"
+
+    def __init__(self, title):
+        self.title = title
+
+    def matches(self, depth, board, list_obj, task):
+        return list_obj.title == self.title
+
+    def candidates(self, indexes):
+        index = indexes.get(self.index_name)
+        if index is None:
+            return None
+        return index.tasks(self.title)
+
+    def __repr__(self):
+        return f"list_title == {self.title!r}"
+
+
+class _TimeRange(Predicate):
+    attribute = None
+    operator = None
+
+    def __init__(self, when):
+        self.when = to_epoch(when)
+
+    def _bounds(self):
+        raise NotImplementedError
+
+    def candidates(self, indexes):
+        index = indexes.get(self.index_name)
+        if index is None:
+            return None
+        return index.range(*self._bounds())
+
+    def __repr__(self):
+        return f"{self.attribute} {self.operator} {datetime.fromtimestamp(self.when).isoformat()}"
+
+
+class CreatedAfter(_TimeRange):
+    index_name = attribute = "created_at"
+    operator = ">="
+
+    def matches(self, depth, board, list_obj, task):
+        return task._created_at >= self.when
+
+    def _bounds(self):
+        return self.when, None
+
+
+class CreatedBefore(_TimeRange):
+    index_name = attribute = "created_at"
+    operator = "<"
+
+    def matches(self, depth, board, list_obj, task):
+        return task._created_at < self.when
+
+    def _bounds(self):
+        return None, self.when
+
+
+class UpdatedAfter(_TimeRange):
+    index_name = attribute = "updated_at"
+    operator = ">="
+
+    def matches(self, depth, board, list_obj, task):
+        return task._updated_at >= self.when
+
+    def _bounds(self):
+        return self.when, None
+
+
+class UpdatedBefore(_TimeRange):
+    index_name = attribute = "updated_at"
+    operator = "<"
+
+    def matches(self, depth, board, list_obj, task):
+        return task._updated_at < self.when
+
+    def _bounds(self):
+        return None, self.when
+
+
+class MaxDepth(Predicate):
+    def __init__(self, depth):
+        self.depth = depth
+
+    def matches(self, depth, board, list_obj, task):
+        return depth <= self.depth
+
+    def __repr__(self):
+        return f"depth <= {self.depth}"
+
+
+class Under(Predicate):
+    def __init__(self, board_id):
+        self.board_id = board_id
+
+    def matches(self, depth, board, list_obj, task):
+        while board is not None:
+            if board.id == self.board_id:
+                return True
+            board = board.parent_board()
+        return False
+
+    def __repr__(self):
+        return f"under {self.board_id}"
+
+
+class TitleContains(Predicate):
+    def __init__(self, text):
+        self.text = text.lower()
+
+    def matches(self, depth, board, list_obj, task):
+        return self.text in task.title.lower()
+
+    def __repr__(self):
+        return f"title contains {self.text!r}"
+
+
+class Where(Predicate):
+    def __init__(self, function, description="custom"):
+        self.function = function
+        self.description = description
+
+    def matches(self, depth, board, list_obj, task):
+        return self.function(depth, board, list_obj, task)
+
+    def __repr__(self):
+        return self.description
+
+#endregion Predicates
+
+#region Indexes
+
+# Secondary indexes share the SearchIndex interface so the Nest feeds them all alike.
+
+class ListTitleIndex:
+    def __init__(self):
+        self._lists = {}
+        self._titles = {}
+
+    def add_board(self, board):
+        pass
+
+    def add_list(self, list_obj):
+        self._lists.setdefault(list_obj.title, {})[list_obj] = None
+        self._titles[list_obj] = list_obj.title
+
+    def add_task(self, task):
+        pass
+
+    def update(self, item):
+        if item in self._titles:
+            self.remove(item)
+            self.add_list(item)
+
+    def remove(self, item):
+        title = self._titles.pop(item, None)
+        if title is None:
+            return
+        lists = self._lists[title]
+        lists.pop(item, None)
+        if not lists:
+            del self._lists[title]
+
+    def tasks(self, title):
+        return _ListTasks(self._lists.get(title, {}))
+
+
+class _ListTasks:
+    def __init__(self, lists):
+        self.lists = lists
+
+    def __len__(self):
+        return sum(len(list_obj.tasks) for list_obj in self.lists)
+
+    def __iter__(self):
+        for list_obj in self.lists:
+            yield from list_obj.tasks
+
+
+class TimestampIndex:
+    # Tasks sorted by one of their epoch timestamps, kept as two parallel lists so a
+    # range is two bisections. New and freshly updated tasks carry the latest time and
+    # land at the end, so the common insert is an append.
+    def __init__(self, attribute):
+        self.attribute = attribute
+        self._keys = []
+        self._tasks = []
+        self._indexed = {}
+
+    def add_board(self, board):
+        pass
+
+    def add_list(self, list_obj):
+        pass
+
+    def add_task(self, task):
+        key = getattr(task, self.attribute)
+        i = bisect_right(self._keys, key)
+        self._keys.insert(i, key)
+        self._tasks.insert(i, task)
+        self._indexed[task] = key
+
+    def update(self, item):
+        if item in self._indexed:
+            self.remove(item)
+            self.add_task(item)
+
+    def remove(self, item):
+        key = self._indexed.pop(item, None)
+        if key is None:
+            return
+        i = bisect_left(self._keys, key)
+        while self._tasks[i] is not item:
+            i += 1
+        del self._keys[i]
+        del self._tasks[i]
+
+    def range(self, low=None, high=None):
+        start = 0 if low is None else bisect_left(self._keys, low)
+        end = len(self._keys) if high is None else bisect_left(self._keys, high)
+        return self._tasks[start:end]
+
+
+INDEX_FACTORIES = {
+    "list_title": ListTitleIndex,
+    "created_at": lambda: TimestampIndex("_created_at"),
+    "updated_at": lambda: TimestampIndex("_updated_at"),
+}
+
+#endregion Indexes
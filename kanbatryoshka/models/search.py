@@ -0,0 +1,151 @@
+from collections import namedtuple
+import heapq
+from itertools import combinations
+import re
+
+from .board import Board
+from .list import List
+
+TITLE_WEIGHT = 3
+TEXT_WEIGHT = 1
+MAX_TIERED_TOKENS = 6
+
+SearchHit = namedtuple("SearchHit", ["kind", "item", "board", "score", "path"])
+
+_TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text):
+    if not text:
+        return ()
+    return tuple(dict.fromkeys(_TOKEN.findall(text.lower())))
+
+
+class SearchIndex:
+    # Inverted index over task titles and descriptions, list titles and the titles of
+    # boards that have their own (nested boards derive theirs from the task). Postings
+    # are insertion-ordered dicts used as sets, keyed by the model objects themselves.
+    def __init__(self):
+        self._titles = {}
+        self._texts = {}
+        self._docs = {}
+
+    def __len__(self):
+        return len(self._docs)
+
+    def __contains__(self, item):
+        return item in self._docs
+
+    def add_board(self, board):
+        if board._title is not None:
+            self._add(board, board._title, None)
+
+    def add_list(self, list_obj):
+        self._add(list_obj, list_obj.title, None)
+
+    def add_task(self, task):
+        self._add(task, task.title, task.description)
+
+    def update(self, item):
+        self.remove(item)
+        if isinstance(item, Board):
+            self.add_board(item)
+        elif isinstance(item, List):
+            self.add_list(item)
+        else:
+            self.add_task(item)
+
+    def _add(self, item, title, text):
+        title_tokens = tokenize(title)
+        text_tokens = tokenize(text)
+        for token in title_tokens:
+            self._titles.setdefault(token, {})[item] = None
+        for token in text_tokens:
+            self._texts.setdefault(token, {})[item] = None
+        self._docs[item] = (title_tokens, text_tokens)
+
+    def remove(self, item):
+        tokens = self._docs.pop(item, None)
+        if tokens is None:
+            return False
+
+        title_tokens, text_tokens = tokens
+        _discard(self._titles, title_tokens, item)
+        _discard(self._texts, text_tokens, item)
+        return True
+
+    def search(self, query, limit=20):
+        tokens = tokenize(query)
+        if not tokens or limit <= 0:
+            return []
+
+        postings = []
+        for token in tokens:
+            titles = self._titles.get(token, {})
+            texts = self._texts.get(token, {})
+            if not titles and not texts:
+                return []
+            postings.append((titles, texts))
+
+        # A hit scores TITLE_WEIGHT for every token found in its title and TEXT_WEIGHT
+        # for every other one, so the results come in tiers: every token in the title
+        # first, then every way of moving one token to the description, and so on.
+        # Each tier is a set intersection done in C, and the scan stops as soon as
+        # `limit` hits are collected; a lower tier can never outrank them.
+        if len(postings) > MAX_TIERED_TOKENS:
+            return self._score_all(postings, limit)
+
+        hits = []
+        seen = set()
+        count = len(postings)
+        for in_title in range(count, -1, -1):
+            score = in_title * TITLE_WEIGHT + (count - in_title) * TEXT_WEIGHT
+            for title_positions in combinations(range(count), in_title):
+                for item in _intersect([
+                    postings[i][0] if i in title_positions else postings[i][1]
+                    for i in range(count)
+                ]):
+                    if item in seen:
+                        continue
+                    seen.add(item)
+                    hits.append((score, item))
+                    if len(hits) >= limit:
+                        return hits
+        return hits
+
+    def _score_all(self, postings, limit):
+        candidates = None
+        for titles, texts in postings:
+            matches = titles.keys() | texts.keys()
+            candidates = matches if candidates is None else candidates & matches
+
+        scored = []
+        for item in candidates:
+            score = 0
+            for titles, _ in postings:
+                score += TITLE_WEIGHT if item in titles else TEXT_WEIGHT
+            scored.append((score, item))
+        return heapq.nlargest(limit, scored, key=lambda hit: hit[0])
+
+
+def _intersect(postings):
+    postings = sorted(postings, key=len)
+    if not postings[0]:
+        return ()
+
+    matches = postings[0].keys()
+    for other in postings[1:]:
+        matches = matches & other.keys()
+        if not matches:
+            return ()
+    return matches
+
+
+def _discard(postings, tokens, item):
+    for token in tokens:
+        bucket = postings.get(token)
+        if bucket is None:
+            continue
+        bucket.pop(item, None)
+        if not bucket:
+            del postings[token]
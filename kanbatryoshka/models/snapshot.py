@@ -0,0 +1,160 @@
+from collections import namedtuple
+from operator import attrgetter
+
+# Immutable mirrors of Board, List and Task. Timestamps stay epoch floats as in the live
+# models. Ranks are kept by the containers: every rank change goes through the List or
+# Board holding the item, which rebuilds the container only. A board's own title and
+# description are None while they are derived from its task. A frozen node is built once and shared by every snapshot taken until its live
+# node changes, so consecutive snapshots share all unchanged subtrees.
+FrozenBoard = namedtuple('FrozenBoard', ['id', 'title', 'description', 'lists',
+                                         'task_count', 'total_task_count',
+                                         'created_at', 'updated_at', 'list_ranks',
+                                         'own_title', 'own_description'])
+FrozenList = namedtuple('FrozenList', ['id', 'title', 'created_at', 'tasks', 'ranks'])
+FrozenTask = namedtuple('FrozenTask', ['id', 'title', 'description', 'created_at',
+                                       'updated_at', 'board'])
+
+Snapshot = namedtuple('Snapshot', ['boards'])
+
+TaskDiff = namedtuple('TaskDiff', ['added', 'removed', 'changed', 'moved'])
+
+
+# Each live node caches its frozen copy in _frozen. A frozen node implies frozen ancestors
+# (freeze works from the roots down), so thawing climbs only until the first node without
+# a copy: a mutation costs O(depth) once, then nothing until the next snapshot.
+
+def thaw(node):
+    while node is not None and node._frozen is not None:
+        node._frozen = None
+        node = node.task if hasattr(node, 'lists') else node.owner
+
+
+def freeze(board):
+    # Post-order and iterative, only the nodes thawed since the last freeze are rebuilt.
+    if board._frozen is not None:
+        return board._frozen
+
+    stack = [(board, False)]
+    while stack:
+        node, ready = stack.pop()
+        if ready:
+            node._frozen = _build(node)
+            continue
+
+        stack.append((node, True))
+        for child in _children(node):
+            if child._frozen is None:
+                stack.append((child, False))
+    return board._frozen
+
+
+def _children(node):
+    if hasattr(node, 'lists'):
+        return node.lists
+    if hasattr(node, 'tasks'):
+        return node.tasks
+    return () if node._board is None else (node._board,)
+
+
+_frozen_of = attrgetter('_frozen')
+_rank_of = attrgetter('rank')
+
+
+def _build(node):
+    if hasattr(node, 'lists'):
+        return FrozenBoard(node.id, node.title, node.description,
+                           tuple(map(_frozen_of, node.lists)),
+                           node.task_count, node.total_task_count,
+                           node._created_at, node._updated_at,
+                           tuple(map(_rank_of, node.lists)), node._title, node._description)
+    if hasattr(node, 'tasks'):
+        return FrozenList(node.id, node.title, node._created_at,
+                          tuple(map(_frozen_of, node.tasks)), tuple(map(_rank_of, node.tasks)))
+    board = node._board
+    return FrozenTask(node.id, node.title, node.description, node._created_at,
+                      node._updated_at, None if board is None else board._frozen)
+
+
+def iter_tasks(snapshot):
+    # Yields (depth, board, list, task) like Nest.walk, over frozen nodes.
+    stack = [(0, board) for board in reversed(snapshot.boards)]
+    while stack:
+        depth, board = stack.pop()
+        nested = []
+        for list_obj in board.lists:
+            for task in list_obj.tasks:
+                yield depth, board, list_obj, task
+                if task.board is not None:
+                    nested.append((depth + 1, task.board))
+        stack.extend(reversed(nested))
+
+
+def diff(old, new):
+    # Compares two snapshots by walking them side by side. Nodes shared by both are
+    # skipped, so the cost follows the size of the change, not the size of the nest.
+    added, removed, changed = {}, {}, []
+    stack = []
+    old_boards = {board.id: board for board in old.boards}
+    for board in new.boards:
+        previous = old_boards.pop(board.id, None)
+        if previous is None:
+            _gather_board(board, added)
+        else:
+            stack.append((previous, board))
+    for board in old_boards.values():
+        _gather_board(board, removed)
+
+    while stack:
+        before, after = stack.pop()
+        if before is after:
+            continue
+        old_lists = {list_obj.id: list_obj for list_obj in before.lists}
+        for list_obj in after.lists:
+            previous_list = old_lists.pop(list_obj.id, None)
+            if previous_list is list_obj:
+                continue
+            old_tasks = {} if previous_list is None else {t.id: t for t in previous_list.tasks}
+            for task in list_obj.tasks:
+                previous = old_tasks.pop(task.id, None)
+                if previous is task:
+                    continue
+                if previous is None:
+                    _gather(task, added)
+                    continue
+                if previous[:5] != task[:5]:
+                    changed.append(task.id)
+                if previous.board is None:
+                    if task.board is not None:
+                        _gather_board(task.board, added)
+                elif task.board is None:
+                    _gather_board(previous.board, removed)
+                else:
+                    stack.append((previous.board, task.board))
+            for task in old_tasks.values():
+                _gather(task, removed)
+        for list_obj in old_lists.values():
+            for task in list_obj.tasks:
+                _gather(task, removed)
+
+    # A task that left one place and showed up in another has moved.
+    moved = [task_id for task_id in added if task_id in removed]
+    for task_id in moved:
+        if added.pop(task_id)[:5] != removed.pop(task_id)[:5]:
+            changed.append(task_id)
+    return TaskDiff(list(added), list(removed), changed, moved)
+
+
+def _gather(task, into):
+    stack = [task]
+    while stack:
+        task = stack.pop()
+        into[task.id] = task
+        if task.board is not None:
+            for list_obj in task.board.lists:
+                stack.extend(list_obj.tasks)
+
+
+def _gather_board(board, into):
+    for list_obj in board.lists:
+        for task in list_obj.tasks:
+            _gather(task, into)
@@ -1,33 +1,110 @@
-from datetime import datetime
-import uuid
+from .ids import new_id
 from .board import Board
+from .timestamps import now, to_datetime, to_epoch, LazyTimestamp
+from .snapshot import thaw
 
 class Task:
+    __slots__ = ('id', 'title', 'description', '_created', '_updated',
+                 'parent_board_id', '_board', 'owner', 'rank', '_frozen')
+
+    # Epoch seconds, or the ISO strings of a JSON file until first read.
+    _created_at = LazyTimestamp('_created')
+    _updated_at = LazyTimestamp('_updated')
+
     def __init__(self, title, description="", parent_board_id=None):
-        self.id = str(uuid.uuid4())
+        self.id = new_id()
         self.title = title
         self.description = description
-        self.created_at = datetime.now()
-        self.updated_at = datetime.now()
+        self._created = self._updated = now()
 
         self.parent_board_id = parent_board_id
 
-        self.board = Board(f"Board: {title}",
-                           f"Board for task: {description}")
-        self.board.parent_task_id = self.id
-        self.board.parent_board_id = parent_board_id
+        # The nested board is only built the first time something opens it.
+        self._board = None
+        self.owner = None
+        self.rank = 0
+        self._frozen = None
+
+    @classmethod
+    def restore(cls, task_id, title, description, created_at, updated_at, parent_board_id):
+        # A task read back from a file, which needs neither a new id nor the clock.
+        task = cls.__new__(cls)
+        task.id = task_id
+        task.title = title
+        task.description = description
+        task._created = created_at
+        task._updated = updated_at
+        task.parent_board_id = parent_board_id
+        task._board = None
+        task.owner = None
+        task.rank = 0
+        task._frozen = None
+        return task
+
+    @property
+    def created_at(self):
+        return to_datetime(self._created_at)
+
+    @created_at.setter
+    def created_at(self, value):
+        self._created_at = to_epoch(value)
+        thaw(self)
+
+    @property
+    def updated_at(self):
+        return to_datetime(self._updated_at)
+
+    @updated_at.setter
+    def updated_at(self, value):
+        self._updated_at = to_epoch(value)
+        thaw(self)
+
+    @property
+    def board(self):
+        if self._board is None:
+            board = Board(None, None)
+            board.parent_board_id = self.parent_board_id
+            board.attach_task(self)
+            self._board = board
+            thaw(self)
+        return self._board
+
+    @board.setter
+    def board(self, board):
+        previous = self.subtask_count()
+        if board is not None:
+            board.attach_task(self)
+            board.invalidate_path()
+        self._board = board
+        thaw(self)
+
+        delta = self.subtask_count() - previous
+        if delta and self.owner is not None and self.owner.owner is not None:
+            self.owner.owner.count_tasks(0, delta)
 
     def update(self, title = None, description = None):
         if title is not None:
             self.title = title
-            self.board.title = f"Board: {title}"
+            if self._board is not None:
+                self._board.invalidate_path()
 
         if description is not None:
             self.description = description
-            self.board.description = f"Board for task: {description}"
 
-        self.updated_at = datetime.now()
+        self._updated_at = now()
+        # A nested board with a derived title is frozen with it, thawing it reaches us too.
+        thaw(self if self._board is None else self._board)
         return True
     
-    def get_nested_board(self):
-        return self.board
+    def get_nested_board(self, create=True):
+        if create:
+            return self.board
+        return self._board
+
+    def has_subtasks(self):
+        return self._board is not None and self._board.has_tasks
+
+    def subtask_count(self):
+        if self._board is None:
+            return 0
+        return self._board.total_task_count
@@ -0,0 +1,39 @@
+from datetime import datetime
+import time
+
+
+def now():
+    return time.time()
+
+
+def to_datetime(value):
+    return datetime.fromtimestamp(value)
+
+
+def to_epoch(value):
+    if isinstance(value, datetime):
+        return value.timestamp()
+    return value
+
+
+class LazyTimestamp:
+    # An epoch timestamp attribute kept in a slot, which may instead hold the ISO string
+    # read from a JSON file: the string is only parsed the first time it is read.
+    def __init__(self, slot):
+        self._slot_name = slot
+        self._slot = None
+
+    def __set_name__(self, owner, name):
+        self._slot = owner.__dict__[self._slot_name]
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        value = self._slot.__get__(obj, owner)
+        if type(value) is str:
+            value = datetime.fromisoformat(value).timestamp()
+            self._slot.__set__(obj, value)
+        return value
+
+    def __set__(self, obj, value):
+        self._slot.__set__(obj, value)
@@ -0,0 +1,59 @@
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+
+@contextmanager
+def atomic_write(file_path, mode='w', encoding='utf-8'):
+    # Writes go to a temporary file next to file_path, which replaces it only once
+    # everything is on disk: a failure leaves the previous file untouched.
+    staged = StagedFile(file_path)
+    try:
+        with staged.open(mode, encoding) as f:
+            yield f
+        staged.commit()
+    except BaseException:
+        staged.discard()
+        raise
+
+
+class StagedFile:
+    # The temporary file of atomic_write, for when writing it and replacing file_path
+    # happen at different times, or on different threads.
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self._directory = os.path.dirname(os.path.abspath(file_path))
+        fd, self.temp_path = tempfile.mkstemp(prefix='.', suffix='.tmp', dir=self._directory)
+        os.close(fd)
+
+    @contextmanager
+    def open(self, mode='w', encoding='utf-8'):
+        with open(self.temp_path, mode, encoding=None if 'b' in mode else encoding) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+
+    def commit(self):
+        if os.path.exists(self.file_path):
+            shutil.copymode(self.file_path, self.temp_path)
+        os.replace(self.temp_path, self.file_path)
+        _sync_directory(self._directory)
+
+    def discard(self):
+        if os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+
+
+def _sync_directory(directory):
+    # Makes the rename itself durable where directories can be opened (not on Windows).
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
@@ -0,0 +1,48 @@
+from .atomic import StagedFile
+from .compression import compressed
+from .fragments import write_snapshot
+
+# A save split in three, so that a large nest is written without blocking the thread
+# editing it: Nest.begin_save() takes a Snapshot and returns a SaveJob, whose run() writes
+# it to a temporary file from any thread, then Nest.finish_save() puts that file in place,
+# back on the editing thread.
+
+
+class SaveJob:
+    def __init__(self, file_path, snapshot, header, as_json, cache=None, sparse=None):
+        # header and sparse are copies made for the job, as for write_snapshot(). cache
+        # holds the boards encoded by previous saves, see storage/fragments.py.
+        self.file_path = file_path
+        self.snapshot = snapshot
+        self.header = header
+        self.as_json = as_json
+        self.cache = cache
+        self.sparse = sparse
+        self._staged = None
+
+    @property
+    def checkpoint(self):
+        return self.header['checkpoint']
+
+    def run(self, progress=None):
+        # progress(tasks_written, task_count) is called after each board.
+        self._staged = StagedFile(self.file_path)
+        try:
+            with self._staged.open('wb') as raw, \
+                    compressed(raw, self.file_path, self.as_json) as f:
+                write_snapshot(f, self.header, self.snapshot, self.as_json, self.cache,
+                               self.sparse, progress)
+        except BaseException:
+            self.discard()
+            raise
+
+    def commit(self):
+        # Replaces the file with the one run() wrote.
+        if self._staged is not None:
+            self._staged.commit()
+            self._staged = None
+
+    def discard(self):
+        if self._staged is not None:
+            self._staged.discard()
+            self._staged = None
@@ -0,0 +1,324 @@
+import struct
+from ..models.board import Board
+from ..models.list import List
+from ..models.task import Task
+from ..models import ordering
+
+# Binary layout of a nest, told apart from JSON by MAGIC:
+#   MAGIC, VERSION
+#   strings: count, then each string as its utf-8 length and bytes
+#   header: namespace, next_id, checkpoint, current board, list and task, navigation
+#           stack, then the (internal, external) pairs of adopted UUIDs
+#   boards: count, then each board as its length, its own strings and its record
+# Integers are LEB128 varints, signed ones zigzag encoded, and ids are internal ids with
+# 0 standing for None. Strings are stored once per table, in the order of their first
+# use: a reference is 0 for the next string of the table, 1 for None, or 1 + the index of
+# a string already met. Version 1 files have no tables but the first one. A list stores
+# its tasks column by column, ids as deltas from the previous task and ranks as a common
+# step when they have one, so that most columns hold single bytes and the timestamps of
+# a whole list unpack in one call.
+MAGIC = b'\x00KTB'
+VERSION = 2
+
+# Task flags.
+NESTED_BOARD = 1
+OTHER_PARENT = 2
+
+_DOUBLE = struct.Struct('<d')
+_DOUBLES = struct.Struct('<dd')
+
+
+def is_binary(f):
+    # Tells from the first bytes of a binary file, which is left at its start.
+    magic = f.read(len(MAGIC))
+    f.seek(0)
+    return magic == MAGIC
+
+
+# Board records are tuples, see storage/fragments.py:
+#   (id, title, description, parent board id, parent task id, created_at, updated_at, lists)
+# with lists as (id, title, rank, created_at, tasks) and tasks as
+#   (id, title, description, rank, created_at, updated_at, nested board id, parent board id)
+
+def encode_board(record):
+    # A board as it sits in the file, with its length first. It holds its own string
+    # table, so it can be written again as is while the board is unchanged.
+    writer = _Writer()
+    data = writer.board(record)
+    out = bytearray()
+    _put(out, [len(writer.strings)])
+    for s in writer.strings:
+        encoded = s.encode('utf-8')
+        _put(out, [len(encoded)])
+        out += encoded
+    out += data
+    size = bytearray()
+    _put(size, [len(out)])
+    return bytes(size + out)
+
+
+def write_file(f, header, boards):
+    # header holds 'namespace', 'next_id', 'checkpoint', 'state' as (current board id,
+    # navigation stack, current list id, current task id), and 'adopted' pairs. boards
+    # are encoded by encode_board().
+    writer = _Writer()
+    string = writer.string
+    body = bytearray()
+    current_board_id, navigation_stack, current_list_id, current_task_id = header['state']
+    _put(body, [string(header['namespace']), header['next_id'], string(header.get('checkpoint')),
+                current_board_id or 0, current_list_id or 0, current_task_id or 0,
+                len(navigation_stack)])
+    _put(body, [i or 0 for item in navigation_stack for i in item])
+    adopted = list(header['adopted'])
+    _put(body, [len(adopted)])
+    for internal_id, external_id in adopted:
+        _put(body, [internal_id, string(external_id)])
+    boards = list(boards)
+    _put(body, [len(boards)])
+
+    out = bytearray(MAGIC)
+    _put(out, [VERSION, len(writer.strings)])
+    for s in writer.strings:
+        data = s.encode('utf-8')
+        _put(out, [len(data)])
+        out += data
+    f.write(out)
+    f.write(body)
+    f.write(b''.join(boards))
+
+
+class _Writer:
+    def __init__(self):
+        self._refs = {}
+        self.strings = []
+
+    def string(self, s):
+        if s is None:
+            return 1
+        ref = self._refs.get(s)
+        if ref is None:
+            self.strings.append(s)
+            self._refs[s] = len(self.strings) + 1
+            return 0
+        return ref
+
+    def board(self, record):
+        board_id, title, description, parent_board_id, parent_task_id, \
+            created_at, updated_at, lists = record
+        string = self.string
+        out = bytearray()
+        _put(out, [board_id, string(title), string(description),
+                   parent_board_id or 0, parent_task_id or 0])
+        out += _DOUBLES.pack(created_at, updated_at)
+        _put(out, [len(lists)])
+        for list_id, title, rank, created_at, tasks in lists:
+            _put(out, [list_id, string(title), _zigzag(rank)])
+            out += _DOUBLE.pack(created_at)
+            self._tasks(out, board_id, list_id, tasks)
+        return out
+
+    def _tasks(self, out, board_id, list_id, tasks):
+        string = self.string
+        ids, ranks, flags, timestamps, nested, parents = [], [], bytearray(), [], [], []
+        previous_id, previous_rank = list_id, 0
+        for task_id, _, _, rank, created_at, updated_at, nested_id, parent_id in tasks:
+            ids.append(_zigzag(task_id - previous_id))
+            ranks.append(rank - previous_rank)
+            previous_id, previous_rank = task_id, rank
+            timestamps += (created_at, updated_at)
+
+            flag = 0
+            if nested_id is not None:
+                flag |= NESTED_BOARD
+                nested.append(_zigzag(nested_id - task_id))
+            if parent_id != board_id:
+                flag |= OTHER_PARENT
+                parents.append(parent_id or 0)
+            flags.append(flag)
+
+        _put(out, [len(tasks)])
+        _put(out, ids)
+        _put(out, [string(task[1]) for task in tasks])
+        _put(out, [string(task[2]) for task in tasks])
+        # Ranks spaced by a common, positive step are stored as that step alone.
+        if ranks and ranks[0] > 0 and ranks.count(ranks[0]) == len(ranks):
+            _put(out, [ranks[0]])
+        else:
+            _put(out, [0])
+            _put(out, [_zigzag(rank) for rank in ranks])
+        out += flags
+        out += struct.pack(f'<{len(timestamps)}d', *timestamps)
+        _put(out, nested)
+        _put(out, parents)
+
+
+class BinaryReader:
+    def __init__(self, f, progress=None):
+        # The whole file is read at once: it is a fraction of the size of the nest it holds.
+        self._buffer = f.read()
+        self._progress = progress
+        if self._buffer[:len(MAGIC)] != MAGIC:
+            raise ValueError("Not a binary Kanbatryoshka file")
+        self._pos = len(MAGIC)
+
+        self._version, = self._get(1)
+        if self._version > VERSION:
+            raise ValueError(f"Unsupported file version {self._version}")
+        self._read_strings()
+
+        namespace, next_id, checkpoint, board_id, list_id, task_id, depth = self._get(7)
+        namespace, checkpoint = self._texts([namespace, checkpoint])
+        stack = self._get(3 * depth)
+        adopted, = self._get(1)
+        pairs = [self._get(2) for _ in range(adopted)]
+        self.header = {
+            'namespace': namespace,
+            'next_id': next_id,
+            'checkpoint': checkpoint,
+            'state': (board_id or None,
+                      [tuple(i or None for i in stack[k:k + 3]) for k in range(0, len(stack), 3)],
+                      list_id or None, task_id or None),
+            'adopted': [(internal_id, self._texts([ref])[0]) for internal_id, ref in pairs],
+        }
+
+    def boards(self):
+        # Returns the boards and the (task, board id) pairs of the tasks with a nested board.
+        count, = self._get(1)
+        boards, nested = [], []
+        for _ in range(count):
+            size, = self._get(1)
+            end = self._pos + size
+            if end > len(self._buffer):
+                raise ValueError("Truncated board record")
+            boards.append(self._board(nested))
+            if self._pos != end:
+                raise ValueError("Corrupted board record")
+            if self._progress is not None:
+                self._progress(end, len(self._buffer))
+        return boards, nested
+
+    def _board(self, nested):
+        if self._version > 1:
+            self._read_strings()
+        board_id, title, description, parent_board_id, parent_task_id = self._get(5)
+        title, description = self._texts([title, description])
+        board = Board(title, description, create_default_lists=False)
+        board.id = board_id
+        board.parent_board_id = parent_board_id or None
+        board.parent_task_id = parent_task_id or None
+        board._created_at, board._updated_at = _DOUBLES.unpack_from(self._buffer, self._pos)
+        self._pos += 16
+
+        count, = self._get(1)
+        ranks = []
+        for _ in range(count):
+            list_id, title, rank = self._get(3)
+            list_obj = List(self._texts([title])[0])
+            list_obj.id = list_id
+            list_obj._created_at, = _DOUBLE.unpack_from(self._buffer, self._pos)
+            self._pos += 8
+            board.add_list(list_obj)
+            self._tasks(board, list_obj, nested)
+            ranks.append(_unzigzag(rank))
+        ordering.restore(board.lists, ranks)
+        return board
+
+    def _tasks(self, board, list_obj, nested):
+        count, = self._get(1)
+        ids = self._get(count)
+        titles = self._texts(self._get(count))
+        descriptions = self._texts(self._get(count))
+        step, = self._get(1)
+        if step:
+            ranks = range(step, step * (count + 1), step)
+        else:
+            ranks, rank = [], 0
+            for delta in self._get(count):
+                rank += (delta >> 1) ^ -(delta & 1)
+                ranks.append(rank)
+        flags = self._buffer[self._pos:self._pos + count]
+        self._pos += count
+        timestamps = struct.unpack_from(f'<{2 * count}d', self._buffer, self._pos)
+        self._pos += 16 * count
+
+        tasks = []
+        append = tasks.append
+        restore = Task.restore
+        board_id = board.id
+        task_id = list_obj.id
+        for delta, title, description, created_at, updated_at in zip(
+                ids, titles, descriptions, timestamps[0::2], timestamps[1::2]):
+            task_id += (delta >> 1) ^ -(delta & 1)
+            append(restore(task_id, title, description, created_at, updated_at, board_id))
+
+        with_board = [task for task, flag in zip(tasks, flags) if flag & NESTED_BOARD]
+        for task, delta in zip(with_board, self._get(len(with_board))):
+            nested.append((task, task.id + _unzigzag(delta)))
+        other_parent = [task for task, flag in zip(tasks, flags) if flag & OTHER_PARENT]
+        for task, parent_id in zip(other_parent, self._get(len(other_parent))):
+            task.parent_board_id = parent_id or None
+
+        list_obj.add_tasks(tasks)
+        ordering.restore(list_obj.tasks, ranks)
+
+    def _read_strings(self):
+        count, = self._get(1)
+        buffer = self._buffer
+        strings = [None]
+        for _ in range(count):
+            size, = self._get(1)
+            strings.append(buffer[self._pos:self._pos + size].decode('utf-8'))
+            self._pos += size
+        self._strings = strings
+        self._fresh = iter(strings[1:])
+
+    def _texts(self, refs):
+        strings, fresh = self._strings, self._fresh
+        return [strings[ref - 1] if ref else next(fresh) for ref in refs]
+
+    def _get(self, count):
+        # Reads count varints. When the next count bytes are all below 0x80, each of them
+        # is a whole varint.
+        buffer = self._buffer
+        pos = self._pos
+        values = buffer[pos:pos + count]
+        if len(values) == count and (not count or max(values) < 0x80):
+            self._pos = pos + count
+            return list(values)
+
+        values = []
+        append = values.append
+        for _ in range(count):
+            byte = buffer[pos]
+            pos += 1
+            if byte < 0x80:
+                append(byte)
+                continue
+            value = byte & 0x7f
+            shift = 7
+            while True:
+                byte = buffer[pos]
+                pos += 1
+                value |= (byte & 0x7f) << shift
+                if byte < 0x80:
+                    break
+                shift += 7
+            append(value)
+        self._pos = pos
+        return values
+
+
+def _put(out, values):
+    for value in values:
+        while value >= 0x80:
+            out.append((value & 0x7f) | 0x80)
+            value >>= 7
+        out.append(value)
+
+
+def _zigzag(value):
+    return value << 1 if value >= 0 else (-value << 1) - 1
+
+
+def _unzigzag(value):
+    return (value >> 1) ^ -(value & 1)
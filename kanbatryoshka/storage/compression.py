@@ -0,0 +1,69 @@
+import bz2
+import gzip
+import io
+import lzma
+from contextlib import contextmanager
+
+# Files of either format may be compressed with a stdlib codec: saving picks it from the
+# name's last suffix (board.ktb.gz, board.json.xz), loading from the first bytes. The
+# codec objects stream in both directions, so a JSON nest is never held uncompressed.
+SUFFIXES = {'.gz': 'gzip', '.bz2': 'bz2', '.xz': 'lzma'}
+
+_MAGIC = {
+    b'\x1f\x8b': 'gzip',
+    b'BZh': 'bz2',
+    b'\xfd7zXZ\x00': 'lzma',
+}
+_SNIFF = max(map(len, _MAGIC))
+
+
+def codec_of(file_path):
+    for suffix, codec in SUFFIXES.items():
+        if str(file_path).lower().endswith(suffix):
+            return codec
+    return None
+
+
+def strip_suffix(file_path):
+    # The name of the file within, which tells its format.
+    file_path = str(file_path)
+    if codec_of(file_path) is not None:
+        return file_path[:file_path.rindex('.')]
+    return file_path
+
+
+def decompressed(raw):
+    # raw, a binary file, or a file reading what it holds uncompressed if its first
+    # bytes name a codec. raw is left open either way.
+    head = raw.read(_SNIFF)
+    raw.seek(0)
+    for magic, codec in _MAGIC.items():
+        if head.startswith(magic):
+            return _open(codec, raw, 'rb')
+    return raw
+
+
+@contextmanager
+def compressed(raw, file_path, text=False):
+    # Yields a file compressing into raw with the codec named by file_path, if any.
+    # text for a file taking str rather than bytes.
+    codec = codec_of(file_path)
+    f = raw if codec is None else _open(codec, raw, 'wb')
+    wrapper = io.TextIOWrapper(f, encoding='utf-8') if text else f
+    try:
+        yield wrapper
+    finally:
+        if f is not raw:
+            # Closing the codec writes its trailer, raw stays open.
+            wrapper.close()
+        elif wrapper is not raw:
+            wrapper.detach()
+
+
+def _open(codec, raw, mode):
+    if codec == 'gzip':
+        # mtime=0 keeps the bytes the same from one save of the same nest to the next.
+        return gzip.GzipFile(fileobj=raw, mode=mode, compresslevel=6, mtime=0)
+    if codec == 'bz2':
+        return bz2.BZ2File(raw, mode)
+    return lzma.LZMAFile(raw, mode)
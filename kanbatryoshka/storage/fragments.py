@@ -0,0 +1,101 @@
+from functools import partial
+from . import binary, jsonwriter
+from ..models.board import DEFAULT_LIST_TITLES
+from ..models import ordering
+
+# Saves encode a Snapshot one board at a time, each board into a fragment that does not
+# depend on the others: a board's FrozenBoard (models/snapshot.py) stays the same object
+# until the board or something below it changes, so a save only encodes the boards that
+# changed since the previous one, and their ancestors, and splices the fragments it kept
+# for the rest.
+#
+# Nested boards nobody has touched, with the default lists, no tasks and ids of their
+# own, are left out: their task keeps the board id, and the board is built again with
+# the same ids when something reaches it (Nest._rebuild_board).
+
+_DEFAULT_RANKS = tuple(i * ordering.RANK_STEP for i in range(1, len(DEFAULT_LIST_TITLES) + 1))
+
+
+def write_snapshot(f, header, snapshot, as_json, cache=None, sparse=None, progress=None):
+    # header is as for binary.write_file. sparse maps the ids of tasks to those of the
+    # untouched boards they had in the file loaded, and were never built since.
+    # progress(tasks_written, task_count) is called after each board. Without a cache,
+    # no fragment outlives its write.
+    cache = cache or FragmentCache(keep=False)
+    adopted = {internal_id for internal_id, _ in header['adopted']}
+    if as_json:
+        ext = jsonwriter.id_map(header).external
+        boards = cache.fragments(snapshot, partial(jsonwriter.encode_board, ext=ext), 'json',
+                                 sparse, adopted, progress)
+        jsonwriter.write_json(f, header, boards, ext)
+    else:
+        boards = cache.fragments(snapshot, binary.encode_board, 'binary',
+                                 sparse, adopted, progress)
+        binary.write_file(f, header, boards)
+
+
+class FragmentCache:
+    # The fragments of the last save, by board id, in one format. A save may run on
+    # another thread than the one editing the nest: it builds a new dict and swaps it in.
+    # Unless keep, it encodes every board and remembers nothing.
+    def __init__(self, keep=True):
+        self._keep = keep
+        self._format = None
+        self._entries = {}
+
+    def fragments(self, snapshot, encode, format, sparse=None, adopted=(), progress=None):
+        # Yields the fragment of every board of snapshot, parents before children.
+        entries = self._entries if format == self._format else {}
+        kept = {}
+        total = sum(board.total_task_count for board in snapshot.boards)
+        done = 0
+        stack = [(board, None, None) for board in reversed(snapshot.boards)]
+        while stack:
+            board, parent_board_id, parent_task_id = stack.pop()
+            entry = entries.get(board.id)
+            if entry is None or entry[0] is not board or entry[1] != (parent_board_id,
+                                                                      parent_task_id):
+                record, nested = board_record(board, parent_board_id, parent_task_id, sparse)
+                nested = tuple(child for child in nested if not untouched(child[0], adopted))
+                entry = (board, (parent_board_id, parent_task_id), encode(record), nested)
+            if self._keep:
+                kept[board.id] = entry
+            stack.extend(reversed(entry[3]))
+            yield entry[2]
+            if progress is not None:
+                done += board.task_count
+                progress(done, total)
+        if self._keep:
+            self._entries, self._format = kept, format
+
+
+def board_record(board, parent_board_id, parent_task_id, sparse=None):
+    # The record of a frozen board, see storage/binary.py, and the (board, parent board
+    # id, parent task id) of its nested boards. Parent ids follow from where boards sit.
+    sparse = sparse or {}
+    lists, nested = [], []
+    for list_obj, list_rank in zip(board.lists, board.list_ranks):
+        tasks = []
+        for task, rank in zip(list_obj.tasks, list_obj.ranks):
+            nested_board = task.board
+            if nested_board is not None:
+                nested_id = nested_board.id
+                nested.append((nested_board, board.id, task.id))
+            else:
+                nested_id = sparse.get(task.id)
+            tasks.append((task.id, task.title, task.description, rank, task.created_at,
+                          task.updated_at, nested_id, board.id))
+        lists.append((list_obj.id, list_obj.title, list_rank, list_obj.created_at, tasks))
+    record = (board.id, board.own_title, board.own_description, parent_board_id,
+              parent_task_id, board.created_at, board.updated_at, lists)
+    return record, tuple(nested)
+
+
+def untouched(board, adopted=()):
+    # Whether a nested board can be built again from its id alone, see Nest._rebuild_board.
+    if board.task_count or board.own_title is not None or board.own_description is not None:
+        return False
+    if board.list_ranks != _DEFAULT_RANKS or board.id in adopted:
+        return False
+    return all(list_obj.id == board.id + i and list_obj.title == title and list_obj.id not in adopted
+               for i, (list_obj, title) in enumerate(zip(board.lists, DEFAULT_LIST_TITLES), 1))
@@ -0,0 +1,104 @@
+import codecs
+import json
+import os
+import re
+
+# Pull parser for JSON files too large to hold as Python objects all at once. Callers walk
+# objects and arrays one level at a time with keys() and items(), and decode the values
+# they want whole with value(), which uses the json module's C decoder. Only the current
+# chunk of the file and the value being decoded are held in memory.
+CHUNK_SIZE = 1 << 20
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+class OutOfOrder(ValueError):
+    # A key that was needed earlier comes later in the file: streaming cannot go on.
+    pass
+
+
+class JsonReader:
+    def __init__(self, f, progress=None, chunk_size=CHUNK_SIZE):
+        # f is a binary file. progress, if given, is called with the bytes read so far
+        # and the size of the file after each chunk.
+        self._file = f
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._json = json.JSONDecoder()
+        self._progress = progress
+        self._chunk_size = chunk_size
+        self._total = os.fstat(f.fileno()).st_size
+        self._read = 0
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+
+    def keys(self):
+        # Yields the keys of the object starting here. The caller reads each key's
+        # value, with value(), keys() or items(), before asking for the next one.
+        self._expect('{')
+        if self._peek() == '}':
+            self._pos += 1
+            return
+        while True:
+            key = self.value()
+            if not isinstance(key, str):
+                raise ValueError(f"Expected a key near byte {self._read}")
+            self._expect(':')
+            yield key
+            if self._peek() != ',':
+                self._expect('}')
+                return
+            self._pos += 1
+
+    def items(self):
+        # Yields once per item of the array starting here, the caller reading the item.
+        self._expect('[')
+        if self._peek() == ']':
+            self._pos += 1
+            return
+        while True:
+            yield
+            if self._peek() != ',':
+                self._expect(']')
+                return
+            self._pos += 1
+
+    def value(self):
+        self._peek()
+        while True:
+            try:
+                value, end = self._json.raw_decode(self._buffer, self._pos)
+                # A number running to the end of the chunk may go on in the next one.
+                if end < len(self._buffer) or self._eof:
+                    self._pos = end
+                    return value
+            except ValueError:
+                if self._eof:
+                    raise
+            self._fill()
+
+    def _peek(self):
+        while True:
+            self._pos = _WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                raise ValueError("Unexpected end of JSON data")
+
+    def _expect(self, char):
+        if self._peek() != char:
+            raise ValueError(f"Expected {char!r} near byte {self._read}")
+        self._pos += 1
+
+    def _fill(self):
+        # Appends the next chunk to what is left of the buffer. False past the end.
+        if self._eof:
+            return False
+        data = self._file.read(self._chunk_size)
+        self._eof = not data
+        self._read += len(data)
+        self._buffer = self._buffer[self._pos:] + self._decoder.decode(data, final=self._eof)
+        self._pos = 0
+        if data and self._progress is not None:
+            self._progress(self._read, self._total)
+        return True
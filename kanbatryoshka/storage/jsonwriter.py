@@ -0,0 +1,70 @@
+import json
+from ..models.ids import IdMap
+from ..models.timestamps import to_datetime
+
+# Writes the layout of Nest.serialize() from board records (storage/fragments.py), one
+# board at a time, indented as json.dump(data, indent=2) would.
+_INDENT = '\n    '
+
+
+def id_map(header):
+    # The external ids of a save header, without touching the nest's own IdMap.
+    ids = IdMap(header['namespace'])
+    for internal_id, external_id in header['adopted']:
+        ids.bind(internal_id, external_id)
+    return ids
+
+
+def encode_board(record, ext):
+    board_id, title, description, parent_board_id, parent_task_id, _, _, lists = record
+    data = {
+        'id': ext(board_id),
+        'title': title,
+        'description': description,
+        'parent_board_id': ext(parent_board_id),
+        'parent_task_id': ext(parent_task_id),
+        'lists': [{
+            'id': ext(list_id),
+            'title': list_title,
+            'rank': rank,
+            'created_at': to_datetime(created_at).isoformat(),
+            'tasks': [{
+                'id': ext(task_id),
+                'title': task_title,
+                'description': task_description,
+                'rank': task_rank,
+                'created_at': to_datetime(task_created_at).isoformat(),
+                'updated_at': to_datetime(task_updated_at).isoformat(),
+                'parent_board_id': ext(task_parent_id),
+                'board_id': ext(nested_id),
+            } for task_id, task_title, task_description, task_rank, task_created_at,
+                task_updated_at, nested_id, task_parent_id in tasks]
+        } for list_id, list_title, rank, created_at, tasks in lists]
+    }
+    return json.dumps(data, indent=2, ensure_ascii=False).replace('\n', _INDENT)
+
+
+def write_json(f, header, boards, ext):
+    # header is as for binary.write_file, boards are encoded by encode_board().
+    current_board_id, navigation_stack, current_list_id, current_task_id = header['state']
+    after = {
+        'current_board_id': ext(current_board_id),
+        'navigation_stack': [[ext(i) for i in item] for item in navigation_stack],
+        'current_list_id': ext(current_list_id),
+        'current_task_id': ext(current_task_id),
+    }
+    if header.get('checkpoint') is not None:
+        after['checkpoint'] = header['checkpoint']
+
+    f.write(f'{{\n  "namespace": {json.dumps(header["namespace"])},\n'
+            f'  "next_id": {header["next_id"]},\n  "boards": [')
+    separator = _INDENT
+    for board in boards:
+        f.write(separator)
+        f.write(board)
+        separator = ',' + _INDENT
+    f.write('\n  ]' if separator != _INDENT else ']')
+    for key, value in after.items():
+        encoded = json.dumps(value, indent=2, ensure_ascii=False).replace('\n', '\n  ')
+        f.write(f',\n  "{key}": {encoded}')
+    f.write('\n}')
@@ -0,0 +1,372 @@
+import json
+import sqlite3
+from collections import OrderedDict
+from contextlib import contextmanager
+from ..models.board import Board
+from ..models.list import List
+from ..models.task import Task
+from ..models import ordering
+from ..models.ids import IdMap, reserve
+from ..models.snapshot import thaw
+
+MAGIC = b'SQLite format 3\x00'
+
+# Rows are keyed by the internal ids. Deleting a row deletes everything below it, and the
+# checks are deferred to the commit so a subtree can be inserted in any order. Each board
+# keeps its task counts, so a board not loaded yet still knows how big it is.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS external_ids (
+    id INTEGER PRIMARY KEY,
+    external TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS boards (
+    id INTEGER PRIMARY KEY,
+    parent_task INTEGER REFERENCES tasks(id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED,
+    title TEXT,
+    description TEXT,
+    parent_board_id INTEGER,
+    task_count INTEGER NOT NULL DEFAULT 0,
+    total_task_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS lists (
+    id INTEGER PRIMARY KEY,
+    board INTEGER NOT NULL REFERENCES boards(id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED,
+    title TEXT,
+    rank INTEGER,
+    created_at REAL
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY,
+    list INTEGER NOT NULL REFERENCES lists(id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED,
+    title TEXT,
+    description TEXT,
+    rank INTEGER,
+    created_at REAL,
+    updated_at REAL,
+    parent_board_id INTEGER
+);
+CREATE INDEX IF NOT EXISTS boards_by_task ON boards(parent_task);
+CREATE INDEX IF NOT EXISTS lists_by_board ON lists(board, rank);
+CREATE INDEX IF NOT EXISTS tasks_by_list ON tasks(list, rank);
+"""
+
+BOARD_COLUMNS = "b.id, b.title, b.description, b.parent_board_id, b.task_count, b.total_task_count"
+
+
+class _Unloaded(tuple):
+    pass
+
+
+# The lists of a board whose content is still in the database. Reading it gives an empty
+# board; changing it fails loudly instead of losing what the database holds.
+UNLOADED = _Unloaded()
+
+
+def is_database(file_path):
+    try:
+        with open(file_path, 'rb') as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+class SqliteStore:
+    # Database behind a Nest, see Nest.open_database(). Boards are read when first
+    # reached and kept in a LRU of at most cache_boards loaded boards. Like the write-ahead
+    # log, the store receives the redo call of every primitive change; it turns each into
+    # a few statements and commits once per transaction.
+    def __init__(self, file_path, cache_boards=256):
+        self.file_path = file_path
+        self.cache_boards = cache_boards
+        # Nothing ever needs a checkpoint, see Nest._sync_log().
+        self.size = 0
+
+        self._db = sqlite3.connect(file_path)
+        self._db.execute('PRAGMA foreign_keys = ON')
+        self._db.executescript(SCHEMA)
+
+        self._loaded = OrderedDict()
+        self._counts = {}
+        self._depth = 0
+        self._rebalances = ordering.rebalances
+
+    def close(self):
+        self._db.close()
+
+    def sync(self):
+        self._db.commit()
+
+#region Load
+
+    def open_ids(self):
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'namespace'").fetchone()
+        ids = IdMap(row[0] if row else None)
+        if row is None:
+            self._db.execute("INSERT INTO meta VALUES ('namespace', ?)", (ids.namespace,))
+            self._db.commit()
+        for internal_id, external_id in self._db.execute("SELECT id, external FROM external_ids"):
+            ids.bind(internal_id, external_id)
+
+        last = max(self._db.execute(f"SELECT coalesce(max(id), 0) FROM {table}").fetchone()[0]
+                   for table in ('boards', 'lists', 'tasks', 'external_ids'))
+        reserve(last + 1)
+        return ids
+
+    def state(self):
+        # The current board, navigation stack, current list and current task saved last.
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'state'").fetchone()
+        if row is None:
+            return None, [], None, None
+        board_id, navigation_stack, list_id, task_id = json.loads(row[0])
+        return board_id, [tuple(item) for item in navigation_stack], list_id, task_id
+
+    def root_boards(self):
+        return [self._stub(row) for row in self._db.execute(
+            f"SELECT {BOARD_COLUMNS} FROM boards b WHERE b.parent_task IS NULL ORDER BY b.id")]
+
+    def fill(self, board):
+        # Reads the lists and tasks of a board loaded as a stub. Returns False if the board
+        # was loaded already. The counts are not touched: the stub had them right.
+        if board.lists is not UNLOADED:
+            return False
+
+        lists = {}
+        for list_id, title, rank, created_at in self._db.execute(
+                "SELECT id, title, rank, created_at FROM lists WHERE board = ? ORDER BY rank",
+                (board.id,)):
+            list_obj = List(title)
+            list_obj.id, list_obj.rank, list_obj.created_at = list_id, rank, created_at
+            list_obj.owner = board
+            lists[list_id] = list_obj
+
+        tasks = {}
+        for task_id, list_id, title, description, rank, created_at, updated_at, parent in \
+                self._db.execute(
+                    "SELECT t.id, t.list, t.title, t.description, t.rank, t.created_at, "
+                    "t.updated_at, t.parent_board_id FROM tasks t JOIN lists l ON t.list = l.id "
+                    "WHERE l.board = ? ORDER BY t.list, t.rank", (board.id,)):
+            task = Task(title, description, parent)
+            task.id, task.rank = task_id, rank
+            task.created_at, task.updated_at = created_at, updated_at
+            list_obj = lists[list_id]
+            task.owner = list_obj
+            list_obj.tasks.append(task)
+            tasks[task_id] = task
+
+        for row in self._db.execute(
+                f"SELECT {BOARD_COLUMNS}, b.parent_task FROM boards b "
+                "JOIN tasks t ON b.parent_task = t.id JOIN lists l ON t.list = l.id "
+                "WHERE l.board = ?", (board.id,)):
+            nested = self._stub(row)
+            task = tasks[row[-1]]
+            nested.attach_task(task)
+            task._board = nested
+
+        board.lists = list(lists.values())
+        thaw(board)
+        self._loaded[board.id] = board
+        self._counts[board.id] = (board.task_count, board.total_task_count)
+        return True
+
+    def touch(self, board, pinned):
+        # Marks board as the most recently used and returns the boards to unload, the least
+        # recently used ones first. Boards in pinned stay.
+        self._loaded[board.id] = board
+        self._loaded.move_to_end(board.id)
+
+        evicted = []
+        for board_id in list(self._loaded):
+            if len(self._loaded) <= self.cache_boards:
+                break
+            if board_id not in pinned:
+                evicted.append(self._loaded.pop(board_id))
+        return evicted
+
+    def forget(self, boards_by_id):
+        # Drops the loaded boards that left the nest, e.g. those below an evicted board.
+        for board_id in [b for b in self._loaded if b not in boards_by_id]:
+            del self._loaded[board_id]
+
+    def _stub(self, row):
+        board_id, title, description, parent_board_id, task_count, total_task_count = row[:6]
+        board = Board(title, description, create_default_lists=False)
+        board.id = board_id
+        board.parent_board_id = parent_board_id
+        board.lists = UNLOADED
+        board.task_count = task_count
+        board.total_task_count = total_task_count
+        return board
+
+    def _fill_below(self, item):
+        # Reads everything below a subtree about to be deleted, so undoing the deletion
+        # can write it back. The subtree is detached, nothing gets indexed.
+        stack = [item]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, Task):
+                if item._board is not None:
+                    stack.append(item._board)
+            elif isinstance(item, List):
+                stack.extend(item.tasks)
+            else:
+                self.fill(item)
+                self._loaded.pop(item.id, None)
+                stack.extend(item.lists)
+
+#endregion Load
+
+#region Write
+
+    def export(self, ids, boards, state):
+        # Writes a fully loaded nest into an empty database.
+        self._db.execute("INSERT OR REPLACE INTO meta VALUES ('namespace', ?)", (ids.namespace,))
+        self._db.execute("INSERT OR REPLACE INTO meta VALUES ('state', ?)", (json.dumps(state),))
+        self._db.executemany("INSERT OR REPLACE INTO external_ids VALUES (?, ?)", ids.adopted())
+        for board in boards:
+            self._insert(board, None)
+        self._commit()
+
+    def save_state(self, state):
+        # state is as returned by state(). Navigating is no change: it is saved on its own.
+        self._db.execute("INSERT OR REPLACE INTO meta VALUES ('state', ?)", (json.dumps(state),))
+        self._db.commit()
+
+    def append(self, call):
+        name, *args = call
+        getattr(self, name)(*args)
+        if not self._depth:
+            self._commit()
+
+    @contextmanager
+    def transaction(self):
+        self._depth += 1
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            if not self._depth:
+                self._commit()
+
+    def _commit(self):
+        changed = []
+        for board_id, board in self._loaded.items():
+            counts = (board.task_count, board.total_task_count)
+            if self._counts.get(board_id) != counts:
+                self._counts[board_id] = counts
+                changed.append((*counts, board_id))
+        if changed:
+            self._db.executemany(
+                "UPDATE boards SET task_count = ?, total_task_count = ? WHERE id = ?", changed)
+        self._db.commit()
+
+    def _insert(self, item, parent_id):
+        boards, lists, tasks = [], [], []
+        stack = [(item, parent_id)]
+        while stack:
+            item, parent_id = stack.pop()
+            if isinstance(item, Task):
+                tasks.append((item.id, parent_id, item.title, item.description, item.rank,
+                              item._created_at, item._updated_at, item.parent_board_id))
+                if item._board is not None:
+                    stack.append((item._board, item.id))
+            elif isinstance(item, List):
+                lists.append((item.id, parent_id, item.title, item.rank, item._created_at))
+                stack.extend((task, item.id) for task in item.tasks)
+            else:
+                boards.append((item.id, parent_id, item._title, item._description,
+                               item.parent_board_id, item.task_count, item.total_task_count))
+                self._loaded[item.id] = item
+                self._counts[item.id] = (item.task_count, item.total_task_count)
+                stack.extend((list_obj, item.id) for list_obj in item.lists)
+
+        self._db.executemany("INSERT INTO boards VALUES (?, ?, ?, ?, ?, ?, ?)", boards)
+        self._db.executemany("INSERT INTO lists VALUES (?, ?, ?, ?, ?)", lists)
+        self._db.executemany("INSERT INTO tasks VALUES (?, ?, ?, ?, ?, ?, ?, ?)", tasks)
+
+    def _delete(self, table, items):
+        for item in items:
+            self._fill_below(item)
+        self._db.executemany(f"DELETE FROM {table} WHERE id = ?", [(item.id,) for item in items])
+
+    def _ranks(self, table, seq, always=False):
+        # A move writes one rank, unless it made the sequence rebalance.
+        if always or ordering.rebalances != self._rebalances:
+            self._rebalances = ordering.rebalances
+            self._db.executemany(f"UPDATE {table} SET rank = ? WHERE id = ?",
+                                 [(item.rank, item.id) for item in seq])
+
+    def _move(self, tasks, list_obj):
+        board_id = list_obj.owner.id
+        self._db.executemany(
+            "UPDATE tasks SET list = ?, rank = ?, parent_board_id = ? WHERE id = ?",
+            [(list_obj.id, task.rank, task.parent_board_id, task.id) for task in tasks])
+        self._db.executemany("UPDATE boards SET parent_board_id = ? WHERE id = ?",
+                             [(board_id, task._board.id) for task in tasks
+                              if task._board is not None])
+
+    # One method per primitive of the Nest, taking the arguments of its redo call.
+
+    def _attach_board(self, board):
+        self._insert(board, board.task.id if board.task is not None else None)
+
+    def _detach_board(self, board):
+        self._delete('boards', (board,))
+
+    def _attach_task_board(self, task, board):
+        self._insert(board, task.id)
+
+    def _attach_list(self, list_obj, board, index):
+        self._insert(list_obj, board.id)
+        self._ranks('lists', board.lists)
+
+    def _detach_list(self, list_obj):
+        self._delete('lists', (list_obj,))
+
+    def _place_list(self, list_obj, index):
+        self._db.execute("UPDATE lists SET rank = ? WHERE id = ?", (list_obj.rank, list_obj.id))
+        self._ranks('lists', list_obj.owner.lists)
+
+    def _rename_list(self, list_obj, title):
+        self._db.execute("UPDATE lists SET title = ? WHERE id = ?", (list_obj.title, list_obj.id))
+
+    def _attach_task(self, task, list_obj, index):
+        self._insert(task, list_obj.id)
+        self._ranks('tasks', list_obj.tasks)
+
+    def _detach_task(self, task):
+        self._delete('tasks', (task,))
+
+    def _place_task(self, task, list_obj, index):
+        self._move((task,), list_obj)
+        self._ranks('tasks', list_obj.tasks)
+
+    def _update_task(self, task, title, description, updated_at):
+        self._db.execute("UPDATE tasks SET title = ?, description = ?, updated_at = ? WHERE id = ?",
+                         (task.title, task.description, task._updated_at, task.id))
+
+    def _add_tasks(self, tasks, list_obj):
+        for task in tasks:
+            self._insert(task, list_obj.id)
+
+    def _remove_tasks(self, tasks):
+        self._delete('tasks', tasks)
+
+    def _insert_tasks(self, tasks, groups):
+        for task in tasks:
+            self._insert(task, task.owner.id)
+        for list_obj, _ in groups:
+            self._ranks('tasks', list_obj.tasks, always=True)
+
+    def _move_tasks(self, tasks, list_obj):
+        self._move(tasks, list_obj)
+
+    def _place_tasks(self, tasks, groups):
+        for list_obj, placed in groups:
+            self._move([task for _, task in placed], list_obj)
+            self._ranks('tasks', list_obj.tasks, always=True)
+
+#endregion Write
@@ -0,0 +1,262 @@
+import json
+import os
+from contextlib import contextmanager
+from .atomic import atomic_write
+from ..models.board import Board
+from ..models.list import List
+from ..models.task import Task
+from ..models.ids import reserve
+
+# The changes made since the last checkpoint, appended to <file>.wal as they happen.
+# The first line names the checkpoint the log follows, which the file records too.
+# Every other line is one transaction: a JSON array of the redo calls recorded by the
+# Nest primitives, with items referred to by external id. Items a call brings into the
+# nest are written out in full as rows, one per board, list and task of their subtree.
+# Calls placing items end with the ranks those items got, which replay gives them again.
+# A checkpoint written in the background is announced by a {"checkpoint": ...} line: a
+# file holding it replays only the transactions after that line.
+LOG_SUFFIX = '.wal'
+
+# Position of the argument holding the items a call brings into the nest.
+NEW_ITEMS = {
+    '_attach_board': 0,
+    '_attach_list': 0,
+    '_attach_task': 0,
+    '_attach_task_board': 1,
+    '_add_tasks': 0,
+    '_insert_tasks': 0,
+}
+
+# Calls placing the list or task, or tasks, of their first argument.
+PLACES = {'_attach_list', '_attach_task', '_place_list', '_place_task',
+          '_add_tasks', '_insert_tasks', '_move_tasks', '_place_tasks'}
+
+
+class WriteAheadLog:
+    def __init__(self, nest, file_path, checkpoint):
+        self.file_path = file_path
+        self.checkpoint = checkpoint
+        self._external_id = nest.external_id
+        self._pending = []
+        self._depth = 0
+        self._mark = None
+
+        # Starting a log drops whatever the previous one held: it is in the checkpoint.
+        self._file = open(file_path + LOG_SUFFIX, 'w', encoding='utf-8')
+        self._file.write(json.dumps({'checkpoint': checkpoint}) + '\n')
+        self.sync()
+        self.size = self._file.tell()
+
+    def append(self, call):
+        name, *args = call
+        new = NEW_ITEMS.get(name)
+        entry = [name] + [self._rows(arg) if i == new else self._ref(arg)
+                          for i, arg in enumerate(args)]
+        if name in PLACES:
+            entry.append({'ranks': [item.rank for item in _items(args[0])]})
+        self._pending.append(entry)
+        if not self._depth:
+            self._write()
+
+    @contextmanager
+    def transaction(self):
+        self._depth += 1
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            if not self._depth and self._pending:
+                self._write()
+
+    def mark(self, checkpoint):
+        # Announces a checkpoint whose file is yet to be written.
+        if self._depth:
+            raise RuntimeError("Cannot start a checkpoint inside a transaction")
+        self._write_line(json.dumps({'checkpoint': checkpoint}) + '\n')
+        self.sync()
+        self._mark = (checkpoint, self._file.tell())
+
+    def rotate(self, checkpoint):
+        # Once the marked checkpoint is on disk, starts over from it: the log keeps only
+        # the transactions after the mark. The old log stays valid until it is replaced.
+        if self._mark is None or self._mark[0] != checkpoint:
+            return
+        self._file.close()
+        with open(self.file_path + LOG_SUFFIX, 'rb') as f:
+            f.seek(self._mark[1])
+            tail = f.read()
+        header = (json.dumps({'checkpoint': checkpoint}) + '\n').encode('utf-8')
+        try:
+            with atomic_write(self.file_path + LOG_SUFFIX, 'wb') as f:
+                f.write(header)
+                f.write(tail)
+            self.checkpoint = checkpoint
+            self.size = len(header) + len(tail)
+            self._mark = None
+        finally:
+            self._file = open(self.file_path + LOG_SUFFIX, 'a', encoding='utf-8')
+
+    def sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+    def discard(self):
+        self.close()
+        os.remove(self.file_path + LOG_SUFFIX)
+
+    def _write(self):
+        line = json.dumps(self._pending, ensure_ascii=False, separators=(',', ':')) + '\n'
+        self._pending = []
+        self._write_line(line)
+
+    def _write_line(self, line):
+        self._file.write(line)
+        self._file.flush()
+        self.size += len(line.encode('utf-8'))
+
+    def _ref(self, value):
+        if isinstance(value, (Board, List, Task)):
+            return {'id': self._external_id(value.id)}
+        if isinstance(value, (list, tuple)):
+            return [self._ref(v) for v in value]
+        return value
+
+    def _rows(self, value):
+        if isinstance(value, (list, tuple)):
+            return [self._rows(v) for v in value]
+
+        # Pre-order, each row names its parent, which always comes first. The top item
+        # has no parent: the call itself says where it goes.
+        ext = self._external_id
+        rows = []
+        stack = [(value, None)]
+        while stack:
+            item, parent = stack.pop()
+            item_id = ext(item.id)
+            if isinstance(item, Task):
+                rows.append(['t', item_id, parent, item.title, item.description,
+                             item._created_at, item._updated_at, ext(item.parent_board_id),
+                             item.rank])
+                if item._board is not None:
+                    stack.append((item._board, item_id))
+            elif isinstance(item, List):
+                rows.append(['l', item_id, parent, item.title, item._created_at, item.rank])
+                stack.extend((task, item_id) for task in reversed(item.tasks))
+            else:
+                rows.append(['b', item_id, parent, item._title, item._description,
+                             ext(item.parent_board_id), ext(item.parent_task_id)])
+                stack.extend((list_obj, item_id) for list_obj in reversed(item.lists))
+        return rows
+
+
+def replay_log(nest, file_path, checkpoint):
+    # Applies the transactions logged after the given checkpoint and returns how many
+    # there were. A log left by another checkpoint is stale and ignored, and so is a
+    # last line cut short by a crash.
+    try:
+        f = open(file_path + LOG_SUFFIX, 'r', encoding='utf-8')
+    except FileNotFoundError:
+        return 0
+
+    reader = _Reader(nest)
+    replayed = 0
+    with f:
+        header = f.readline()
+        try:
+            replaying = json.loads(header).get('checkpoint') == checkpoint
+        except ValueError:
+            return 0
+
+        for line in f:
+            if not line.endswith('\n'):
+                break
+            try:
+                calls = json.loads(line)
+            except ValueError:
+                break
+            if isinstance(calls, dict):
+                replaying = replaying or (checkpoint is not None and
+                                          calls.get('checkpoint') == checkpoint)
+            elif replaying:
+                nest._replay(reader.calls(calls))
+                replayed += 1
+
+    reserve(reader.last_id + 1)
+    return replayed
+
+
+class _Reader:
+    def __init__(self, nest):
+        self._nest = nest
+        self._adopt = nest._ids.adopt
+        self._items = {}
+        self.last_id = 0
+
+    def calls(self, calls):
+        # Each call, followed by the one ranking what it placed as logged.
+        for call in calls:
+            name, *args = call
+            ranks = args.pop()['ranks'] if name in PLACES else None
+            call = self.call(name, args)
+            yield call
+            if ranks is not None:
+                yield ('_rerank', list(_items(call[1])), ranks)
+
+    def call(self, name, args):
+        new = NEW_ITEMS.get(name)
+        self._items = {}
+        # New items first, the other arguments may refer to them.
+        if new is not None:
+            args[new] = self._build(args[new])
+        return (name, *[arg if i == new else self._resolve(arg) for i, arg in enumerate(args)])
+
+    def _resolve(self, value):
+        if isinstance(value, dict):
+            item_id = self._nest.internal_id(value['id'])
+            item = self._items.get(item_id)
+            return item if item is not None else self._nest._get_item(item_id)
+        if isinstance(value, list):
+            return [self._resolve(v) for v in value]
+        return value
+
+    def _build(self, rows):
+        if not rows or isinstance(rows[0][0], list):
+            return [self._build(r) for r in rows]
+
+        adopt = self._adopt
+        built = {}
+        for row in rows:
+            kind, item_id, parent = row[0], adopt(row[1]), row[2]
+            if kind == 't':
+                item = Task(row[3], row[4], adopt(row[7]))
+                item.created_at, item.updated_at = row[5], row[6]
+            elif kind == 'l':
+                item = List(row[3])
+                item.created_at = row[4]
+            else:
+                item = Board(row[3], row[4], create_default_lists=False)
+                item.parent_board_id = adopt(row[5])
+                item.parent_task_id = adopt(row[6])
+            item.id = item_id
+            built[row[1]] = item
+            self._items[item_id] = item
+            self.last_id = max(self.last_id, item_id)
+
+            if parent is None:
+                top = item
+            elif kind == 't':
+                built[parent].add_task(item)
+                item.rank = row[8]
+            elif kind == 'l':
+                built[parent].add_list(item)
+                item.rank = row[5]
+            else:
+                built[parent].board = item
+        return top
+
+
+def _items(value):
+    return value if isinstance(value, (list, tuple)) else (value,)
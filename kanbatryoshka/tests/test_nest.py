@@ -1,8 +1,16 @@
+import json
+import os
 import pytest
+import shutil
+from datetime import datetime
 from kanbatryoshka.models.board import Board
 from kanbatryoshka.models.list import List
 from kanbatryoshka.models.task import Task
 from kanbatryoshka.models.nest import Nest
+from kanbatryoshka.models.query import ListTitle, CreatedAfter, CreatedBefore, MaxDepth, Under
+from kanbatryoshka.models.snapshot import diff, iter_tasks
+from kanbatryoshka.storage.jsonstream import JsonReader
+from kanbatryoshka.storage.wal import replay_log
 
 #region Task
 
@@ -16,6 +24,22 @@ def test_task_creation():
     assert task.updated_at is not None
     assert task.board is not None
 
+def test_task_board_title_follows_task():
+    task = Task("Test Task Title", "Test Task Description")
+    assert task.board.title == "Board: Test Task Title"
+    assert task.board.description == "Board for task: Test Task Description"
+
+    task.update("Renamed", "Changed")
+    assert task.board.title == "Board: Renamed"
+    assert task.board.description == "Board for task: Changed"
+
+def test_task_timestamps_are_datetimes():
+    task = Task("Test Task Title")
+    assert isinstance(task.created_at, datetime)
+    created_at = task.created_at
+    task.created_at = created_at
+    assert task.created_at == created_at
+
 #endregion Task
 
 #region List
@@ -28,6 +52,14 @@ def test_list_creation():
     assert list.created_at is not None
     assert len(list.tasks) == 0
 
+def test_default_list_titles_are_shared():
+    first = Board("First Board")
+    second = Board("Second Board")
+    restored = List("".join(["To ", "Do"]))
+
+    assert first.lists[0].title is second.lists[0].title
+    assert restored.title is first.lists[0].title
+
 def test_add_task():
     list = List("Test List Title")
     task = Task("Test Task Title")
@@ -94,7 +126,7 @@ def test_create_board(nest):
     board = nest.create_board("Test Board Title", "Test Board Description")
 
     assert len(nest.boards) == 1
-    assert nest.boards[0] == board
+    assert list(nest.boards) == [board]
     assert board.title == "Test Board Title"
     assert board.description == "Test Board Description"
 
@@ -181,6 +213,48 @@ def test_move_task_between_lists(nest):
     assert len(board.lists[1].tasks) == 1
     assert board.lists[1].tasks[0].title == "Task to Move"
 
+def test_reorder_task_in_list(nest):
+    board = nest.create_board("Test Board")
+    nest.select_board(board.id)
+    list_obj = board.lists[0]
+    tasks = [nest.add_task_to_list(list_obj.id, f"Task {i}") for i in range(4)]
+    ranks = {t.id: t.rank for t in tasks}
+
+    assert nest.reorder_task_in_list(list_obj.id, tasks[3].id, 1) is True
+    assert [t.title for t in list_obj.tasks] == ["Task 0", "Task 3", "Task 1", "Task 2"]
+    assert [t.rank for t in list_obj.tasks] == sorted(t.rank for t in list_obj.tasks)
+    assert all(t.rank == ranks[t.id] for t in tasks[:3])
+
+    assert nest.reorder_task_in_list(list_obj.id, tasks[0].id, 10) is True
+    assert [t.title for t in list_obj.tasks] == ["Task 3", "Task 1", "Task 2", "Task 0"]
+
+def test_ranks_rebalance_when_gap_is_exhausted():
+    list_obj = List("Test List Title")
+    first = list_obj.add_task(Task("First"))
+    last = list_obj.add_task(Task("Last"))
+    for i in range(40):
+        list_obj.add_task(Task(f"Inserted {i}"), 1)
+
+    assert list_obj.tasks[0] is first
+    assert list_obj.tasks[-1] is last
+    assert [t.title for t in list_obj.tasks[1:3]] == ["Inserted 39", "Inserted 38"]
+    ranks = [t.rank for t in list_obj.tasks]
+    assert ranks == sorted(set(ranks))
+
+def test_move_list_in_current_board(nest):
+    board = nest.create_board("Test Board")
+    nest.select_board(board.id)
+    done = board.lists[2]
+
+    assert nest.move_list_in_current_board(done.id, 0) is True
+    assert [l.title for l in board.lists] == ["Done", "To Do", "In Progress"]
+
+    restored = Nest()
+    restored.deserialize(nest.serialize())
+    restored_board = restored.get_board_by_id(board.id)
+    assert [l.title for l in restored_board.lists] == ["Done", "To Do", "In Progress"]
+    assert [l.rank for l in restored_board.lists] == [l.rank for l in board.lists]
+
 def test_get_board_path(nest):
     main_board = nest.create_board("Main Board")
     nest.select_board(main_board.id)
@@ -218,4 +292,1138 @@ def test_get_board_path(nest):
     path = nest.get_board_path()
     assert len(path) == 1   
 
-#endregion Nest
\ No newline at end of file
+def test_board_path_cache_follows_renames(nest):
+    main_board = nest.create_board("Main Board")
+    nest.select_board(main_board.id)
+    list_id = main_board.lists[0].id
+    task = nest.add_task_to_list(list_id, "Test Task")
+    nest.navigate_to_task_board(list_id, task.id)
+    sublist_id = nest.current_board.lists[0].id
+    subtask = nest.add_task_to_list(sublist_id, "Subtask")
+    nest.navigate_to_task_board(sublist_id, subtask.id)
+
+    assert nest.get_board_path() == ["Main Board", "Board: Test Task", "Board: Subtask"]
+    assert nest.current_board.path() is nest.current_board.path()
+
+    task.update("Renamed Task")
+    main_board.title = "Renamed Board"
+    assert nest.get_board_path() == ["Renamed Board", "Board: Renamed Task", "Board: Subtask"]
+
+def test_index_follows_mutations(nest):
+    board = nest.create_board("Main Board")
+    nest.select_board(board.id)
+    source_list = board.lists[0]
+    target_list = board.lists[1]
+
+    task = nest.add_task_to_list(source_list.id, "Indexed Task")
+    assert nest.get_task_by_id(task.id) is task
+    assert nest.get_list_of_task(task.id) is source_list
+    assert nest.get_board_of_list(source_list.id) is board
+
+    nest.move_task_between_lists(task.id, source_list.id, target_list.id)
+    assert nest.get_list_of_task(task.id) is target_list
+
+    nest.remove_task_from_list(target_list.id, task.id)
+    assert nest.get_task_by_id(task.id) is None
+    assert nest.get_list_of_task(task.id) is None
+
+    nest.remove_list_from_current_board(target_list.id)
+    assert nest.get_list_by_id(target_list.id) is None
+
+def test_index_rebuilt_on_deserialize(nest):
+    board = nest.create_board("Main Board")
+    nest.select_board(board.id)
+    list_id = board.lists[0].id
+    task = nest.add_task_to_list(list_id, "Saved Task")
+    nest.navigate_to_task_board(list_id, task.id)
+    nest.back_to_parent()
+
+    restored = Nest()
+    assert restored.deserialize(nest.serialize()) is True
+
+    assert restored.get_board_by_id(board.id).title == "Main Board"
+    assert restored.get_list_of_task(task.id).id == list_id
+    assert restored.navigate_to_task_board(list_id, task.id) is True
+    assert restored.get_current_board().id == task.board.id
+
+def test_task_board_created_lazily(nest):
+    board = nest.create_board("Main Board")
+    nest.select_board(board.id)
+    list_id = board.lists[0].id
+
+    task = nest.add_task_to_list(list_id, "Lazy Task", "Lazy Description")
+    assert len(nest.boards) == 1
+    assert task.get_nested_board(create=False) is None
+    assert nest.task_has_subtasks(task.id) is False
+    assert nest.serialize()['boards'][0]['lists'][0]['tasks'][0]['board_id'] is None
+
+    nest.navigate_to_task_board(list_id, task.id)
+    assert len(nest.boards) == 2
+    assert nest.get_current_board() is task.get_nested_board(create=False)
+    assert nest.get_current_board().title == "Board: Lazy Task"
+    assert nest.get_current_board().parent_task_id == task.id
+
+    subtask = nest.add_task_to_list(nest.current_board.lists[0].id, "Subtask")
+    assert subtask.parent_board_id == task.board.id
+    assert nest.task_has_subtasks(task.id) is True
+
+def test_subtask_counts_follow_mutations(nest):
+    board = nest.create_board("Main Board")
+    nest.select_board(board.id)
+    list_id = board.lists[0].id
+    task = nest.add_task_to_list(list_id, "Parent")
+    other = nest.add_task_to_list(list_id, "Other")
+    assert board.task_count == 2
+    assert board.total_task_count == 2
+
+    nest.navigate_to_task_board(list_id, task.id)
+    sublist_id = nest.current_board.lists[0].id
+    subtask = nest.add_task_to_list(sublist_id, "Subtask")
+    nest.navigate_to_task_board(sublist_id, subtask.id)
+    nest.add_task_to_list(nest.current_board.lists[1].id, "Leaf")
+    nest.back_to_parent()
+    nest.back_to_parent()
+
+    assert nest.task_has_subtasks(task.id) is True
+    assert nest.task_has_subtasks(other.id) is False
+    assert nest.subtask_count(task.id) == 2
+    assert board.task_count == 2
+    assert board.total_task_count == 4
+
+    nest.move_task_between_lists(task.id, list_id, board.lists[2].id)
+    assert board.total_task_count == 4
+
+    nest.remove_task_from_list(board.lists[2].id, task.id)
+    assert board.task_count == 1
+    assert board.total_task_count == 1
+
+def test_subtask_counts_rebuilt_on_deserialize(nest):
+    board = nest.create_board("Main Board")
+    nest.select_board(board.id)
+    list_id = board.lists[0].id
+    task = nest.add_task_to_list(list_id, "Parent")
+    nest.navigate_to_task_board(list_id, task.id)
+    nest.add_task_to_list(nest.current_board.lists[0].id, "Subtask")
+
+    restored = Nest()
+    restored.deserialize(nest.serialize())
+
+    restored_board = restored.get_board_by_id(board.id)
+    assert restored_board.total_task_count == 2
+    assert restored.task_has_subtasks(task.id) is True
+
+def _build_chain(depth):
+    root = Board("Root")
+    board = root
+    for level in range(depth):
+        task = board.lists[0].add_task(Task(f"Level {level}"))
+        board = task.board
+    return root
+
+def test_walk_handles_deep_hierarchies(nest):
+    root = _build_chain(1500)
+    nest.add_board(root)
+
+    depths = [depth for depth, _, _, _ in nest.walk(root)]
+    assert len(depths) == 1500
+    assert depths[-1] == 1499
+    assert nest.get_task_by_id(root.lists[0].tasks[0].id).title == "Level 0"
+
+def test_walk_orders_depth_limit_and_pruning(nest):
+    board = nest.create_board("Main Board")
+    nest.select_board(board.id)
+    list_id = board.lists[0].id
+    first = nest.add_task_to_list(list_id, "First")
+    nest.add_task_to_list(list_id, "Second")
+    nest.navigate_to_task_board(list_id, first.id)
+    nest.add_task_to_list(nest.current_board.lists[0].id, "Nested")
+    nest.back_to_parent()
+
+    assert [t.title for _, _, _, t in nest.walk()] == ["First", "Nested", "Second"]
+    assert [t.title for _, _, _, t in nest.walk(order="bfs")] == ["First", "Second", "Nested"]
+    assert [t.title for _, _, _, t in nest.walk(max_depth=0)] == ["First", "Second"]
+
+    pruned = nest.walk(prune=lambda depth, b, l, t: t.title == "First")
+    assert [t.title for _, _, _, t in pruned] == ["First", "Second"]
+
+    with pytest.raises(ValueError):
+        nest.walk(order="sideways")
+
+def test_bulk_operations_notify_once(nest):
+    board = nest.create_board("Main Board")
+    nest.select_board(board.id)
+    source_id = board.lists[0].id
+    target_id = board.lists[1].id
+    changes = []
+    nest.add_listener(lambda kind, details: changes.append(kind))
+
+    tasks = nest.add_tasks(source_id, ["First", ("Second", "With description")])
+    assert [t.title for t in board.lists[0].tasks] == ["First", "Second"]
+    assert tasks[1].description == "With description"
+    assert board.task_count == 2
+
+    assert nest.move_tasks([t.id for t in tasks], target_id) is True
+    assert len(board.lists[0].tasks) == 0
+    assert nest.get_list_of_task(tasks[0].id).id == target_id
+
+    assert nest.update_tasks({tasks[0].id: {'title': "Renamed"}}) is True
+    assert tasks[0].title == "Renamed"
+
+    assert nest.remove_tasks([tasks[0].id, "missing"]) is False
+    assert len(board.lists[1].tasks) == 2
+
+    assert nest.remove_tasks([t.id for t in tasks]) is True
+    assert board.task_count == 0
+    assert nest.get_task_by_id(tasks[0].id) is None
+
+    assert changes == ["tasks_added", "tasks_moved", "tasks_updated", "tasks_removed"]
+
+def test_move_tasks_refuses_cycles(nest):
+    board = nest.create_board("Main Board")
+    nest.select_board(board.id)
+    list_id = board.lists[0].id
+    task = nest.add_task_to_list(list_id, "Parent")
+    nest.navigate_to_task_board(list_id, task.id)
+    nested_list_id = nest.current_board.lists[0].id
+
+    assert nest.move_tasks([task.id], nested_list_id) is False
+    assert nest.get_list_of_task(task.id).id == list_id
+
+def _nested_nest(nest):
+    board = nest.create_board("Main Board")
+    nest.select_board(board.id)
+    list_id = board.lists[0].id
+    parent = nest.add_task_to_list(list_id, "Parent")
+    nest.navigate_to_task_board(list_id, parent.id)
+    child = nest.add_task_to_list(nest.current_board.lists[0].id, "Child")
+    nest.navigate_to_task_board(nest.current_board.lists[0].id, child.id)
+    leaf = nest.add_task_to_list(nest.current_board.lists[1].id, "Leaf")
+    nest.back_to_parent()
+    nest.back_to_parent()
+    return board, parent, child, leaf
+
+def test_remove_task_drops_its_subtree(nest):
+    board, parent, child, leaf = _nested_nest(nest)
+    assert len(nest.boards) == 3
+
+    assert nest.remove_task_from_list(board.lists[0].id, parent.id) is True
+    assert len(nest.boards) == 1
+    assert nest.get_task_by_id(child.id) is None
+    assert nest.get_board_by_id(child.board.id) is None
+    assert board.total_task_count == 0
+
+def test_delete_task_leaves_removed_boards(nest):
+    board, parent, child, leaf = _nested_nest(nest)
+    nest.navigate_to_task_board(board.lists[0].id, parent.id)
+    nest.navigate_to_task_board(parent.board.lists[0].id, child.id)
+
+    assert nest.delete_task(parent.id) is True
+    assert nest.get_current_board() is board
+    assert nest.navigation_stack == []
+
+def test_move_task_across_boards(nest):
+    board, parent, child, leaf = _nested_nest(nest)
+    other = nest.add_task_to_list(board.lists[1].id, "Other")
+    nest.navigate_to_task_board(board.lists[1].id, other.id)
+    nest.back_to_parent()
+
+    assert nest.move_task(child.id, other.board.lists[2].id) is True
+    assert child.board.path() == ("Main Board", "Board: Other", "Board: Child")
+    assert child.parent_board_id == other.board.id
+    assert nest.subtask_count(parent.id) == 0
+    assert nest.subtask_count(other.id) == 2
+    assert board.total_task_count == 4
+
+    assert nest.move_task(other.id, child.board.lists[0].id) is False
+
+def test_clone_task_copies_the_subtree(nest):
+    board, parent, child, leaf = _nested_nest(nest)
+
+    clone = nest.clone_task(parent.id)
+    assert [t.title for t in board.lists[0].tasks] == ["Parent", "Parent"]
+    assert clone.id != parent.id
+    assert nest.subtask_count(clone.id) == 2
+    assert board.total_task_count == 6
+    assert len(nest.boards) == 5
+
+    cloned_child = clone.board.lists[0].tasks[0]
+    assert cloned_child.title == "Child"
+    assert cloned_child.board.lists[1].tasks[0].title == "Leaf"
+    assert cloned_child.board.path() == ("Main Board", "Board: Parent", "Board: Child")
+    assert nest.get_task_by_id(cloned_child.id) is cloned_child
+
+    nest.update_task(clone.id, "Copy")
+    assert parent.board.title == "Board: Parent"
+
+def test_compact_reclaims_orphans(nest):
+    board, parent, child, leaf = _nested_nest(nest)
+    board.lists[0].remove_task(parent.id)
+    assert nest.orphan_ratio() == 1.0
+
+    report = nest.compact()
+    assert report == {"boards": 2, "lists": 6, "tasks": 3}
+    assert len(nest.boards) == 1
+    assert nest.get_task_by_id(leaf.id) is None
+    assert nest.orphan_ratio() == 0.0
+    assert nest.compact() == {"boards": 0, "lists": 0, "tasks": 0}
+
+def test_save_compacts_past_threshold(nest, tmp_path):
+    board, parent, child, leaf = _nested_nest(nest)
+    nest.add_tasks(board.lists[1].id, [f"Task {i}" for i in range(20)])
+    board.lists[0].remove_task(parent.id)
+    assert nest.orphan_ratio() < nest.COMPACT_THRESHOLD
+
+    nest.save_to_file(tmp_path / "small.ktb")
+    assert len(nest.boards) == 3
+
+    board.remove_list(board.lists[1].id)
+    nest.save_to_file(tmp_path / "large.ktb")
+    assert len(nest.boards) == 1
+
+def test_load_streams_the_file(nest, tmp_path):
+    path = tmp_path / "board.json"
+    board, parent, child, leaf = _nested_nest(nest)
+    nest.add_tasks(board.lists[1].id, [f"Tâche {i} ✓" for i in range(50)])
+    nest.navigate_to_task_board(board.lists[0].id, parent.id)
+    assert nest.save_to_file(path) is True
+
+    seen = []
+    restored = Nest()
+    assert restored.load_from_file(path, progress=lambda done, total: seen.append((done, total))) is True
+    assert seen[-1] == (path.stat().st_size, path.stat().st_size)
+    assert _contents(restored) == _contents(nest)
+    assert restored.current_board.id == parent.board.id
+
+    # Values cut by chunk boundaries are read again with the next chunk.
+    with open(path, 'rb') as f:
+        data = Nest()._read_stream(JsonReader(f, chunk_size=7))
+    assert data['current_board_id'] == nest.external_id(parent.board)
+
+    # Timestamps stay as read until something needs them.
+    task = restored.get_task_by_id(leaf.id)
+    assert isinstance(task._created, str)
+    assert task.created_at == leaf.created_at and task.updated_at == leaf.updated_at
+    assert isinstance(task._created, float)
+
+    # Keys out of the order save writes them fall back to a full load.
+    out_of_order = json.loads(path.read_text(encoding='utf-8'))
+    out_of_order['namespace'] = out_of_order.pop('namespace')
+    path.write_text(json.dumps(out_of_order), encoding='utf-8')
+    assert restored.load_from_file(path) is True
+    assert _contents(restored) == _contents(nest)
+
+def test_truncated_json_keeps_the_open_nest(nest, tmp_path):
+    board, parent, child, leaf = _nested_nest(nest)
+    nest.navigate_to_task_board(board.lists[0].id, parent.id)
+    path = tmp_path / "board.json"
+    assert nest.open_log(str(path)) is True
+    text = path.read_text(encoding='utf-8')
+    truncated = tmp_path / "truncated.json"
+    truncated.write_text(text[:len(text) // 2], encoding='utf-8')
+    before = _contents(nest)
+
+    assert nest.load_from_file(truncated) is False
+    assert nest.open_log(str(truncated)) is False
+    assert _contents(nest) == before
+    assert nest.current_board is parent.board
+    assert nest.log_path == str(path)
+
+def test_binary_files_round_trip(nest, tmp_path):
+    board, parent, child, leaf = _nested_nest(nest)
+    tasks = nest.add_tasks(board.lists[1].id, [f"Task {i}" for i in range(30)])
+    nest.reorder_task_in_list(board.lists[1].id, tasks[-1].id, 1)
+    nest.move_task(leaf.id, board.lists[2].id, 0)
+    nest.navigate_to_task_board(board.lists[0].id, parent.id)
+
+    # A legacy file: every id is an adopted UUID.
+    data = nest.serialize()
+    del data['namespace']
+    legacy = Nest()
+    assert legacy.deserialize(data) is True
+
+    for source in (nest, legacy):
+        assert source.save_to_file(tmp_path / "board.ktb") is True
+        assert source.save_to_file(tmp_path / "board.json") is True
+        binary = (tmp_path / "board.ktb").read_bytes()
+        assert binary.startswith(b"\x00KTB")
+        assert len(binary) * 5 < (tmp_path / "board.json").stat().st_size
+
+        restored = Nest()
+        assert restored.load_from_file(tmp_path / "board.ktb") is True
+        assert _contents(restored) == _contents(source)
+        expected, actual = source.serialize(), restored.serialize()
+        del expected['next_id'], actual['next_id']
+        assert actual == expected
+
+def test_damaged_binary_file_keeps_the_open_nest(nest, tmp_path):
+    board, parent, child, leaf = _nested_nest(nest)
+    nest.add_tasks(board.lists[1].id, [f"Task {i}" for i in range(30)])
+    path = tmp_path / "board.ktb"
+    assert nest.save_to_file(path) is True
+    binary = path.read_bytes()
+    before = _contents(nest)
+
+    damaged = tmp_path / "damaged.ktb"
+    for data in (binary[:len(binary) // 2], binary[:-1], binary[:-40] + b"\xff" * 40):
+        damaged.write_bytes(data)
+        assert nest.load_from_file(damaged) is False
+        assert _contents(nest) == before
+        assert nest.current_board is board
+
+def test_saves_encode_changed_boards_only(nest, tmp_path):
+    board, parent, child, leaf = _nested_nest(nest)
+    other = nest.create_board("Other")
+    for path in (tmp_path / "board.ktb", tmp_path / "board.json"):
+        assert nest.save_to_file(path) is True
+        before = dict(nest._fragments._entries)
+        nest.add_task_to_list(board.lists[1].id, f"Task {path.suffix}")
+        assert nest.save_to_file(path) is True
+
+        after = nest._fragments._entries
+        assert after[board.id] is not before[board.id]
+        for unchanged in (other, parent.board, child.board):
+            assert after[unchanged.id] is before[unchanged.id]
+        restored = Nest()
+        assert restored.load_from_file(path) is True
+        assert _contents(restored) == _contents(nest)
+
+def test_untouched_nested_boards_are_left_out(nest, tmp_path):
+    board = nest.create_board("Main Board")
+    nest.select_board(board.id)
+    list_id = board.lists[0].id
+    tasks = nest.add_tasks(list_id, [f"Task {i}" for i in range(20)])
+    for task in tasks:
+        nest.navigate_to_task_board(list_id, task.id)
+        nest.back_to_parent()
+    nest.navigate_to_task_board(list_id, tasks[0].id)
+    empty = nest.current_board
+    path = str(tmp_path / "board.ktb")
+    assert nest.open_log(path) is True
+
+    for name in (path, str(tmp_path / "board.json")):
+        restored = Nest()
+        assert restored.load_from_file(name) is True
+        assert len(restored.boards) == 2
+        assert restored.current_board.id == empty.id
+        assert [l.id for l in restored.current_board.lists] == [l.id for l in empty.lists]
+        assert restored.serialize()["boards"] == nest.serialize()["boards"]
+        nest.save_to_file(str(tmp_path / "board.json"))
+
+    # Changes logged to a board the file left out replay onto the board built again.
+    nest.back_to_parent()
+    nest.navigate_to_task_board(list_id, tasks[5].id)
+    nested = nest.current_board
+    nest.add_task_to_list(nested.lists[1].id, "Subtask")
+    restored = Nest()
+    assert restored.open_log(path) is True
+    assert _contents(restored) == _contents(nest)
+    assert restored.get_board_by_id(nested.id).lists[1].tasks[0].title == "Subtask"
+
+@pytest.mark.parametrize("suffix", [".gz", ".bz2", ".xz"])
+def test_compressed_files_round_trip(nest, tmp_path, suffix):
+    board, parent, child, leaf = _nested_nest(nest)
+    nest.add_tasks(board.lists[1].id, [f"Tâche {i}" for i in range(200)])
+    for name in ("board.json", "board.ktb"):
+        plain, path = tmp_path / name, tmp_path / (name + suffix)
+        assert nest.save_to_file(plain) is True
+        assert nest.save_to_file(path) is True
+        assert path.stat().st_size < plain.stat().st_size
+
+        # The codec is told from the first bytes, whatever the name.
+        renamed = tmp_path / "renamed"
+        renamed.write_bytes(path.read_bytes())
+        seen = []
+        restored = Nest()
+        assert restored.load_from_file(renamed, progress=lambda *args: seen.append(args)) is True
+        assert _contents(restored) == _contents(nest)
+        assert seen[-1] == (renamed.stat().st_size, renamed.stat().st_size)
+
+    # An opened compressed file is checkpointed compressed.
+    path = str(tmp_path / ("log.json" + suffix))
+    assert nest.open_log(path) is True
+    nest.rename_list(board.lists[0].id, "Backlog")
+    assert nest.checkpoint() is True
+    restored = Nest()
+    assert restored.open_log(path) is True
+    assert _contents(restored) == _contents(nest)
+    assert restored.current_board.lists[0].title == "Backlog"
+
+#endregion Nest
+#region Search
+
+def test_search_ranks_titles_and_returns_paths(nest):
+    board = nest.create_board("Main Board")
+    nest.select_board(board.id)
+    list_id = board.lists[0].id
+    described = nest.add_task_to_list(list_id, "Write notes", "about the release")
+    titled = nest.add_task_to_list(list_id, "Release checklist")
+
+    hits = nest.search("release")
+    assert [hit.item for hit in hits] == [titled, described]
+    assert hits[0].kind == "task"
+    assert hits[0].board is board
+    assert hits[0].path == ("Main Board",)
+
+    assert [hit.kind for hit in nest.search("main board")] == ["board"]
+    assert [hit.item.title for hit in nest.search("progress")] == ["In Progress"]
+    assert nest.search("release nothing") == []
+
+def test_search_follows_mutations(nest):
+    board = nest.create_board("Main Board")
+    nest.select_board(board.id)
+    list_id = board.lists[0].id
+    task = nest.add_task_to_list(list_id, "Parent")
+    assert nest.search("needle") == []
+
+    nest.navigate_to_task_board(list_id, task.id)
+    nested_list_id = nest.current_board.lists[0].id
+    subtask = nest.add_task_to_list(nested_list_id, "Needle")
+    hits = nest.search("needle")
+    assert [hit.item for hit in hits] == [subtask]
+    assert hits[0].path == ("Main Board", "Board: Parent")
+
+    nest.update_task(subtask.id, "Haystack")
+    assert nest.search("needle") == []
+    nest.rename_list(nested_list_id, "Backlog")
+    assert [hit.item.id for hit in nest.search("backlog")] == [nested_list_id]
+
+    nest.back_to_parent()
+    nest.remove_task_from_list(list_id, task.id)
+    assert nest.search("haystack") == []
+    assert nest.search("backlog") == []
+
+def test_open_board_rebuilds_navigation(nest):
+    board = nest.create_board("Main Board")
+    nest.select_board(board.id)
+    list_id = board.lists[0].id
+    task = nest.add_task_to_list(list_id, "Parent")
+    nest.navigate_to_task_board(list_id, task.id)
+    nested = nest.current_board
+    nest.back_to_parent()
+
+    assert nest.open_board(nested.id) is True
+    assert nest.get_current_board() is nested
+    assert nest.navigation_stack == [(board.id, list_id, task.id)]
+    assert nest.back_to_parent() is True
+    assert nest.get_current_board() is board
+
+#endregion Search
+
+#region Query
+
+def _query_nest(nest):
+    board = nest.create_board("Main Board")
+    nest.select_board(board.id)
+    todo_id, done_id = board.lists[0].id, board.lists[2].id
+    old = nest.add_task_to_list(done_id, "Old")
+    old.created_at = datetime(2020, 1, 1)
+    parent = nest.add_task_to_list(todo_id, "Parent")
+    nest.navigate_to_task_board(todo_id, parent.id)
+    nested_done = nest.add_task_to_list(nest.current_board.lists[2].id, "Nested done")
+    nest.back_to_parent()
+    recent_done = nest.add_task_to_list(done_id, "Recent done")
+    return board, parent, old, nested_done, recent_done
+
+def test_query_walks_without_indexes(nest):
+    board, parent, old, nested_done, recent_done = _query_nest(nest)
+
+    result = nest.query(ListTitle("Done"), CreatedAfter(datetime(2024, 1, 1)))
+    assert result.tasks == [nested_done, recent_done]
+    assert result.plan.startswith("walk from root boards")
+
+    result = nest.query(ListTitle("Done") & MaxDepth(0))
+    assert result.tasks == [old, recent_done]
+    assert "max depth 0" in result.plan
+
+    result = nest.query(Under(parent.board.id))
+    assert result.tasks == [nested_done]
+
+def test_query_uses_indexes_when_they_exist(nest):
+    board, parent, old, nested_done, recent_done = _query_nest(nest)
+    nest.create_index("list_title")
+    nest.create_index("created_at")
+
+    result = nest.query(ListTitle("Done"), MaxDepth(0))
+    assert set(result.tasks) == {old, recent_done}
+    assert result.plan.startswith("index list_title")
+
+    result = nest.query(CreatedBefore(datetime(2021, 1, 1)), ListTitle("Done"))
+    assert result.tasks == [old]
+    assert result.plan.startswith("index created_at")
+
+    nest.rename_list(board.lists[2].id, "Shipped")
+    assert nest.query(ListTitle("Done")).tasks == [nested_done]
+
+    restored = Nest()
+    restored.create_index("list_title")
+    restored.deserialize(nest.serialize())
+    assert restored.query(ListTitle("Shipped")).plan.startswith("index list_title")
+
+#endregion Query
+
+#region Journal
+
+def _shape(nest):
+    return [(b.title, b.total_task_count, [(l.title, [t.title for t in l.tasks]) for l in b.lists])
+            for b in nest.boards]
+
+def test_undo_redo_single_operations(nest):
+    board = nest.create_board("Main Board")
+    nest.select_board(board.id)
+    todo_id, doing_id = board.lists[0].id, board.lists[1].id
+    first = nest.add_task_to_list(todo_id, "First")
+    second = nest.add_task_to_list(todo_id, "Second")
+    steps = [_shape(nest)]
+
+    nest.move_task_between_lists(first.id, todo_id, doing_id)
+    steps.append(_shape(nest))
+    nest.reorder_task_in_list(todo_id, second.id, 0)
+    nest.update_task(second.id, "Renamed", "Described")
+    steps.append(_shape(nest))
+    nest.rename_list(doing_id, "Doing")
+    nest.move_list_in_current_board(doing_id, 0)
+    steps.append(_shape(nest))
+    nest.remove_list_from_current_board(doing_id)
+    nest.remove_task_from_list(todo_id, second.id)
+    steps.append(_shape(nest))
+
+    for _ in range(6):
+        assert nest.undo() is True
+    assert _shape(nest) == steps[1]
+    assert nest.get_list_of_task(first.id).id == doing_id
+    assert second.description == ""
+
+    while nest.can_redo():
+        nest.redo()
+    assert _shape(nest) == steps[-1]
+    assert nest.get_task_by_id(first.id) is None
+
+    while nest.can_undo():
+        nest.undo()
+    assert len(nest.boards) == 0
+    assert nest.get_current_board() is None
+
+def test_bulk_operations_undo_in_one_step(nest):
+    board = nest.create_board("Main Board")
+    nest.select_board(board.id)
+    source_id, target_id = board.lists[0].id, board.lists[2].id
+    tasks = nest.add_tasks(source_id, [f"Task {i}" for i in range(6)])
+    before = _shape(nest)
+
+    nest.move_tasks([tasks[4].id, tasks[1].id], target_id)
+    nest.remove_tasks([tasks[0].id, tasks[4].id, tasks[5].id])
+    with nest.transaction():
+        nest.update_tasks({tasks[2].id: {'title': "Renamed"}})
+        nest.update_tasks({tasks[3].id: {'title': "Renamed too"}})
+
+    nest.undo()
+    assert tasks[2].title == "Task 2" and tasks[3].title == "Task 3"
+    nest.undo()
+    nest.undo()
+    assert _shape(nest) == before
+    assert [nest.get_list_of_task(t.id).id for t in tasks] == [source_id] * 6
+
+    nest.undo()
+    assert board.task_count == 0
+    assert nest.get_task_by_id(tasks[0].id) is None
+
+def test_undo_delete_restores_the_subtree(nest):
+    board, parent, child, leaf = _nested_nest(nest)
+    nest.create_index("list_title")
+    nest.navigate_to_task_board(board.lists[0].id, parent.id)
+    nest.delete_task(parent.id)
+    assert nest.get_current_board() is board
+
+    nest.undo()
+    assert board.total_task_count == 3
+    assert nest.get_task_by_id(leaf.id) is leaf
+    assert nest.get_board_by_id(child.board.id) is child.board
+    assert nest.search("leaf")[0].item is leaf
+
+    nest.redo()
+    assert nest.get_task_by_id(leaf.id) is None
+    assert nest.search("leaf") == []
+
+def test_redo_bulk_add_restores_nested_boards(nest):
+    board = nest.create_board("Main Board")
+    nest.select_board(board.id)
+    list_id = board.lists[0].id
+    task, = nest.add_tasks(list_id, ["Parent"])
+    nest.navigate_to_task_board(list_id, task.id)
+    nested = nest.current_board
+    subtask = nest.add_task_to_list(nested.lists[0].id, "Subtask")
+    nest.back_to_parent()
+
+    nest.undo()
+    nest.undo()
+    assert nest.get_task_by_id(task.id) is None
+    nest.redo()
+    nest.redo()
+    assert nest.get_board_by_id(nested.id) is nested
+    assert nest.get_list_of_task(subtask.id) is nested.lists[0]
+    assert board.total_task_count == 2
+
+def test_undo_remove_of_a_task_and_its_descendant(nest):
+    board, parent, child, leaf = _nested_nest(nest)
+    assert nest.remove_tasks([leaf.id, parent.id]) is True
+    assert nest.get_task_by_id(leaf.id) is None
+    assert board.total_task_count == 0
+
+    nest.undo()
+    assert board.total_task_count == 3
+    assert nest.get_task_by_id(leaf.id) is leaf
+    assert nest.get_list_of_task(leaf.id) is child.board.lists[1]
+
+def test_journal_is_bounded():
+    nest = Nest(undo_limit=3)
+    board = nest.create_board("Main Board")
+    nest.select_board(board.id)
+    for i in range(5):
+        nest.add_task_to_list(board.lists[0].id, f"Task {i}")
+
+    assert sum(1 for _ in iter(nest.undo, False)) == 3
+    assert len(board.lists[0].tasks) == 2
+
+    nest = Nest(undo_bytes=4096)
+    board = nest.create_board("Main Board")
+    nest.select_board(board.id)
+    tasks = nest.add_tasks(board.lists[0].id, [f"Task {i}" for i in range(100)])
+    nest.remove_tasks([t.id for t in tasks])
+    assert nest.can_undo() is False
+
+#endregion Journal
+
+#region Events
+
+def test_subscribers_get_events_of_their_board(nest):
+    board, parent, child, leaf = _nested_nest(nest)
+    main, nested = [], []
+    nest.subscribe(main.extend, board.id)
+    nest.subscribe(nested.extend, parent.board.id)
+
+    task = nest.add_task_to_list(board.lists[1].id, "Other")
+    assert main == [("task_added", board.id,
+                     {"list_id": board.lists[1].id, "task_id": task.id, "index": 0})]
+    assert nested == []
+
+    main.clear()
+    nest.move_task(task.id, parent.board.lists[0].id, 0)
+    assert [e.kind for e in main] == ["task_moved", "board_changed"]
+    assert [e.kind for e in nested] == ["task_moved", "board_changed"]
+    moved = nested[0].details
+    assert (moved["index"], moved["source_list_id"], moved["old_index"]) == (0, board.lists[1].id, 0)
+    assert nested[1].details == {"title": "Board: Parent", "task_count": 2, "task_id": parent.id,
+                                 "parent_board_id": board.id}
+
+    nest.unsubscribe(nested.extend, parent.board.id)
+    nest.rename_list(parent.board.lists[0].id, "Later")
+    assert len(nested) == 2
+
+def test_events_coalesce_in_batches(nest):
+    board = nest.create_board("Main Board")
+    nest.select_board(board.id)
+    batches = []
+    nest.subscribe(batches.append)
+
+    tasks = nest.add_tasks(board.lists[0].id, ["First", "Second", "Third"])
+    assert [[e.kind for e in batch] for batch in batches] == [["tasks_added"]]
+    assert batches[0][0].details["indexes"] == [0, 1, 2]
+
+    batches.clear()
+    with nest.transaction():
+        nest.update_task(tasks[0].id, "Renamed")
+        nest.update_task(tasks[0].id, "Renamed again")
+        nest.move_tasks([tasks[2].id, tasks[0].id], board.lists[1].id)
+    assert len(batches) == 1
+    assert [e.kind for e in batches[0]] == ["task_updated", "tasks_moved"]
+    assert batches[0][0].details["title"] == "Renamed again"
+    moved = batches[0][1].details
+    assert moved["task_ids"] == [tasks[2].id, tasks[0].id]
+    assert [s[2] for s in moved["sources"]] == [2, 0]
+
+    batches.clear()
+    nest.undo()
+    assert len(batches) == 1
+    assert [e.kind for e in batches[0]] == ["tasks_moved", "task_updated"]
+    assert batches[0][1].details["title"] == "First"
+
+#endregion Events
+
+#region Snapshot
+
+def test_snapshot_is_frozen_and_shares_unchanged_nodes(nest):
+    board, parent, child, leaf = _nested_nest(nest)
+    other = nest.add_task_to_list(board.lists[1].id, "Other")
+    before = nest.snapshot()
+    assert nest.snapshot() == before
+    assert nest.snapshot().boards[0] is before.boards[0]
+
+    nest.update_tasks({leaf.id: {'title': "Renamed leaf"}})
+    nest.remove_task_from_list(board.lists[1].id, other.id)
+    after = nest.snapshot()
+
+    assert [t.title for _, _, _, t in iter_tasks(before)] == ["Parent", "Other", "Child", "Leaf"]
+    assert [t.title for _, _, _, t in iter_tasks(after)] == ["Parent", "Child", "Renamed leaf"]
+    # Only the path from the leaf up to the root was rebuilt.
+    old_parent, new_parent = before.boards[0].lists[0].tasks[0], after.boards[0].lists[0].tasks[0]
+    assert old_parent is not new_parent
+    assert before.boards[0].lists[2] is after.boards[0].lists[2]
+    assert old_parent.board.lists[1] is new_parent.board.lists[1]
+    assert after.boards[0].total_task_count == 3
+
+def test_snapshot_diff(nest):
+    board, parent, child, leaf = _nested_nest(nest)
+    other = nest.add_task_to_list(board.lists[1].id, "Other")
+    before = nest.snapshot()
+
+    nest.move_task(child.id, board.lists[2].id)
+    nest.update_tasks({other.id: {'description': "Changed"}})
+    added = nest.add_task_to_list(board.lists[0].id, "Added")
+    nest.delete_task(leaf.id)
+
+    changes = diff(before, nest.snapshot())
+    assert changes.added == [added.id]
+    assert changes.removed == [leaf.id]
+    assert changes.changed == [other.id]
+    assert changes.moved == [child.id]
+    assert diff(before, before) == ([], [], [], [])
+
+def test_snapshot_handles_deep_hierarchies(nest):
+    root = _build_chain(1500)
+    nest.add_board(root)
+    snapshot = nest.snapshot()
+    assert sum(1 for _ in iter_tasks(snapshot)) == 1500
+
+#endregion Snapshot
+#region Ids
+
+def test_ids_are_integers_and_uuids_outside(nest):
+    board = nest.create_board("Main Board")
+    nest.select_board(board.id)
+    task = nest.add_task_to_list(board.lists[0].id, "Task")
+    assert type(task.id) is int
+
+    external = nest.external_id(task)
+    assert len(external) == 36
+    assert nest.internal_id(external) == task.id
+    assert nest.internal_id(external.upper()) == task.id
+    assert nest.internal_id("not-an-id") is None
+
+    data = nest.serialize()
+    assert data['boards'][0]['lists'][0]['tasks'][0]['id'] == external
+
+    restored = Nest()
+    assert restored.deserialize(data) is True
+    restored_task = restored.get_task_by_id(restored.internal_id(external))
+    assert restored_task.title == "Task"
+    assert restored.external_id(restored_task) == external
+    assert nest.add_task_to_list(board.lists[0].id, "New").id > task.id
+
+def test_legacy_files_keep_their_uuids(nest):
+    board_id, list_id, task_id, nested_id = (
+        "a3a6c1a8-3e54-4a1e-9f0c-4d3e2b1a0f01", "b1b2c3d4-1111-4222-8333-444455556666",
+        "c1c2c3c4-7777-4888-9999-aaaabbbbcccc", "d1d2d3d4-dddd-4eee-8fff-000011112222")
+    data = {
+        'boards': [
+            {'id': board_id, 'title': "Legacy", 'description': "", 'lists': [
+                {'id': list_id, 'title': "To Do", 'created_at': "2024-01-01T10:00:00",
+                 'tasks': [{'id': task_id, 'title': "Old", 'description': "",
+                            'created_at': "2024-01-01T10:00:00",
+                            'updated_at': "2024-01-01T10:00:00",
+                            'parent_board_id': board_id, 'board_id': nested_id}]}]},
+            {'id': nested_id, 'title': "Old", 'description': "",
+             'parent_board_id': board_id, 'parent_task_id': task_id, 'lists': []},
+        ],
+        'current_board_id': board_id,
+        'navigation_stack': [],
+        'current_list_id': None,
+        'current_task_id': None,
+    }
+    assert nest.deserialize(data) is True
+
+    task = nest.get_task_by_id(nest.internal_id(task_id))
+    assert type(task.id) is int
+    assert task.board.id == nest.internal_id(nested_id)
+    assert nest.get_current_board().id == nest.internal_id(board_id)
+
+    saved = nest.serialize()
+    saved_task = saved['boards'][0]['lists'][0]['tasks'][0]
+    assert (saved_task['id'], saved_task['board_id']) == (task_id, nested_id)
+    assert saved['current_board_id'] == board_id
+
+    restored = Nest()
+    assert restored.deserialize(saved) is True
+    assert restored.external_id(restored.get_list_of_task(restored.internal_id(task_id))) == list_id
+
+#endregion Ids
+#region Log
+
+def _contents(nest):
+    return [(depth, nest.external_id(board), board.title, nest.external_id(list_obj),
+             nest.external_id(task), task.title, task.description, board.total_task_count)
+            for depth, board, list_obj, task in nest.walk()]
+
+def test_log_replays_changes_after_a_crash(nest, tmp_path):
+    path = str(tmp_path / "board.ktb")
+    assert nest.open_log(path) is True
+    board, parent, child, leaf = _nested_nest(nest)
+    with open(path, 'rb') as f:
+        checkpoint = f.read()
+
+    tasks = nest.add_tasks(board.lists[1].id, ["One", "Two", "Three"])
+    nest.move_tasks([tasks[0].id, leaf.id], board.lists[2].id)
+    nest.update_task(child.id, "Child renamed")
+    nest.clone_task(parent.id, board.lists[2].id)
+    nest.delete_task(tasks[1].id)
+    nest.undo()
+    nest.rename_list(board.lists[0].id, "Backlog")
+    assert nest.save_to_file(path) is True
+
+    with open(path, 'rb') as f:
+        assert f.read() == checkpoint
+    with open(path + ".wal", "a", encoding='utf-8') as f:
+        f.write('[["_detach_task",{"id":')
+
+    restored = Nest()
+    assert restored.open_log(path) is True
+    assert _contents(restored) == _contents(nest)
+    known = {nest.external_id(task) for *_, task in nest.walk()}
+    restored.select_board(restored.root_boards()[0].id)
+    added = restored.add_task_to_list(restored.current_board.lists[0].id, "New")
+    assert restored.external_id(added) not in known
+
+    # The replayed log was folded into a new checkpoint, the new log follows it.
+    again = Nest()
+    assert again.open_log(path) is True
+    assert _contents(again) == _contents(restored)
+
+def _ranks(nest):
+    return [(item.id, item.rank) for board in nest.boards for list_obj in board.lists
+            for item in (list_obj, *list_obj.tasks)]
+
+def test_log_replays_ranks_exactly(nest, tmp_path):
+    path = str(tmp_path / "board.ktb")
+    assert nest.open_log(path) is True
+    board, parent, child, leaf = _nested_nest(nest)
+    nested = parent.board
+    tasks = nest.add_tasks(nested.lists[0].id, ["One", "Two", "Three"])
+    nest.navigate_to_task_board(board.lists[0].id, parent.id)
+    nest.reorder_task_in_list(nested.lists[0].id, tasks[2].id, 0)
+    nest.move_list_in_current_board(nested.lists[2].id, 0)
+    nest.back_to_parent()
+
+    # Undoing the delete brings the subtree back with the ranks it had.
+    nest.delete_task(parent.id)
+    nest.undo()
+    nest.move_task(leaf.id, board.lists[1].id, 0)
+    assert nest.save_to_file(path) is True
+
+    restored = Nest()
+    assert restored.open_log(path) is True
+    assert _ranks(restored) == _ranks(nest)
+
+def test_opening_a_legacy_file_leaves_it_as_is(nest, tmp_path):
+    path = tmp_path / "board.ktb"
+    board, parent, child, leaf = _nested_nest(nest)
+    path.write_text(json.dumps(nest.serialize(), indent=2), encoding='utf-8')
+    legacy = path.read_bytes()
+    log = tmp_path / "board.ktb.wal"
+
+    restored = Nest()
+    assert restored.open_log(str(path)) is True
+    assert restored.log_path == str(path)
+    assert path.read_bytes() == legacy and not log.exists()
+
+    # The first change starts the log, the file waits for a save.
+    restored.select_board(board.id)
+    restored.add_task_to_list(board.lists[1].id, "New")
+    assert log.exists() and path.read_bytes() == legacy
+    recovered = Nest()
+    assert recovered.load_from_file(str(path)) is True
+    assert replay_log(recovered, str(path), None) == 1
+    assert _contents(recovered) == _contents(restored)
+
+    assert restored.save_as(str(path)) is True
+    assert path.read_bytes().startswith(b"\x00KTB")
+    again = Nest()
+    assert again.open_log(str(path)) is True
+    assert _contents(again) == _contents(restored)
+
+#endregion Log
+#region Autosave
+
+def _reopen(path, tmp_path):
+    # Opens a copy of path and its log, as found after a crash.
+    crash = tmp_path / "crash"
+    crash.mkdir(exist_ok=True)
+    for name in (path, path + ".wal"):
+        shutil.copy(name, crash)
+    restored = Nest()
+    assert restored.open_log(str(crash / os.path.basename(path))) is True
+    return restored
+
+def test_background_save_goes_on_while_editing(nest, tmp_path):
+    path = str(tmp_path / "board.ktb")
+    assert nest.open_log(path) is True
+    assert nest.dirty is False
+    board, parent, child, leaf = _nested_nest(nest)
+    assert nest.dirty is True
+
+    job = nest.begin_save()
+    assert nest.dirty is False and nest.begin_save() is None
+    saved = _contents(nest)
+    nest.update_task(parent.id, "Parent renamed")
+    nest.add_tasks(board.lists[1].id, ["One", "Two"])
+    job.run()
+
+    # Stopping before the new file is in place keeps the old one and the whole log.
+    assert _contents(_reopen(path, tmp_path)) == _contents(nest)
+    assert nest.finish_save(job, False) is False
+
+    job = nest.begin_save()
+    job.run()
+    nest.delete_task(leaf.id)
+    job.commit()
+
+    # The file holds the snapshot, the log the changes made after it.
+    snapshot = Nest()
+    assert snapshot.load_from_file(path) is True
+    assert _contents(snapshot) != _contents(nest)
+    assert _contents(_reopen(path, tmp_path)) == _contents(nest)
+    assert nest.finish_save(job, True) is True
+
+    job = nest.begin_save()
+    job.run()
+    nest.rename_list(board.lists[0].id, "Backlog")
+    assert nest.finish_save(job, True) is True
+    with open(path + ".wal", encoding='utf-8') as f:
+        assert len(f.readlines()) == 2
+    restored = Nest()
+    assert restored.open_log(path) is True
+    assert _contents(restored) == _contents(nest) != saved
+
+def test_background_save_to_another_file(nest, tmp_path):
+    path = str(tmp_path / "board.json")
+    board, parent, child, leaf = _nested_nest(nest)
+    assert nest.begin_save() is None
+
+    progress = []
+    job = nest.begin_save(path)
+    job.run(progress=lambda done, total: progress.append((done, total)))
+    assert progress[-1] == (3, 3)
+    nest.update_task(parent.id, "Parent renamed")
+    assert nest.finish_save(job, False) is False
+    assert nest.dirty is True and nest.log_path is None
+    assert not os.listdir(tmp_path)
+
+    job = nest.begin_save(path)
+    job.run()
+    nest.rename_list(board.lists[0].id, "Backlog")
+    assert nest.finish_save(job, True) is True
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    assert data["boards"][0]["lists"][0]["title"] == "To Do"
+    assert data["boards"][0]["lists"][0]["tasks"][0]["title"] == "Parent renamed"
+    restored = Nest()
+    assert restored.open_log(path) is True
+    assert restored.serialize()["boards"] == nest.serialize()["boards"]
+
+#endregion Autosave
+#region Database
+
+def test_database_loads_boards_on_demand(nest, tmp_path):
+    path = str(tmp_path / "board.ktdb")
+    board, parent, child, leaf = _nested_nest(nest)
+    other = nest.create_board("Other")
+    assert nest.save_as(path) is True
+
+    restored = Nest()
+    assert restored.load_from_file(path) is True
+    root = restored.get_board_by_id(board.id)
+    assert restored.current_board is root and root.total_task_count == 3
+    assert restored.get_board_by_id(other.id).lists == ()
+
+    assert restored.select_board(board.id) is True
+    assert [t.title for t in root.lists[0].tasks] == ["Parent"]
+    assert restored.navigate_to_task_board(root.lists[0].id, parent.id) is True
+    nested = restored.get_current_board()
+    assert nested.lists[0].tasks[0].board.lists == ()
+
+    # Changes are written as they are made.
+    added = restored.add_task_to_list(nested.lists[1].id, "Added")
+    restored.update_task(child.id, "Child renamed")
+    restored.move_task_between_lists(child.id, nested.lists[0].id, nested.lists[2].id)
+    restored.delete_task(added.id)
+    restored.undo()
+    assert restored.serialize() is not None
+    restored.close_log()
+
+    again = Nest()
+    assert again.open_database(path, cache_boards=1) is True
+    assert again.select_board(board.id) is True
+    assert again.navigate_to_task_board(board.lists[0].id, parent.id) is True
+    assert again.get_current_board().total_task_count == 3
+    again.back_to_parent()
+    assert again.select_board(other.id) is True
+    assert again.get_board_by_id(parent.board.id).lists == ()
+
+    assert again.serialize() is not None
+    assert _contents(again) == _contents(restored)
+    assert again.get_task_by_id(child.id).title == "Child renamed"
+
+def test_database_reopens_on_the_current_board(nest, tmp_path):
+    path = str(tmp_path / "board.ktdb")
+    board, parent, child, leaf = _nested_nest(nest)
+    nest.create_board("Other")
+    nest.navigate_to_task_board(board.lists[0].id, parent.id)
+    nest.navigate_to_task_board(parent.board.lists[0].id, child.id)
+    assert nest.save_as(path) is True
+
+    restored = Nest()
+    assert restored.open_log(path) is True
+    assert restored.current_board.id == child.board.id
+    assert restored.navigation_stack == nest.navigation_stack
+    assert restored.get_board_path() == nest.get_board_path()
+
+    # Navigating is saved with the file, or when it is closed.
+    restored.back_to_parent()
+    restored.close_log()
+    again = Nest()
+    assert again.load_from_file(path) is True
+    assert again.current_board.id == parent.board.id
+    assert [t.title for t in again.current_board.lists[0].tasks] == ["Child"]
+
+    # A database saved without a current board opens on its first root board.
+    empty = Nest()
+    empty.create_board("Only")
+    assert empty.save_as(str(tmp_path / "empty.ktdb")) is True
+    assert again.open_database(str(tmp_path / "empty.ktdb")) is True
+    assert again.current_board.title == "Only"
+
+def test_database_keeps_boards_left_out_of_the_file(nest, tmp_path):
+    board = nest.create_board("Main Board")
+    nest.select_board(board.id)
+    list_id = board.lists[0].id
+    task = nest.add_task_to_list(list_id, "Parent")
+    nest.navigate_to_task_board(list_id, task.id)
+    nest.back_to_parent()
+    nest.save_to_file(str(tmp_path / "board.ktb"))
+
+    restored = Nest()
+    assert restored.load_from_file(str(tmp_path / "board.ktb")) is True
+    path = str(tmp_path / "board.ktdb")
+    assert restored.save_as(path) is True
+    assert restored.select_board(board.id) is True
+    assert restored.navigate_to_task_board(list_id, task.id) is True
+    nested = restored.get_current_board()
+    restored.add_task_to_list(nested.lists[0].id, "Subtask")
+    restored.close_log()
+
+    again = Nest()
+    assert again.open_database(path) is True
+    assert again.select_board(board.id) is True
+    assert again.navigate_to_task_board(list_id, task.id) is True
+    assert again.get_current_board().id == nested.id
+    assert [t.title for t in again.get_current_board().lists[0].tasks] == ["Subtask"]
+
+#endregion Database
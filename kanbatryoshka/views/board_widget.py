@@ -77,7 +77,7 @@ class BoardWidget(QWidget):
             
         drag = QDrag(self)
         mime_data = QMimeData()
-        mime_data.setText(f"list:{self.dragged_list.list_id}")
+        mime_data.setText(f"list:{self.dragged_list.external_id}")
         drag.setMimeData(mime_data)
         
         drag.exec_(Qt.MoveAction)
@@ -17,6 +17,10 @@ class NestCLI:
             "back": self.go_back,
             "move-task": self.move_task,
             "path": self.show_path,
+            "search": self.search,
+            "goto": self.goto_board,
+            "undo": self.undo,
+            "redo": self.redo,
             "clear": self.clear_screen
         }
 
@@ -62,6 +66,10 @@ class NestCLI:
         print("back                                 - Retourne au tableau parent")
         print("move-task <task_id> <src_id> <dst_id>- Déplace une tâche entre listes")
         print("path                                 - Affiche le chemin de navigation")
+        print("search <texte>                       - Recherche dans tous les tableaux")
+        print("goto <board_id>                      - Ouvre un tableau trouvé par la recherche")
+        print("undo                                 - Annule la dernière modification")
+        print("redo                                 - Rétablit la modification annulée")
         print("clear                                - Efface l'écran\n")
 
     def exit_app(self, *args):
@@ -85,7 +93,7 @@ class NestCLI:
                 print("Aucun tableau créé. Utilisez 'create-board' pour commencer.")
             else:
                 for idx, board in enumerate(self.app.boards):
-                    print(f"{idx+1}. [{board.id}] {board.title} - {board.description}")
+                    print(f"{idx+1}. [{self.app.external_id(board)}] {board.title} - {board.description}")
             print()
             return
         
@@ -96,12 +104,12 @@ class NestCLI:
             print("Aucune liste dans ce tableau. Utilisez 'add-list' pour en créer.")
         
         for idx, lst in enumerate(current.lists):
-            print(f"\n-- Liste {idx+1}: [{lst.id}] {lst.title} --")
+            print(f"\n-- Liste {idx+1}: [{self.app.external_id(lst)}] {lst.title} --")
             if not lst.tasks:
                 print("  Aucune tâche dans cette liste.")
             
             for task_idx, task in enumerate(lst.tasks):
-                print(f"  {task_idx+1}. [{task.id}] {task.title}")
+                print(f"  {task_idx+1}. [{self.app.external_id(task)}] {task.title}")
                 if task.description:
                     print(f"     {task.description}")
                 print(f"     [Double-cliquez pour ouvrir le board imbriqué]")
@@ -113,7 +121,7 @@ class NestCLI:
             print("Aucun tableau créé.")
         else:
             for idx, board in enumerate(self.app.boards):
-                print(f"{idx+1}. [{board.id}] {board.title}")
+                print(f"{idx+1}. [{self.app.external_id(board)}] {board.title}")
         print()
 
     def _list_tasks(self, list_id):
@@ -123,13 +131,13 @@ class NestCLI:
             return
         
         for lst in current.lists:
-            if lst.id == list_id:
+            if lst.id == self.app.internal_id(list_id):
                 print(f"\n=== Tâches dans la liste: {lst.title} ===")
                 if not lst.tasks:
                     print("Aucune tâche dans cette liste.")
                 
                 for idx, task in enumerate(lst.tasks):
-                    print(f"{idx+1}. [{task.id}] {task.title}")
+                    print(f"{idx+1}. [{self.app.external_id(task)}] {task.title}")
                     if task.description:
                         print(f"   {task.description}")
                 print()
@@ -146,7 +154,7 @@ class NestCLI:
         description = " ".join(args[1:]) if len(args) > 1 else ""
         
         board = self.app.create_board(title, description)
-        print(f"Tableau créé avec succès: [{board.id}] {board.title}")
+        print(f"Tableau créé avec succès: [{self.app.external_id(board)}] {board.title}")
 
     def select_board(self, *args):
         if not args:
@@ -154,7 +162,7 @@ class NestCLI:
             return
         
         board_id = args[0]
-        if self.app.select_board(board_id):
+        if self.app.select_board(self.app.internal_id(board_id)):
             board = self.app.get_current_board()
             print(f"Tableau sélectionné: {board.title}")
         else:
@@ -172,7 +180,7 @@ class NestCLI:
         
         title = " ".join(args)
         list_obj = self.app.add_list_to_current_board(title)
-        print(f"Liste ajoutée: [{list_obj.id}] {list_obj.title}")
+        print(f"Liste ajoutée: [{self.app.external_id(list_obj)}] {list_obj.title}")
 
     def add_task(self, *args):
         if len(args) < 2:
@@ -183,9 +191,9 @@ class NestCLI:
         title = args[1]
         description = " ".join(args[2:]) if len(args) > 2 else ""
         
-        task = self.app.add_task_to_list(list_id, title, description)
+        task = self.app.add_task_to_list(self.app.internal_id(list_id), title, description)
         if task:
-            print(f"Tâche ajoutée: [{task.id}] {task.title}")
+            print(f"Tâche ajoutée: [{self.app.external_id(task)}] {task.title}")
         else:
             print(f"Liste avec ID {list_id} non trouvée.")
     
@@ -197,7 +205,8 @@ class NestCLI:
         list_id = args[0]
         task_id = args[1]
         
-        if self.app.navigate_to_task_board(list_id, task_id):
+        if self.app.navigate_to_task_board(self.app.internal_id(list_id),
+                                           self.app.internal_id(task_id)):
             board = self.app.get_current_board()
             print(f"Navigué vers le tableau de la tâche: {board.title}")
         else:
@@ -219,7 +228,9 @@ class NestCLI:
         source_list_id = args[1]
         target_list_id = args[2]
         
-        if self.app.move_task_between_lists(task_id, source_list_id, target_list_id):
+        if self.app.move_task_between_lists(self.app.internal_id(task_id),
+                                            self.app.internal_id(source_list_id),
+                                            self.app.internal_id(target_list_id)):
             print(f"Tâche [{task_id}] déplacée avec succès.")
         else:
             print("Échec du déplacement. Vérifiez les IDs.")
@@ -231,4 +242,42 @@ class NestCLI:
             return
         
         print("Chemin de navigation:")
-        print(" > ".join(path))
\ No newline at end of file
+        print(" > ".join(path))
+
+    def search(self, *args):
+        if not args:
+            print("Erreur: Le texte à rechercher est requis.")
+            return
+
+        hits = self.app.search(" ".join(args))
+        if not hits:
+            print("Aucun résultat.")
+            return
+
+        print(f"\n=== {len(hits)} résultat(s) ===")
+        for idx, hit in enumerate(hits):
+            print(f"{idx+1}. ({hit.kind}) [{self.app.external_id(hit.item)}] {hit.item.title}")
+            print(f"     {' > '.join(hit.path)}  [board: {self.app.external_id(hit.board)}]")
+        print()
+
+    def goto_board(self, *args):
+        if not args:
+            print("Erreur: L'ID du tableau est requis.")
+            return
+
+        if self.app.open_board(self.app.internal_id(args[0])):
+            print(f"Tableau ouvert: {' > '.join(self.app.get_board_path())}")
+        else:
+            print(f"Tableau avec ID {args[0]} non trouvé.")
+
+    def undo(self, *args):
+        if self.app.undo():
+            print("Modification annulée.")
+        else:
+            print("Rien à annuler.")
+
+    def redo(self, *args):
+        if self.app.redo():
+            print("Modification rétablie.")
+        else:
+            print("Rien à rétablir.")
@@ -13,10 +13,11 @@ class ListWidget(QFrame):
     task_moved = Signal(str, int)
     task_moved_to_list = Signal(str, str)
 
-    def __init__(self, title, list_id = None):
+    def __init__(self, title, list_id = None, external_id = None):
         super().__init__()
         self.title = title
         self.list_id = list_id if list_id else str(uuid.uuid4())
+        self.external_id = external_id if external_id else str(self.list_id)
         self.task_widgets = {}
         self.setup_ui()
         self.update_delete_button_state()
@@ -111,9 +112,12 @@ class ListWidget(QFrame):
         main_layout.addWidget(self.add_task_button)
      
 
-    def add_task(self, title, description = "", task_id = None):
-        task_widget = TaskWidget(title, description, task_id)
-        self.tasks_layout.addWidget(task_widget)
+    def add_task(self, title, description = "", task_id = None, index = None, external_id = None):
+        task_widget = TaskWidget(title, description, task_id, external_id)
+        if index is None:
+            self.tasks_layout.addWidget(task_widget)
+        else:
+            self.tasks_layout.insertWidget(index, task_widget)
 
         if task_id:
             self.task_widgets[task_id] = task_widget
@@ -153,11 +157,11 @@ class ListWidget(QFrame):
 
 
 
-    def find_task_index(self, task_id):
+    def find_task_index(self, external_id):
         for i in range(self.tasks_layout.count()):
             item = self.tasks_layout.itemAt(i)
             if item and item.widget():
-                if hasattr(item.widget(), 'task_id') and item.widget().task_id == task_id:
+                if getattr(item.widget(), 'external_id', None) == external_id:
                     return i
         return -1
 
@@ -259,7 +263,7 @@ class ListWidget(QFrame):
             
         drag = QDrag(self)
         mime_data = QMimeData()
-        mime_data.setText(f"list:{self.list_id}")
+        mime_data.setText(f"list:{self.external_id}")
         drag.setMimeData(mime_data)
         
         pixmap = QPixmap(self.size())
@@ -311,7 +315,7 @@ class ListWidget(QFrame):
             drop_index = self.get_drop_index(event.pos())
             
             if source_list and source_list != self:
-                source_list_id = source_list.list_id
+                source_list_id = source_list.external_id
                 self.task_moved_to_list.emit(task_id, source_list_id)
             else:
                 current_index = self.find_task_index(task_id)
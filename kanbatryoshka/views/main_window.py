@@ -1,6 +1,6 @@
 from PySide6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QMessageBox, QFileDialog,
-                              QStatusBar, QPushButton, QLabel, 
-                              QToolBar)
+                              QStatusBar, QPushButton, QLabel, QLineEdit,
+                              QToolBar, QSizePolicy)
 from PySide6.QtCore import Signal
 from PySide6.QtGui import QAction
 from ..views.board_widget import BoardWidget
@@ -11,6 +11,9 @@ class MainWindow(QMainWindow):
     new_board_requested = Signal()
     save_requested = Signal(str)
     load_requested = Signal(str)
+    search_requested = Signal(str)
+    undo_requested = Signal()
+    redo_requested = Signal()
 
     def __init__(self):
         super().__init__()
@@ -36,6 +39,16 @@ class MainWindow(QMainWindow):
         self.path_label = QLabel()
         toolbar.addWidget(self.path_label)
 
+        spacer = QWidget()
+        spacer.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Preferred)
+        toolbar.addWidget(spacer)
+
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Search all boards...")
+        self.search_input.setClearButtonEnabled(True)
+        self.search_input.setFixedWidth(250)
+        toolbar.addWidget(self.search_input)
+
         main_layout = QVBoxLayout(central_widget)
 
         self.board_widget = BoardWidget()
@@ -72,8 +85,21 @@ class MainWindow(QMainWindow):
         exit_action.triggered.connect(self.close)
         file_menu.addAction(exit_action)
 
+        edit_menu = menubar.addMenu("&Edit")
+
+        undo_action = QAction("&Undo", self)
+        undo_action.setShortcut("Ctrl+Z")
+        undo_action.triggered.connect(self.undo_requested.emit)
+        edit_menu.addAction(undo_action)
+
+        redo_action = QAction("&Redo", self)
+        redo_action.setShortcut("Ctrl+Y")
+        redo_action.triggered.connect(self.redo_requested.emit)
+        edit_menu.addAction(redo_action)
+
     def setup_connections(self):
         self.board_widget.add_list_requested.connect(self.add_list_requested.emit)
+        self.search_input.returnPressed.connect(self.on_search)
     
     def set_board_title(self, title):
         self.board_widget.set_board_title(title)
@@ -93,7 +119,7 @@ class MainWindow(QMainWindow):
     
     def on_save(self):
         file_path, _ = QFileDialog.getSaveFileName(
-            self, "Save Kanban Board", "", "Kanbatryoshka Files (*.ktb);;JSON Files (*.json);;All Files (*)"
+            self, "Save Kanban Board", "", "Kanbatryoshka Files (*.ktb);;Kanbatryoshka Database (*.ktdb);;JSON Files (*.json);;Compressed Files (*.ktb.gz *.ktb.bz2 *.ktb.xz *.json.gz *.json.bz2 *.json.xz);;All Files (*)"
         )
         
         if file_path:
@@ -105,9 +131,14 @@ class MainWindow(QMainWindow):
     
     def on_load(self):
         file_path, _ = QFileDialog.getOpenFileName(
-            self, "Load Kanban Board", "", "Kanbatryoshka Files (*.ktb);;JSON Files (*.json);;All Files (*)"
+            self, "Load Kanban Board", "", "Kanbatryoshka Files (*.ktb);;Kanbatryoshka Database (*.ktdb);;JSON Files (*.json);;Compressed Files (*.ktb.gz *.ktb.bz2 *.ktb.xz *.json.gz *.json.bz2 *.json.xz);;All Files (*)"
         )
         
         if file_path:
             self.load_requested.emit(file_path)
-            self.status_bar.showMessage(f"Loaded from {file_path}")
\ No newline at end of file
+            self.status_bar.showMessage(f"Loaded from {file_path}")
+
+    def on_search(self):
+        query = self.search_input.text().strip()
+        if query:
+            self.search_requested.emit(query)
@@ -0,0 +1,34 @@
+from PySide6.QtWidgets import QDialog, QVBoxLayout, QLabel, QListWidget, QListWidgetItem, QPushButton
+from PySide6.QtCore import Qt, Signal
+
+class SearchDialog(QDialog):
+    board_requested = Signal(object)
+
+    def __init__(self, query, hits, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(f"Search: {query}")
+        self.resize(600, 400)
+        self.setup_ui(hits)
+
+    def setup_ui(self, hits):
+        layout = QVBoxLayout(self)
+
+        summary = QLabel(f"{len(hits)} result(s)" if hits else "No result")
+        summary.setStyleSheet("font-weight: bold;")
+        layout.addWidget(summary)
+
+        self.results_list = QListWidget()
+        for hit in hits:
+            item = QListWidgetItem(f"[{hit.kind}] {hit.item.title}\n    {' > '.join(hit.path)}")
+            item.setData(Qt.UserRole, hit.board.id)
+            self.results_list.addItem(item)
+        self.results_list.itemActivated.connect(self.handle_item_activated)
+        layout.addWidget(self.results_list)
+
+        close_button = QPushButton("Close")
+        close_button.clicked.connect(self.reject)
+        layout.addWidget(close_button)
+
+    def handle_item_activated(self, item):
+        self.board_requested.emit(item.data(Qt.UserRole))
+        self.accept()
@@ -9,12 +9,14 @@ class TaskWidget(QFrame):
     delete_task_requested = Signal()
 
 
-    def __init__(self, title, description, task_id = None):
+    def __init__(self, title, description, task_id = None, external_id = None):
         super().__init__()
 
         self.title = title
         self.description = description
         self.task_id = task_id if task_id else str(uuid.uuid4())
+        # Drag and drop payloads carry the stable UUID, never the internal id.
+        self.external_id = external_id if external_id else str(self.task_id)
         self.has_subtasks = False
         self.drag_start_position = None
         self.is_dragging = False
@@ -236,8 +238,8 @@ class TaskWidget(QFrame):
         drag = QDrag(self)
         mime_data = QMimeData()
         
-        mime_data.setText(f"{self.task_id}")
-        mime_data.setData("application/x-task-id", QByteArray(self.task_id.encode()))
+        mime_data.setText(f"{self.external_id}")
+        mime_data.setData("application/x-task-id", QByteArray(self.external_id.encode()))
         
         drag.setMimeData(mime_data)
         